@@ -1,25 +1,41 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Cookie, Header
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Cookie, Header, Query, Response
+from fastapi.responses import StreamingResponse
 from typing import List, Optional, Dict
 from datetime import datetime, timedelta
 from pydantic import BaseModel
-from app.db.database import add_booking, get_bookings, check_availability
-from app.services.ai_service import process_inquiry, process_reservation_request, initialize_knowledge_base, set_vector_store, convert_to_html
-from app.utils.config import get_max_capacity, initialize_knowledge_base
+from app.db.database import BOOKING_FIELDS, get_bookings_page, iter_bookings, check_availability, reserve_booking, reserve_group_bookings, cancel_booking, get_slot_availability, add_capacity_override, get_capacity_overrides, delete_capacity_override, add_table, get_tables, remove_table, get_booking_tables
+from app.services.ai_service import process_inquiry, process_reservation_request, stream_inquiry, get_reservation_path_stats, convert_to_html
+from app.services.response_cache import response_cache
+from app.services.llm_gateway import llm_gateway
+from app.services.session_store import session_store
+from app.services.analytics import refresh_rollups, get_daily_covers, get_hourly_heatmap, get_party_size_histogram, forecast_peak_hours, FORECAST_WEEKS
+from app.services.knowledge_base import load_live_knowledge_base, sync_live_knowledge_base, knowledge_base_stats, query_embedding_stats
+from app.utils.config import get_max_capacity, get_time_slots, get_knowledge_base_path
+from app.utils.executors import run_db, run_llm, submit_llm
+from app.utils.metrics import BOOKINGS
+import csv
+import io
+import json
+import logging
 import os
 import uuid
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-# Track chat sessions (store temporarily in memory - would use redis or database in production)
-chat_sessions: Dict[str, datetime] = {}
+# Longest date range a single /availability/range/ request may cover
+MAX_AVAILABILITY_RANGE_DAYS = 31
+# Longest date range a single analytics request may cover
+MAX_ANALYTICS_RANGE_DAYS = 366
 
-# During app startup
-vector_store, message = initialize_knowledge_base()
-if vector_store:
-    set_vector_store(vector_store)
-    print(message)
-else:
-    print(f"Failed to initialize knowledge base: {message}")
+# Page sizes GET /bookings/ returns by default and at most; exports are streamed EXPORT_PAGE_SIZE rows at a time
+DEFAULT_BOOKINGS_PAGE_SIZE = 100
+MAX_BOOKINGS_PAGE_SIZE = 1000
+EXPORT_PAGE_SIZE = 1000
+
+# Recent knowledge base ingestion jobs by id (finished ones past the most recent MAX_INGESTION_JOBS are dropped)
+ingestion_jobs: Dict[str, dict] = {}
+MAX_INGESTION_JOBS = 100
 
 # Models for API request/response
 class BookingRequest(BaseModel):
@@ -39,16 +55,33 @@ class BookingResponse(BaseModel):
     name: str
     success: bool
     message: str
+    tables: List[str] = []  # Assigned tables, when the table inventory is managed
 
 class AvailabilityRequest(BaseModel):
     date: str
     time: str
     guests: int
+    end_time: Optional[str] = None  # Defaults to time plus the dining duration
 
 class AvailabilityResponse(BaseModel):
     available: bool
     seats_left: int
 
+class AvailabilityRangeRequest(BaseModel):
+    start_date: str
+    end_date: str
+    guests: int
+    times: Optional[List[str]] = None  # Defaults to the configured time slots
+
+class SlotAvailability(BaseModel):
+    date: str
+    time: str
+    available: bool
+    seats_left: int
+
+class AvailabilityRangeResponse(BaseModel):
+    slots: List[SlotAvailability]
+
 class ChatRequest(BaseModel):
     message: str
     session_id: Optional[str] = None  # Optional session ID from client
@@ -57,6 +90,18 @@ class ChatResponse(BaseModel):
     response: str
     session_id: str  # Return session ID to client
 
+class TableRequest(BaseModel):
+    name: str
+    seats: int
+    combine_group: Optional[str] = None  # Tables in the same group can be pushed together
+
+class CapacityOverrideRequest(BaseModel):
+    date: str
+    capacity: int
+    start_time: Optional[str] = None  # Whole day when both times are omitted
+    end_time: Optional[str] = None
+    note: Optional[str] = ""
+
 class MultiBookingRequest(BaseModel):
     dates: List[str]
     time: str
@@ -66,20 +111,63 @@ class MultiBookingRequest(BaseModel):
     contact_person: str
     event_type: str
     special_requirements: Optional[str] = ""
+    all_or_nothing: bool = False  # Book every date or none of them
 
 class MultiBookingResponse(BaseModel):
     successful_dates: List[str]
     failed_dates: List[str]
 
+def _touch_session(session_id: Optional[str]) -> str:
+    """Get or create a chat session ID and extend its expiry"""
+    current_session_id = session_id or str(uuid.uuid4())
+    session_store.touch(current_session_id)
+    return current_session_id
+
+def _record_turn(session_id: str, message: str, response: str):
+    """Add a question and its answer to the session history"""
+    session_store.append(session_id, "user", message)
+    session_store.append(session_id, "assistant", response)
+
+def _validate_date_range(start_date: str, end_date: str, max_days: int):
+    """Reject malformed, reversed or overly long YYYY-MM-DD date ranges with a 400"""
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        end = datetime.strptime(end_date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+    
+    if end < start:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if (end - start).days >= max_days:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {max_days} days")
+
+def _is_reservation_message(message: str) -> bool:
+    """Check if a chat message is a reservation request"""
+    return any(keyword in message.lower() for keyword in ["reservation", "book", "table"])
+
+def _sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 # Routes
 @router.post("/bookings/", response_model=BookingResponse)
 async def create_booking(booking: BookingRequest):
     """Create a new booking"""
     try:
-        # Check availability
-        is_available, seats_left = check_availability(booking.date, booking.time, booking.guests)
+        # Check availability and book in one transaction
+        booking_id, seats_left = await run_db(
+            reserve_booking,
+            date=booking.date,
+            time=booking.time,
+            guests=booking.guests,
+            name=booking.name,
+            email=booking.email,
+            phone=booking.phone,
+            special_requests=booking.special_requests
+        )
         
-        if not is_available:
+        if booking_id == -1:
+            BOOKINGS.inc(channel="api", result="rejected")
             return BookingResponse(
                 id=-1,
                 date=booking.date,
@@ -90,17 +178,7 @@ async def create_booking(booking: BookingRequest):
                 message=f"No availability. Only {seats_left} seats left."
             )
         
-        # Add booking
-        booking_id = add_booking(
-            date=booking.date,
-            time=booking.time,
-            guests=booking.guests,
-            name=booking.name,
-            email=booking.email,
-            phone=booking.phone,
-            special_requests=booking.special_requests
-        )
-        
+        BOOKINGS.inc(channel="api", result="booked")
         return BookingResponse(
             id=booking_id,
             date=booking.date,
@@ -108,29 +186,232 @@ async def create_booking(booking: BookingRequest):
             guests=booking.guests,
             name=booking.name,
             success=True,
-            message="Booking successful!"
+            message="Booking successful!",
+            tables=await run_db(get_booking_tables, booking_id)
         )
     
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/bookings/", response_model=List[dict])
-async def get_all_bookings(date: Optional[str] = None):
-    """Get all bookings or for a specific date"""
+async def get_all_bookings(
+    response: Response,
+    date: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated columns, e.g. date,time,guests"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_BOOKINGS_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    format: str = Query("json", pattern="^(json|ndjson|csv)$"),
+):
+    """Get bookings for a date or date range, ordered by date.
+
+    The result is one page of limit bookings (DEFAULT_BOOKINGS_PAGE_SIZE if
+    not given) and the X-Next-Cursor header holds the cursor for the next
+    one. format=ndjson or csv streams every matching booking after cursor
+    (from the start if not given) without loading them all into memory.
+    """
+    if date:
+        start_date = end_date = date
+    selected = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    
     try:
-        bookings = get_bookings(date)
-        return bookings  # Already converted to dictionaries in get_bookings
+        if format != "json":
+            # Fail on bad fields now, while we can still answer with a 400
+            await run_db(get_bookings_page, start_date, end_date, selected, cursor, 1)
+            return StreamingResponse(
+                _export_bookings(start_date, end_date, selected, format, cursor),
+                media_type="text/csv" if format == "csv" else "application/x-ndjson",
+                headers={"Content-Disposition": f"attachment; filename=bookings.{format}"},
+            )
+        
+        bookings, next_cursor = await run_db(get_bookings_page, start_date, end_date, selected, cursor,
+                                             limit or DEFAULT_BOOKINGS_PAGE_SIZE)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return bookings
     
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _export_bookings(start_date: Optional[str], end_date: Optional[str],
+                           fields: Optional[List[str]], format: str, after: Optional[str] = None):
+    """Render bookings (after the cursor, if given) as CSV or NDJSON one page at a time"""
+    pages = iter_bookings(start_date, end_date, fields, EXPORT_PAGE_SIZE, after)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields or list(BOOKING_FIELDS))
+    if format == "csv":
+        writer.writeheader()
+    while True:
+        page = await run_db(next, pages, None)
+        if page is None:
+            break
+        if format == "ndjson":
+            yield "".join(json.dumps(booking) + "\n" for booking in page)
+            continue
+        writer.writerows(page)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if format == "csv" and buffer.tell():
+        yield buffer.getvalue()
+
+@router.delete("/bookings/{booking_id}")
+async def delete_booking(booking_id: int):
+    """Cancel a booking and release its seats"""
+    try:
+        cancelled = await run_db(cancel_booking, booking_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    if not cancelled:
+        raise HTTPException(status_code=404, detail="Booking not found")
+    return {"id": booking_id, "status": "cancelled"}
 
 @router.post("/availability/", response_model=AvailabilityResponse)
 async def check_table_availability(request: AvailabilityRequest):
     """Check if a table is available"""
     try:
-        is_available, seats_left = check_availability(request.date, request.time, request.guests)
+        is_available, seats_left = await run_db(check_availability, request.date, request.time, request.guests,
+                                                request.end_time)
         return AvailabilityResponse(available=is_available, seats_left=seats_left)
     
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/availability/range/", response_model=AvailabilityRangeResponse)
+async def check_availability_range(request: AvailabilityRangeRequest):
+    """Check seats left for every time slot across a date range"""
+    _validate_date_range(request.start_date, request.end_date, MAX_AVAILABILITY_RANGE_DAYS)
+    
+    try:
+        seats = await run_db(get_slot_availability, request.start_date, request.end_date, request.times or get_time_slots())
+        return AvailabilityRangeResponse(slots=[
+            SlotAvailability(date=date, time=time, available=seats_left >= request.guests, seats_left=seats_left)
+            for (date, time), seats_left in seats.items()
+        ])
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/tables/")
+async def list_tables():
+    """Tables in the inventory"""
+    try:
+        return await run_db(get_tables)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/tables/")
+async def create_table(request: TableRequest):
+    """Add a table; once any table exists, bookings must fit on free tables"""
+    if request.seats < 1:
+        raise HTTPException(status_code=400, detail="seats must be at least 1")
+    try:
+        table_id = await run_db(add_table, request.name, request.seats, request.combine_group)
+        return {"id": table_id}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/tables/{table_id}")
+async def delete_table(table_id: int):
+    """Stop assigning a table to new bookings"""
+    try:
+        removed = await run_db(remove_table, table_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if not removed:
+        raise HTTPException(status_code=404, detail="Table not found")
+    return {"id": table_id, "status": "removed"}
+
+@router.post("/capacity/overrides/")
+async def create_capacity_override(request: CapacityOverrideRequest):
+    """Limit seats for a day or a window of it (e.g. a private event or a short-staffed evening)"""
+    _validate_date_range(request.date, request.date, 1)
+    if request.capacity < 0:
+        raise HTTPException(status_code=400, detail="capacity must not be negative")
+    try:
+        override_id = await run_db(add_capacity_override, request.date, request.capacity,
+                                   request.start_time, request.end_time, request.note or "")
+        return {"id": override_id}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/capacity/overrides/")
+async def list_capacity_overrides(date: Optional[str] = None):
+    """Capacity overrides, optionally for one date"""
+    try:
+        return await run_db(get_capacity_overrides, date)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/capacity/overrides/{override_id}")
+async def remove_capacity_override(override_id: int):
+    """Remove a capacity override"""
+    try:
+        deleted = await run_db(delete_capacity_override, override_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Capacity override not found")
+    return {"id": override_id, "status": "deleted"}
+
+@router.post("/analytics/refresh/")
+async def refresh_analytics():
+    """Fold new, cancelled and edited bookings into the analytics rollups"""
+    try:
+        return await run_db(refresh_rollups)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/analytics/covers/")
+async def analytics_daily_covers(start_date: str, end_date: str):
+    """Bookings and covers per day"""
+    _validate_date_range(start_date, end_date, MAX_ANALYTICS_RANGE_DAYS)
+    try:
+        await run_db(refresh_rollups)
+        return await run_db(get_daily_covers, start_date, end_date)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/analytics/heatmap/")
+async def analytics_heatmap(start_date: str, end_date: str):
+    """Covers per hour for each day, as {date: {hour: covers}}"""
+    _validate_date_range(start_date, end_date, MAX_ANALYTICS_RANGE_DAYS)
+    try:
+        await run_db(refresh_rollups)
+        return await run_db(get_hourly_heatmap, start_date, end_date)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/analytics/party-sizes/")
+async def analytics_party_sizes():
+    """Number of bookings per party size"""
+    try:
+        await run_db(refresh_rollups)
+        return await run_db(get_party_size_histogram)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/analytics/forecast/")
+async def analytics_forecast(date: str, weeks: int = Query(FORECAST_WEEKS, ge=1, le=52)):
+    """Expected covers per hour and the likely peak hour for a date"""
+    _validate_date_range(date, date, 1)
+    try:
+        await run_db(refresh_rollups)
+        return await run_db(forecast_peak_hours, date, weeks)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -138,43 +419,81 @@ async def check_table_availability(request: AvailabilityRequest):
 async def chat(request: ChatRequest, session_id: Optional[str] = Header(None)):
     """Process a chat message"""
     try:
-        print(f"Chat request received: {request.message}")
-        
-        # Get or create session ID
-        current_session_id = session_id or request.session_id or str(uuid.uuid4())
-        
-        # Update session timestamp or create new session
-        chat_sessions[current_session_id] = datetime.now()
+        logger.debug("Chat request received message=%r", request.message)
         
-        # Clean up old sessions (older than 1 hour)
-        current_time = datetime.now()
-        expired_sessions = [sid for sid, timestamp in chat_sessions.items() 
-                           if (current_time - timestamp).total_seconds() > 3600]
-        for sid in expired_sessions:
-            chat_sessions.pop(sid, None)
+        current_session_id = await run_db(_touch_session, session_id or request.session_id)
         
-        # Check if it's a reservation request
-        is_reservation = any(keyword in request.message.lower() for keyword in ["reservation", "book", "table"])
-        
-        if is_reservation:
-            print("Processing as reservation request")
+        if _is_reservation_message(request.message):
+            logger.debug("Processing as reservation request")
             # Response already in HTML format
-            result = process_reservation_request(request.message)
+            result = await run_llm(process_reservation_request, request.message)
         else:
-            print("Processing as general inquiry")
+            logger.debug("Processing as general inquiry")
+            history = await run_db(session_store.get_history, current_session_id)
             # Response already in HTML format
-            result = process_inquiry(request.message)
+            result = await run_llm(process_inquiry, request.message, history)
         
-        print(f"Generated response (first 100 chars): {result[:100] if result else 'None'}")
+        logger.debug("Generated response=%.100r", result)
+        await run_db(_record_turn, current_session_id, request.message, result)
         return ChatResponse(response=result, session_id=current_session_id)
     
     except Exception as e:
-        print(f"Error in chat endpoint: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in chat endpoint: %s", e)
         error_response = convert_to_html(f"I'm sorry, I encountered an error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/chat/stream/")
+async def chat_stream(request: ChatRequest, session_id: Optional[str] = Header(None)):
+    """Process a chat message, streaming the answer as Server-Sent Events.
+
+    Events: "session" {session_id}, then "token" {text} and "html" {html}
+    for each finished block while the answer is generated, and finally
+    "done" {response, session_id} with the same HTML /chat/ would return
+    (or "error" {detail}).
+    """
+    current_session_id = await run_db(_touch_session, session_id or request.session_id)
+    
+    async def events():
+        yield _sse_event("session", {"session_id": current_session_id})
+        try:
+            if _is_reservation_message(request.message):
+                # Reservations are booked in one step; there is nothing to stream
+                result = await run_llm(process_reservation_request, request.message)
+                await run_db(_record_turn, current_session_id, request.message, result)
+                yield _sse_event("done", {"response": result, "session_id": current_session_id})
+                return
+            
+            history = await run_db(session_store.get_history, current_session_id)
+            async for kind, payload in stream_inquiry(request.message, history):
+                if kind == "token":
+                    yield _sse_event("token", {"text": payload})
+                elif kind == "html":
+                    yield _sse_event("html", {"html": payload})
+                else:
+                    await run_db(_record_turn, current_session_id, request.message, payload)
+                    yield _sse_event("done", {"response": payload, "session_id": current_session_id})
+        except Exception as e:
+            logger.exception("Error in chat stream: %s", e)
+            yield _sse_event("error", {"detail": str(e)})
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.get("/chat/cache/")
+async def chat_cache_stats():
+    """Hit/miss counters for the chatbot response cache and the query embedding cache"""
+    return {**response_cache.stats(), "query_embeddings": dict(query_embedding_stats)}
+
+@router.get("/chat/llm/")
+async def chat_llm_stats():
+    """LLM gateway counters and circuit breaker state"""
+    return llm_gateway.stats()
+
+@router.get("/chat/reservation-stats/")
+async def chat_reservation_stats():
+    """How often chat reservations took the template fast path versus the agent"""
+    return get_reservation_path_stats()
+
 @router.post("/chat-simple/", response_model=ChatResponse)
 async def chat_simple(request: ChatRequest):
     """A simple chat endpoint that doesn't use the AI for testing"""
@@ -211,11 +530,17 @@ async def chat_simple(request: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/initialize-knowledge-base/")
-async def init_knowledge_base():
-    """Initialize the knowledge base for AI"""
+async def init_knowledge_base(force: bool = False):
+    """Initialize the knowledge base for AI (rebuilds only if the PDFs changed, unless forced)"""
     try:
-        initialize_knowledge_base()
-        return {"status": "success", "message": "Knowledge base initialized successfully"}
+        vector_store, message = await run_llm(load_live_knowledge_base, force_rebuild=force)
+        if not vector_store:
+            raise HTTPException(status_code=500, detail=message)
+        
+        return {"status": "success", "message": message, "stats": knowledge_base_stats}
+    
+    except HTTPException:
+        raise
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -223,44 +548,85 @@ async def init_knowledge_base():
 @router.post("/bookings/group/", response_model=MultiBookingResponse)
 async def create_group_booking(request: MultiBookingRequest):
     """Create multiple bookings for group events"""
-    successful_dates = []
-    failed_dates = []
-    
     try:
-        for date in request.dates:
-            # Check availability
-            is_available, _ = check_availability(date, request.time, request.guests)
-            
-            if is_available:
-                # Add booking
-                add_booking(
-                    date=date,
-                    time=request.time,
-                    guests=request.guests,
-                    name=request.name,
-                    email=request.email,
-                    special_requests=f"Event Type: {request.event_type}. {request.special_requirements}"
-                )
-                successful_dates.append(date)
-            else:
-                failed_dates.append(date)
+        # One transaction for every date: a single availability read, then a bulk insert
+        successful_dates, failed_dates = await run_db(
+            reserve_group_bookings,
+            dates=request.dates,
+            time=request.time,
+            guests=request.guests,
+            name=request.name,
+            email=request.email,
+            special_requests=f"Event Type: {request.event_type}. {request.special_requirements}",
+            all_or_nothing=request.all_or_nothing
+        )
         
+        BOOKINGS.inc(len(successful_dates), channel="group", result="booked")
+        BOOKINGS.inc(len(failed_dates), channel="group", result="rejected")
         return MultiBookingResponse(successful_dates=successful_dates, failed_dates=failed_dates)
     
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _run_ingestion(job_id: str):
+    """Background job: sync the live knowledge base with the PDFs on disk"""
+    job = ingestion_jobs[job_id]
+    job["status"] = "running"
+    try:
+        job.update(status="completed", **sync_live_knowledge_base())
+    except Exception as e:
+        logger.error("Knowledge base ingestion failed: %s", e)
+        job.update(status="failed", message=str(e))
+    job["finished_at"] = datetime.now().isoformat()
+
+def _start_ingestion(filename: str) -> str:
+    """Record and queue an ingestion job, dropping the oldest finished records past the limit"""
+    job_id = str(uuid.uuid4())
+    ingestion_jobs[job_id] = {"id": job_id, "filename": filename, "status": "queued",
+                              "created_at": datetime.now().isoformat()}
+    # Queued and running jobs are kept: their workers still update their records
+    finished = [old_id for old_id, job in ingestion_jobs.items() if job["status"] in ("completed", "failed")]
+    for old_id in finished[:max(len(ingestion_jobs) - MAX_INGESTION_JOBS, 0)]:
+        del ingestion_jobs[old_id]
+    submit_llm(_run_ingestion, job_id)
+    return job_id
+
 @router.post("/upload-pdf/")
 async def upload_pdf(file: UploadFile = File(...)):
     """Upload a PDF file to be included in the knowledge base"""
-    file_location = f"app/data/pdf/{file.filename}"
-    os.makedirs(os.path.dirname(file_location), exist_ok=True)
+    filename = os.path.basename(file.filename or "")
+    if not filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only PDF files can be uploaded")
     
-    with open(file_location, "wb") as file_object:
-        file_object.write(file.file.read())
+    kb_path = get_knowledge_base_path()
+    os.makedirs(kb_path, exist_ok=True)
     
-    # Reinitialize knowledge base with all PDFs in directory
-    pdf_files = [f"app/data/pdf/{f}" for f in os.listdir("app/data/pdf")]
-    initialize_knowledge_base(pdf_files)
+    with open(os.path.join(kb_path, filename), "wb") as file_object:
+        file_object.write(await file.read())
     
-    return {"filename": file.filename, "status": "File uploaded successfully"}
\ No newline at end of file
+    # Embed only this file's chunks in the background
+    job_id = _start_ingestion(filename)
+    
+    return {"filename": filename, "status": "File uploaded successfully", "job_id": job_id}
+
+@router.delete("/knowledge-base/files/{filename}")
+async def delete_pdf(filename: str):
+    """Remove a PDF and its chunks from the knowledge base"""
+    file_location = os.path.join(get_knowledge_base_path(), os.path.basename(filename))
+    if not os.path.isfile(file_location):
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    os.remove(file_location)
+    job_id = _start_ingestion(os.path.basename(filename))
+    
+    return {"filename": filename, "status": "File removed", "job_id": job_id}
+
+@router.get("/knowledge-base/jobs/{job_id}")
+async def get_ingestion_job(job_id: str):
+    """Get the status of a knowledge base ingestion job"""
+    job = ingestion_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -1,88 +1,693 @@
+import json
 import sqlite3
-from datetime import datetime
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 import os
-from typing import List, Tuple, Optional, Dict, Any
+from typing import Callable, Iterator, List, Tuple, Optional, Dict, Any, Union
 
-DB_FILE = "restaurant.db"
-MAX_CAPACITY = 50  # Maximum restaurant capacity
+from app.utils.config import get_max_capacity
+from app.utils.table_assignment import Table, assign_tables, largest_party
+from app.utils.time_slots import (MINUTES_PER_DAY, format_time, free_seat_profile, min_free_seats, normalize_time,
+                                  parse_time, profile_min_free)
 
-def init_db():
-    """Initialize the SQLite database with tables"""
-    conn = sqlite3.connect(DB_FILE)
+DB_FILE = os.getenv("DB_FILE", "restaurant.db")
+MAX_CAPACITY = get_max_capacity()  # Seats in use at any one time, unless overridden
+DINING_DURATION = int(os.getenv("DINING_DURATION_MINUTES", 90))  # How long a booking holds its seats
+DB_BUSY_TIMEOUT = float(os.getenv("DB_BUSY_TIMEOUT", 5.0))  # Seconds to wait on a locked database
+
+# One long-lived connection per thread instead of connect/close on every call
+_local = threading.local()
+_connections: List[Tuple[threading.Thread, sqlite3.Connection]] = []  # Every open pooled connection by owner
+_connections_lock = threading.Lock()
+_generation = 0  # Bumped by close_connections, so every thread reopens instead of using a closed handle
+
+def _open_connection(path: str) -> sqlite3.Connection:
+    """Open a connection with WAL journaling and tuned pragmas"""
+    # isolation_level=None: transactions are started explicitly in transaction()
+    conn = sqlite3.connect(path, timeout=DB_BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')  # Readers no longer block the writer
+    conn.execute('PRAGMA synchronous=NORMAL')  # Safe with WAL, avoids an fsync per commit
+    conn.execute(f'PRAGMA busy_timeout={int(DB_BUSY_TIMEOUT * 1000)}')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA cache_size=-8000')  # ~8 MB page cache per connection
+    return conn
+
+def get_connection() -> sqlite3.Connection:
+    """Return this thread's pooled connection, opening it on first use.
+
+    A connection closed by close_connections, or opened on another DB_FILE,
+    is replaced; connections left by threads that have exited are closed.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.path != DB_FILE or _local.generation != _generation:
+        current = threading.current_thread()
+        with _connections_lock:
+            generation = _generation
+            for entry in [entry for entry in _connections if entry[0] is current or not entry[0].is_alive()]:
+                _connections.remove(entry)
+                entry[1].close()
+            conn = _open_connection(DB_FILE)
+            _connections.append((current, conn))
+        _local.conn, _local.path, _local.generation = conn, DB_FILE, generation
+    return conn
+
+def close_connections():
+    """Close every pooled connection (called on application shutdown)"""
+    global _generation
+    with _connections_lock:
+        _generation += 1
+        for _, conn in _connections:
+            conn.close()
+        _connections.clear()
+    _local.__dict__.clear()
+
+@contextmanager
+def transaction(immediate: bool = False) -> Iterator[sqlite3.Cursor]:
+    """Run statements in a single transaction on the pooled connection.
+
+    immediate=True takes the write lock up front (BEGIN IMMEDIATE).
+    """
+    conn = get_connection()
     cursor = conn.cursor()
-    
-    # Create reservations table with time slots
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS reservations (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        date TEXT,
-        time TEXT,
-        guests INTEGER,
-        name TEXT,
-        email TEXT,
-        phone TEXT,
-        special_requests TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    cursor.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+    try:
+        yield cursor
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+
+def _backfill_slot_minutes(cursor: sqlite3.Cursor):
+    """Give existing bookings a start minute and duration, and normalize their time"""
+    rows = cursor.execute('SELECT id, time FROM reservations WHERE start_minute IS NULL').fetchall()
+    updates = []
+    for booking_id, time in rows:
+        try:
+            minute = parse_time(time)
+        except ValueError:
+            continue  # Left out of capacity checks, as before it never matched a real slot
+        updates.append((format_time(minute), minute, DINING_DURATION, booking_id))
+    cursor.executemany('UPDATE reservations SET time = ?, start_minute = ?, duration = ? WHERE id = ?', updates)
+
+# Schema migrations applied in order by init_db; PRAGMA user_version records
+# how many have run, so existing restaurant.db files are upgraded in place.
+# A step is an SQL statement or a function taking the cursor.
+MIGRATIONS: List[List[Union[str, Callable[[sqlite3.Cursor], None]]]] = [
+    # 1: (date, time) index and a trigger-maintained per-slot guest total
+    [
+        'CREATE INDEX IF NOT EXISTS idx_reservations_date_time ON reservations (date, time)',
+        '''
+        CREATE TABLE IF NOT EXISTS slot_occupancy (
+            date TEXT NOT NULL,
+            time TEXT NOT NULL,
+            guests INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, time)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        INSERT OR REPLACE INTO slot_occupancy (date, time, guests)
+        SELECT date, time, COALESCE(SUM(guests), 0) FROM reservations
+        WHERE date IS NOT NULL AND time IS NOT NULL GROUP BY date, time
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS reservations_occupancy_insert AFTER INSERT ON reservations
+        WHEN NEW.date IS NOT NULL AND NEW.time IS NOT NULL
+        BEGIN
+            INSERT INTO slot_occupancy (date, time, guests) VALUES (NEW.date, NEW.time, COALESCE(NEW.guests, 0))
+            ON CONFLICT (date, time) DO UPDATE SET guests = guests + excluded.guests;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS reservations_occupancy_delete AFTER DELETE ON reservations
+        BEGIN
+            UPDATE slot_occupancy SET guests = guests - COALESCE(OLD.guests, 0)
+            WHERE date = OLD.date AND time = OLD.time;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS reservations_occupancy_update AFTER UPDATE OF date, time, guests ON reservations
+        BEGIN
+            UPDATE slot_occupancy SET guests = guests - COALESCE(OLD.guests, 0)
+            WHERE date = OLD.date AND time = OLD.time;
+            INSERT INTO slot_occupancy (date, time, guests)
+            SELECT NEW.date, NEW.time, COALESCE(NEW.guests, 0) WHERE NEW.date IS NOT NULL AND NEW.time IS NOT NULL
+            ON CONFLICT (date, time) DO UPDATE SET guests = guests + excluded.guests;
+        END
+        ''',
+    ],
+    # 2: chat sessions shared by every worker process (see app/services/session_store.py)
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS chat_sessions (
+            session_id TEXT PRIMARY KEY,
+            expires_at REAL NOT NULL
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_chat_sessions_expires_at ON chat_sessions (expires_at)',
+        '''
+        CREATE TABLE IF NOT EXISTS chat_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_chat_messages_session ON chat_messages (session_id, id)',
+        '''
+        CREATE TRIGGER IF NOT EXISTS chat_sessions_delete_messages AFTER DELETE ON chat_sessions
+        BEGIN
+            DELETE FROM chat_messages WHERE session_id = OLD.session_id;
+        END
+        ''',
+    ],
+    # 3: (date, id) order for keyset pagination of bookings; id is the rowid, so it rides along
+    [
+        'CREATE INDEX IF NOT EXISTS idx_reservations_date ON reservations (date)',
+    ],
+    # 4: analytics rollups, refreshed incrementally by app/services/analytics.py
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS analytics_watermark (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_reservation_id INTEGER NOT NULL,
+            refreshed_at TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS covers_daily (
+            date TEXT PRIMARY KEY,
+            bookings INTEGER NOT NULL,
+            covers INTEGER NOT NULL
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS covers_hourly (
+            date TEXT NOT NULL,
+            hour INTEGER NOT NULL,
+            bookings INTEGER NOT NULL,
+            covers INTEGER NOT NULL,
+            PRIMARY KEY (date, hour)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS party_size_histogram (
+            guests INTEGER PRIMARY KEY,
+            bookings INTEGER NOT NULL
+        )
+        ''',
+        # Cancellations and edits of already counted bookings, applied on the next refresh
+        '''
+        CREATE TABLE IF NOT EXISTS analytics_changes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            reservation_id INTEGER NOT NULL,
+            date TEXT,
+            time TEXT,
+            guests INTEGER,
+            sign INTEGER NOT NULL
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS reservations_analytics_delete AFTER DELETE ON reservations
+        BEGIN
+            INSERT INTO analytics_changes (reservation_id, date, time, guests, sign)
+            VALUES (OLD.id, OLD.date, OLD.time, COALESCE(OLD.guests, 0), -1);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS reservations_analytics_update AFTER UPDATE OF date, time, guests ON reservations
+        BEGIN
+            INSERT INTO analytics_changes (reservation_id, date, time, guests, sign)
+            VALUES (OLD.id, OLD.date, OLD.time, COALESCE(OLD.guests, 0), -1),
+                   (NEW.id, NEW.date, NEW.time, COALESCE(NEW.guests, 0), 1);
+        END
+        ''',
+    ],
+    # 5: bookings occupy [start_minute, start_minute + duration); capacity can be overridden per day or window.
+    # Occupancy is computed from the intervals, so the exact-time slot_occupancy totals go away.
+    [
+        'ALTER TABLE reservations ADD COLUMN start_minute INTEGER',
+        'ALTER TABLE reservations ADD COLUMN duration INTEGER',
+        _backfill_slot_minutes,
+        'CREATE INDEX IF NOT EXISTS idx_reservations_date_start ON reservations (date, start_minute)',
+        '''
+        CREATE TABLE IF NOT EXISTS capacity_overrides (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            start_minute INTEGER NOT NULL,
+            end_minute INTEGER NOT NULL,
+            capacity INTEGER NOT NULL,
+            note TEXT
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_capacity_overrides_date ON capacity_overrides (date)',
+        'DROP TRIGGER IF EXISTS reservations_occupancy_insert',
+        'DROP TRIGGER IF EXISTS reservations_occupancy_delete',
+        'DROP TRIGGER IF EXISTS reservations_occupancy_update',
+        'DROP TABLE IF EXISTS slot_occupancy',
+    ],
+    # 6: table inventory; when it is non-empty every booking is assigned tables for its window
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS restaurant_tables (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            seats INTEGER NOT NULL,
+            combine_group TEXT,
+            active INTEGER NOT NULL DEFAULT 1
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS booking_tables (
+            reservation_id INTEGER NOT NULL,
+            table_id INTEGER NOT NULL,
+            PRIMARY KEY (reservation_id, table_id)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS reservations_release_tables AFTER DELETE ON reservations
+        BEGIN
+            DELETE FROM booking_tables WHERE reservation_id = OLD.id;
+        END
+        ''',
+    ],
+]
+
+def init_db():
+    """Initialize the SQLite database with tables and apply pending migrations"""
+    with transaction(immediate=True) as cursor:
+        # Create reservations table with time slots
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS reservations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT,
+            time TEXT,
+            guests INTEGER,
+            name TEXT,
+            email TEXT,
+            phone TEXT,
+            special_requests TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        
+        version = cursor.execute('PRAGMA user_version').fetchone()[0]
+        for steps in MIGRATIONS[version:]:
+            for step in steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+        cursor.execute(f'PRAGMA user_version = {len(MIGRATIONS)}')
+
+def _slot_window(time: str, end_time: Optional[str] = None) -> Tuple[int, int]:
+    """[start, end) minutes for a booking at time, lasting DINING_DURATION unless end_time is given"""
+    start = parse_time(time)
+    end = parse_time(end_time) if end_time else min(start + DINING_DURATION, MINUTES_PER_DAY)
+    if end <= start:
+        raise ValueError("end_time must be after time")
+    return start, end
+
+def _day_bookings(cursor: sqlite3.Cursor, dates: List[str]) -> Dict[str, List[Tuple[int, int, int]]]:
+    """(start, end, guests) intervals of the bookings on each date"""
+    cursor.execute(
+        'SELECT date, start_minute, start_minute + duration, guests FROM reservations '
+        'WHERE date IN (SELECT value FROM json_each(?)) AND start_minute IS NOT NULL',
+        (json.dumps(dates),)
     )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    bookings: Dict[str, List[Tuple[int, int, int]]] = {date: [] for date in dates}
+    for date, start, end, guests in cursor.fetchall():
+        bookings[date].append((start, end, guests or 0))
+    return bookings
 
-def add_booking(date: str, time: str, guests: int, name: str = '', 
-                email: str = '', phone: str = '', special_requests: str = '') -> int:
-    """Add a new booking to the database"""
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    
+def _day_overrides(cursor: sqlite3.Cursor, dates: List[str]) -> Dict[str, List[Tuple[int, int, int]]]:
+    """(start, end, capacity) overrides for each date"""
+    cursor.execute(
+        'SELECT date, start_minute, end_minute, capacity FROM capacity_overrides '
+        'WHERE date IN (SELECT value FROM json_each(?))',
+        (json.dumps(dates),)
+    )
+    overrides: Dict[str, List[Tuple[int, int, int]]] = {date: [] for date in dates}
+    for date, start, end, capacity in cursor.fetchall():
+        overrides[date].append((start, end, capacity))
+    return overrides
+
+def _seats_free(cursor: sqlite3.Cursor, date: str, start: int, end: int) -> int:
+    """Fewest seats free at any minute of [start, end) on date"""
     cursor.execute(
-        'INSERT INTO reservations (date, time, guests, name, email, phone, special_requests) VALUES (?, ?, ?, ?, ?, ?, ?)',
-        (date, time, guests, name, email, phone, special_requests)
+        'SELECT start_minute, start_minute + duration, guests FROM reservations '
+        'WHERE date = ? AND start_minute < ? AND start_minute + duration > ?',
+        (date, end, start)
     )
+    bookings = [(row[0], row[1], row[2] or 0) for row in cursor.fetchall()]
+    return min_free_seats(bookings, _day_overrides(cursor, [date])[date], start, end, MAX_CAPACITY)
+
+def _table_inventory(cursor: sqlite3.Cursor) -> List[Table]:
+    """Active tables as (id, seats, combine_group); empty when tables are not managed"""
+    cursor.execute('SELECT id, seats, combine_group FROM restaurant_tables WHERE active = 1')
+    return [(row[0], row[1], row[2]) for row in cursor.fetchall()]
+
+def _day_table_bookings(cursor: sqlite3.Cursor, dates: List[str]) -> Dict[str, List[Tuple[int, int, int]]]:
+    """(start, end, table_id) for every table held by a booking on each date"""
+    cursor.execute(
+        'SELECT r.date, r.start_minute, r.start_minute + r.duration, bt.table_id '
+        'FROM reservations r JOIN booking_tables bt ON bt.reservation_id = r.id '
+        'WHERE r.date IN (SELECT value FROM json_each(?)) AND r.start_minute IS NOT NULL',
+        (json.dumps(dates),)
+    )
+    table_bookings: Dict[str, List[Tuple[int, int, int]]] = {date: [] for date in dates}
+    for date, start, end, table_id in cursor.fetchall():
+        table_bookings[date].append((start, end, table_id))
+    return table_bookings
+
+def _free_tables(inventory: List[Table], table_bookings: List[Tuple[int, int, int]],
+                 start: int, end: int) -> List[Table]:
+    """Tables not held by any booking overlapping [start, end), tightest idle gap first.
+
+    The solver keeps the first of equally good options, so this order makes
+    it fill short gaps between bookings and leave long free stretches whole.
+    """
+    busy = set()
+    gap_start: Dict[int, int] = {}
+    gap_end: Dict[int, int] = {}
+    for booked_start, booked_end, table_id in table_bookings:
+        if booked_start < end and booked_end > start:
+            busy.add(table_id)
+        elif booked_end <= start:
+            gap_start[table_id] = max(gap_start.get(table_id, 0), booked_end)
+        else:
+            gap_end[table_id] = min(gap_end.get(table_id, MINUTES_PER_DAY), booked_start)
+    free = [table for table in inventory if table[0] not in busy]
+    return sorted(free, key=lambda table: gap_end.get(table[0], MINUTES_PER_DAY) - gap_start.get(table[0], 0))
+
+def add_booking(date: str, time: str, guests: int, name: str = '', 
+                email: str = '', phone: str = '', special_requests: str = '') -> int:
+    """Add a new booking to the database without a capacity check"""
+    start = parse_time(time)
+    with transaction() as cursor:
+        cursor.execute(
+            'INSERT INTO reservations (date, time, guests, name, email, phone, special_requests, start_minute, duration) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (date, format_time(start), guests, name, email, phone, special_requests, start, DINING_DURATION)
+        )
+        booking_id = cursor.lastrowid
     
-    booking_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
     return booking_id
 
+def _check_party_size(guests: int):
+    """A negative or empty party would free seats or hold tables without anyone to seat"""
+    if guests < 1:
+        raise ValueError("guests must be at least 1")
+
+def reserve_booking(date: str, time: str, guests: int, name: str = '',
+                    email: str = '', phone: str = '', special_requests: str = '') -> Tuple[int, int]:
+    """Check capacity and add a booking in one transaction.
+
+    The booking holds its seats for DINING_DURATION minutes from time, so it
+    competes with every booking overlapping that window, not just ones at
+    the same clock time. When tables are managed the party must also fit on
+    free tables, which are assigned to the booking. Returns (booking_id,
+    seats_left); booking_id is -1 and nothing is written when the party
+    does not fit, and seats_left is then the largest party that would.
+    BEGIN IMMEDIATE takes the write lock before the capacity read, so
+    concurrent callers cannot both claim the same seats. Raises ValueError
+    for a party of fewer than one guest.
+    """
+    _check_party_size(guests)
+    start, end = _slot_window(time)
+    with transaction(immediate=True) as cursor:
+        seats_left = _seats_free(cursor, date, start, end)
+        inventory = _table_inventory(cursor)
+        free_tables = _free_tables(inventory, _day_table_bookings(cursor, [date])[date], start, end) if inventory else []
+        seatable = min(seats_left, largest_party(free_tables)) if inventory else seats_left
+        
+        if seatable < guests:
+            return -1, seatable
+        
+        cursor.execute(
+            'INSERT INTO reservations (date, time, guests, name, email, phone, special_requests, start_minute, duration) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (date, format_time(start), guests, name, email, phone, special_requests, start, end - start)
+        )
+        booking_id = cursor.lastrowid
+        if inventory:
+            cursor.executemany('INSERT INTO booking_tables (reservation_id, table_id) VALUES (?, ?)',
+                               [(booking_id, table_id) for table_id in assign_tables(free_tables, guests)])
+        return booking_id, seats_left - guests
+
+def reserve_group_bookings(dates: List[str], time: str, guests: int, name: str = '',
+                           email: str = '', phone: str = '', special_requests: str = '',
+                           all_or_nothing: bool = False) -> Tuple[List[str], List[str]]:
+    """Book the same slot on many dates in one transaction.
+
+    Returns (successful_dates, failed_dates). Bookings and table holds for
+    every date are read with one query each. With all_or_nothing=True
+    nothing is booked unless every date fits. Raises ValueError for a party
+    of fewer than one guest.
+    """
+    _check_party_size(guests)
+    successful_dates, failed_dates, assignments = [], [], []
+    start, end = _slot_window(time)
+    
+    with transaction(immediate=True) as cursor:
+        unique_dates = list(dict.fromkeys(dates))
+        bookings = _day_bookings(cursor, unique_dates)
+        overrides = _day_overrides(cursor, unique_dates)
+        inventory = _table_inventory(cursor)
+        table_bookings = _day_table_bookings(cursor, unique_dates) if inventory else {}
+        
+        for date in dates:
+            table_ids: Optional[List[int]] = []
+            if min_free_seats(bookings[date], overrides[date], start, end, MAX_CAPACITY) < guests:
+                table_ids = None
+            elif inventory:
+                table_ids = assign_tables(_free_tables(inventory, table_bookings[date], start, end), guests)
+            
+            if table_ids is None:
+                failed_dates.append(date)
+                continue
+            # Repeated dates share capacity and tables
+            bookings[date].append((start, end, guests))
+            if inventory:
+                table_bookings[date].extend((start, end, table_id) for table_id in table_ids)
+            successful_dates.append(date)
+            assignments.append(table_ids)
+        
+        if all_or_nothing and failed_dates:
+            return [], list(dates)
+        
+        insert = ('INSERT INTO reservations (date, time, guests, name, email, phone, special_requests, start_minute, duration) '
+                  'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)')
+        rows = [(date, format_time(start), guests, name, email, phone, special_requests, start, end - start)
+                for date in successful_dates]
+        if not inventory:
+            cursor.executemany(insert, rows)
+        else:
+            # Each booking's id is needed to record its tables
+            for row, table_ids in zip(rows, assignments):
+                cursor.execute(insert, row)
+                booking_id = cursor.lastrowid
+                cursor.executemany('INSERT INTO booking_tables (reservation_id, table_id) VALUES (?, ?)',
+                                   [(booking_id, table_id) for table_id in table_ids])
+    
+    return successful_dates, failed_dates
+
+def cancel_booking(booking_id: int) -> bool:
+    """Cancel a booking; returns False if no booking has that id"""
+    with transaction() as cursor:
+        cursor.execute('DELETE FROM reservations WHERE id = ?', (booking_id,))
+        return cursor.rowcount > 0
+
 def get_bookings(date: Optional[str] = None, time: Optional[str] = None) -> List[Dict[str, Any]]:
     """Get all bookings or filter by date and time"""
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row  # This enables column access by name
-    cursor = conn.cursor()
+    cursor = get_connection().cursor()  # Rows support column access by name
     
     query = 'SELECT * FROM reservations'
     params = []
     
     if date and time:
         query += ' WHERE date = ? AND time = ?'
-        params = [date, time]
+        params = [date, normalize_time(time)]
     elif date:
         query += ' WHERE date = ?'
         params = [date]
     
     cursor.execute(query, params)
     bookings = [dict(row) for row in cursor.fetchall()]  # Convert to list of dictionaries
-    conn.close()
     
     return bookings
 
-def check_availability(date: str, time: str, party_size: int) -> Tuple[bool, int]:
-    """Check if a reservation can be made for given date, time and party size"""
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    
-    # Get total guests for that time slot
-    cursor.execute('SELECT SUM(guests) FROM reservations WHERE date = ? AND time = ?', (date, time))
-    result = cursor.fetchone()
-    current_guests = result[0] if result[0] else 0
+# Columns a bookings listing or export may select
+BOOKING_FIELDS = ("id", "date", "time", "guests", "name", "email", "phone", "special_requests", "created_at",
+                  "start_minute", "duration")
+
+def get_bookings_page(start_date: Optional[str] = None, end_date: Optional[str] = None,
+                      fields: Optional[List[str]] = None, after: Optional[str] = None,
+                      limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Get bookings in (date, id) order, resuming after a cursor.
+
+    Returns (bookings, next_cursor); next_cursor is None on the last page.
+    Each page is one indexed range query, so callers can walk the whole
+    table without holding a cursor open between pages.
+    """
+    fields = list(fields or BOOKING_FIELDS)
+    unknown = [field for field in fields if field not in BOOKING_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown booking fields: {', '.join(unknown)}")
     
-    conn.close()
+    query = f'SELECT {", ".join(dict.fromkeys(fields + ["date", "id"]))} FROM reservations WHERE date IS NOT NULL'
+    params: List[Any] = []
+    if start_date:
+        query += ' AND date >= ?'
+        params.append(start_date)
+    if end_date:
+        query += ' AND date <= ?'
+        params.append(end_date)
+    if after:
+        try:
+            after_date, after_id = after.rsplit(":", 1)
+            params += [after_date, after_date, int(after_id)]
+        except ValueError:
+            raise ValueError(f"Invalid cursor: {after}")
+        query += ' AND (date > ? OR (date = ? AND id > ?))'
+    query += ' ORDER BY date, id'
+    if limit:
+        # One extra row tells us whether another page follows
+        query += ' LIMIT ?'
+        params.append(limit + 1)
     
-    # Check if adding party_size would exceed capacity
-    seats_left = MAX_CAPACITY - current_guests
+    rows = get_connection().execute(query, params).fetchall()
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = f"{rows[-1]['date']}:{rows[-1]['id']}"
+    return [{field: row[field] for field in fields} for row in rows], next_cursor
+
+def iter_bookings(start_date: Optional[str] = None, end_date: Optional[str] = None,
+                  fields: Optional[List[str]] = None, page_size: int = 1000,
+                  after: Optional[str] = None) -> Iterator[List[Dict[str, Any]]]:
+    """Yield every matching booking (after the cursor, if given) one page at a time"""
+    while True:
+        page, after = get_bookings_page(start_date, end_date, fields, after, page_size)
+        if page:
+            yield page
+        if after is None:
+            return
+
+def check_availability(date: str, time: str, party_size: int,
+                       end_time: Optional[str] = None) -> Tuple[bool, int]:
+    """Check if a party fits from time for DINING_DURATION (or until end_time) on date.
+
+    Returns (available, seats_left) where seats_left is the fewest seats
+    free at any minute of that window, or the largest party the free tables
+    can seat if that is lower.
+    """
+    start, end = _slot_window(time, end_time)
+    cursor = get_connection().cursor()
+    seats_left = _seats_free(cursor, date, start, end)
+    inventory = _table_inventory(cursor)
+    if inventory:
+        free_tables = _free_tables(inventory, _day_table_bookings(cursor, [date])[date], start, end)
+        seats_left = min(seats_left, largest_party(free_tables))
     return (seats_left >= party_size, seats_left)
 
+def get_slot_availability(start_date: str, end_date: str, times: List[str]) -> Dict[Tuple[str, str], int]:
+    """Seats left for a booking at every (date, time) between start_date and end_date inclusive.
+
+    Dates are ISO YYYY-MM-DD strings. Bookings and overrides for the whole
+    range are read with one query each; every slot is then answered from
+    one free-seat profile per day.
+    """
+    start = datetime.strptime(start_date, "%Y-%m-%d").date()
+    end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    dates = [(start + timedelta(days=offset)).isoformat() for offset in range((end - start).days + 1)]
+    windows = {time: _slot_window(time) for time in times}
+    
+    cursor = get_connection().cursor()
+    bookings = _day_bookings(cursor, dates)
+    overrides = _day_overrides(cursor, dates)
+    inventory = _table_inventory(cursor)
+    table_bookings = _day_table_bookings(cursor, dates) if inventory else {}
+    
+    seats = {}
+    for date in dates:
+        profile = free_seat_profile(bookings[date], overrides[date], MAX_CAPACITY)
+        for time in times:
+            seats[(date, time)] = profile_min_free(profile, *windows[time])
+            if inventory:
+                free_tables = _free_tables(inventory, table_bookings[date], *windows[time])
+                seats[(date, time)] = min(seats[(date, time)], largest_party(free_tables))
+    return seats
+
+def add_capacity_override(date: str, capacity: int, start_time: Optional[str] = None,
+                          end_time: Optional[str] = None, note: str = '') -> int:
+    """Limit seats on date, for the whole day or between start_time and end_time"""
+    start = parse_time(start_time) if start_time else 0
+    end = parse_time(end_time) if end_time else MINUTES_PER_DAY
+    if end <= start:
+        raise ValueError("end_time must be after start_time")
+    with transaction() as cursor:
+        cursor.execute(
+            'INSERT INTO capacity_overrides (date, start_minute, end_minute, capacity, note) VALUES (?, ?, ?, ?, ?)',
+            (date, start, end, capacity, note)
+        )
+        return cursor.lastrowid
+
+def get_capacity_overrides(date: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Capacity overrides, optionally for one date, with display times"""
+    query = 'SELECT * FROM capacity_overrides'
+    params = []
+    if date:
+        query += ' WHERE date = ?'
+        params = [date]
+    overrides = []
+    for row in get_connection().execute(query + ' ORDER BY date, start_minute', params).fetchall():
+        override = dict(row)
+        override["start_time"] = format_time(override["start_minute"])
+        override["end_time"] = format_time(override["end_minute"])
+        overrides.append(override)
+    return overrides
+
+def delete_capacity_override(override_id: int) -> bool:
+    """Remove a capacity override; returns False if no override has that id"""
+    with transaction() as cursor:
+        cursor.execute('DELETE FROM capacity_overrides WHERE id = ?', (override_id,))
+        return cursor.rowcount > 0
+
+def add_table(name: str, seats: int, combine_group: Optional[str] = None) -> int:
+    """Add a table to the inventory (or bring back a removed one with the same name)"""
+    with transaction() as cursor:
+        cursor.execute(
+            'INSERT INTO restaurant_tables (name, seats, combine_group, active) VALUES (?, ?, ?, 1) '
+            'ON CONFLICT (name) DO UPDATE SET seats = excluded.seats, combine_group = excluded.combine_group, active = 1',
+            (name, seats, combine_group)
+        )
+        return cursor.execute('SELECT id FROM restaurant_tables WHERE name = ?', (name,)).fetchone()[0]
+
+def get_tables() -> List[Dict[str, Any]]:
+    """Active tables in the inventory"""
+    cursor = get_connection().execute(
+        'SELECT id, name, seats, combine_group FROM restaurant_tables WHERE active = 1 ORDER BY seats, name'
+    )
+    return [dict(row) for row in cursor.fetchall()]
+
+def remove_table(table_id: int) -> bool:
+    """Stop assigning a table; existing bookings keep it. Returns False if no active table has that id"""
+    with transaction() as cursor:
+        cursor.execute('UPDATE restaurant_tables SET active = 0 WHERE id = ? AND active = 1', (table_id,))
+        return cursor.rowcount > 0
+
+def get_booking_tables(booking_id: int) -> List[str]:
+    """Names of the tables assigned to a booking"""
+    cursor = get_connection().execute(
+        'SELECT t.name FROM booking_tables bt JOIN restaurant_tables t ON t.id = bt.table_id '
+        'WHERE bt.reservation_id = ? ORDER BY t.name',
+        (booking_id,)
+    )
+    return [row[0] for row in cursor.fetchall()]
+
 def get_max_capacity() -> int:
     """Return the maximum restaurant capacity"""
     return MAX_CAPACITY
\ No newline at end of file
@@ -1,28 +1,28 @@
+import logging
 import os
 import re
+import threading
+import time
 import markdown
 from datetime import datetime, timedelta
-from langchain_groq import ChatGroq
-from crewai import Agent, Task, Crew, Process
 from app.utils.config import load_environment
-from app.db.database import add_booking, check_availability, get_bookings
-from app.utils.config import get_max_capacity
+from app.db.database import reserve_booking
+from app.utils.config import get_max_capacity, get_crew_verbose, get_reservation_fast_path
 from dotenv import load_dotenv
-from langchain.document_loaders import PyPDFLoader
 import random
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.vectorstores import FAISS
-from langchain.embeddings import HuggingFaceEmbeddings
+from app.services.knowledge_base import get_vector_store, load_live_knowledge_base, embed_query
+from app.services.response_cache import response_cache, history_context
+from app.services.topic_classifier import is_restaurant_topic
+from app.services.llm_gateway import llm_gateway, LLMUnavailable, LLM_TIMEOUT
+from app.utils.executors import run_llm
+from app.utils.metrics import STAGE_SECONDS, BOOKINGS
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_environment()
 load_dotenv()  # Load variables from .env file
 
-# Configure AI model
-groq_api_key = os.getenv('GROQ_API_KEY')
-if not groq_api_key:
-    raise ValueError("GROQ_API_KEY not found in environment variables")
-
 # System instructions for concise responses with stronger boundaries
 SYSTEM_INSTRUCTIONS = """
 You are a helpful restaurant assistant for our specific restaurant only. Follow these strict guidelines:
@@ -40,90 +40,57 @@ You are a helpful restaurant assistant for our specific restaurant only. Follow
 12. Avoid providing personal opinions or subjective recommendations
 """
 
-# Initialize the ChatGroq model with system instructions - update with max_tokens
-llm = ChatGroq(
-    model="groq/qwen-qwq-32b", 
-    api_key=groq_api_key,
-    system=SYSTEM_INSTRUCTIONS,
-    max_tokens=500,  # Limiting output size
-    temperature=0.3  # Lower temperature for more deterministic responses
-)
+GROQ_MODEL = "groq/qwen-qwq-32b"  # Provider-prefixed name used by CrewAI
 
-# Restaurant topic verification
-def is_restaurant_topic(query):
-    """
-    Pre-filter to determine if the query is related to restaurant topics.
-    Returns a tuple of (is_relevant, confidence)
-    """
-    restaurant_keywords = [
-        "restaurant", "food", "menu", "dish", "meal", "dinner", "lunch", "breakfast", 
-        "brunch", "reservation", "book", "table", "seating", "dining", "chef", "cuisine", 
-        "appetizer", "dessert", "drink", "beverage", "wine", "cocktail", "taste", "flavor",
-        "ingredient", "special", "vegan", "vegetarian", "allergy", "dietary", "hours", "open",
-        "close", "location", "price", "cost", "expensive", "cheap", "ambiance", "atmosphere",
-        "waiter", "service", "tip", "review", "rating", "popular", "recommendation", "specialty",
-        "signature", "spicy", "sweet", "savory", "portion", "plate", "fork", "knife", "spoon",
-        "napkin", "glass", "bottle", "menu", "order", "delivery", "takeout", "pickup", "catering",
-        "party", "event", "celebration", "birthday", "anniversary", "date", "romantic", "family",
-        "group", "private", "dress", "code", "casual", "formal", "parking", "accessibility",
-        "wheelchair", "restroom", "bathroom", "wifi", "music", "noise", "quiet", "loud", "busy",
-        "wait", "time", "rush", "crowd", "seat", "host", "hostess", "manager", "owner", "cook",
-        "kitchen", "fresh", "local", "organic", "sustainable", "seasonal", "farm", "source",
-        "import", "domestic", "regional", "national", "international", "fusion", "traditional",
-        "authentic", "modern", "innovative", "classic", "trendy", "popular", "new", "old",
-        "established", "award", "recognition", "star", "review", "critic", "guest", "customer",
-        "diner", "patron", "party", "reservation", "cancel", "modify", "change", "confirm",
-        # Adding more general dining terms to improve detection
-        "eat", "eating", "diet", "taste", "serving", "serve", "specialty", "offer", "available",
-        "cuisine", "cook", "cooking", "culinary", "dining", "dine", "dish", "delicious", "tasty",
-        "flavor", "flavors", "meal", "meals", "menu", "menus", "option", "options", "serving",
-        "servings", "size", "sizes", "portion", "portions", "plate", "plates", "bowl", "bowls",
-        "cup", "cups", "glass", "glasses", "drink", "drinks", "beverage", "beverages", "bottle",
-        "bottles", "wine", "wines", "beer", "beers", "cocktail", "cocktails", "spirit", "spirits",
-        "juice", "juices", "soda", "sodas", "water", "still", "sparkling", "tea", "coffee"
-    ]
-    
-    # Count restaurant-related keywords in the query
-    query_lower = query.lower()
-    keyword_matches = sum(1 for keyword in restaurant_keywords if keyword in query_lower.split())
-    
-    # Check for specific non-restaurant patterns
-    non_restaurant_patterns = [
-        r'\b(politics|news|sports|weather|stock|crypto|program|code|science|math|physics)\b',
-        r'\b(create|write|generate)\s+(a|an|the)?\s+(poem|story|essay|article|code|script)\b',
-        r'\b(explain|tell\s+me\s+about)\s+(history|war|president|government|theory)\b',
-        r'\bhow\s+(to|do|can|would)\s+(i|you|we|they)\s+(hack|invest|learn|study)\b',
-        r'\bwhat\s+(is|are|were|was)\s+(the|a|an)?\s+(meaning|theory|concept)\s+of\b'
-    ]
-    
-    non_restaurant_matches = sum(1 for pattern in non_restaurant_patterns if re.search(pattern, query_lower))
-    
-    # Give higher initial confidence for short queries that may be restaurant related
-    words = query_lower.split()
-    base_confidence = 0.4  # Default baseline
-    
-    # Calculate confidence based on keyword matches and non-restaurant patterns
-    if len(words) <= 3:  # Very short queries are given benefit of doubt
-        confidence = 0.6 + (keyword_matches * 0.15)
-    else:
-        confidence = base_confidence + (keyword_matches * 0.15) - (non_restaurant_matches * 0.3)
-        
-        # If query is asking a question (starts with how, what, when, where, etc.)
-        question_starters = ["how", "what", "when", "where", "why", "is", "are", "can", "do", "does", "will"]
-        if any(words[0].lower() == starter for starter in question_starters):
-            confidence += 0.1  # Slightly boost confidence for questions
-    
-    # Positive bias for very short queries that could be simple food or menu items
-    if len(words) == 1:
-        confidence += 0.2
-    
-    # Add debug logging to track classification decision
-    print(f"Query: '{query}' | Keywords: {keyword_matches} | Non-restaurant: {non_restaurant_matches} | Confidence: {confidence}")
-    
-    # Lower threshold to capture more potential restaurant questions
-    threshold = 0.45
-    
-    return confidence >= threshold, confidence
+# LangChain, CrewAI and the models load on first use (or in warm_up), so
+# importing this module does not slow down booking-only work or startup
+_llm = None
+_llm_lock = threading.Lock()
+
+def get_llm():
+    """Get the shared ChatGroq model used by the crews, creating it on first use"""
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                from langchain_groq import ChatGroq
+                
+                groq_api_key = os.getenv('GROQ_API_KEY')
+                if not groq_api_key:
+                    raise ValueError("GROQ_API_KEY not found in environment variables")
+                
+                # Initialize the ChatGroq model with system instructions - update with max_tokens
+                _llm = ChatGroq(
+                    model=GROQ_MODEL, 
+                    api_key=groq_api_key,
+                    system=SYSTEM_INSTRUCTIONS,
+                    max_tokens=500,  # Limiting output size
+                    temperature=0.3,  # Lower temperature for more deterministic responses
+                    base_url=llm_gateway.base_url,
+                    timeout=LLM_TIMEOUT,
+                    max_retries=0  # llm_gateway retries with backoff
+                )
+    return _llm
+
+# Model name for direct (streaming) calls through llm_gateway, without CrewAI's provider prefix
+STREAM_MODEL = GROQ_MODEL.split("/", 1)[-1]
+
+# Verbose agent/crew tracing is for development only
+CREW_VERBOSE = get_crew_verbose()
+
+# Answer fully parsed reservations from a template instead of the LLM
+RESERVATION_FAST_PATH = get_reservation_fast_path()
+
+def format_history(history):
+    """Render session messages as plain-text conversation for the prompt ("None" if empty)"""
+    if not history:
+        return "None"
+    lines = []
+    for message in history:
+        speaker = "Customer" if message["role"] == "user" else "Assistant"
+        text = re.sub(r"<[^>]+>", " ", message["content"])
+        lines.append(f"{speaker}: {' '.join(text.split())[:500]}")
+    return "\n".join(lines)
 
 def get_safe_response():
     """
@@ -160,29 +127,61 @@ def convert_to_html(text):
     
     return html
 
+class MarkdownStreamRenderer:
+    """Render streamed markdown to HTML one finished block at a time.
+
+    A block is finished at a blank line that is not inside a fenced code
+    block; the unfinished tail is held back until more text or flush().
+    """
+
+    def __init__(self):
+        self._pending = ""
+
+    def feed(self, text):
+        """Add streamed text; return HTML for any blocks it completed ("" if none)"""
+        self._pending += text
+        cut = self._pending.rfind("\n\n")
+        while cut != -1 and self._pending[:cut].count("```") % 2:
+            cut = self._pending.rfind("\n\n", 0, cut)
+        if cut == -1:
+            return ""
+        block, self._pending = self._pending[:cut], self._pending[cut + 2:]
+        return convert_to_html(block) if block.strip() else ""
+
+    def flush(self):
+        """Return HTML for whatever text is still pending"""
+        block, self._pending = self._pending, ""
+        return convert_to_html(block) if block.strip() else ""
+
 def create_reservation_agent():
     """Create an agent for handling reservations"""
+    from crewai import Agent
+    
     return Agent(
         role="Restaurant Reservation Agent",
         goal="Provide concise reservation confirmations in 2-3 sentences",
         backstory="You are an efficient reservation specialist who provides clear, brief responses without unnecessary details.",
-        verbose=True,
-        llm=llm
+        verbose=CREW_VERBOSE,
+        llm=get_llm()
     )
 
 def create_inquiry_agent():
     """Create an agent for handling general inquiries"""
+    from crewai import Agent
+    
     return Agent(
         role="Restaurant Information Specialist",
         goal="Provide brief, direct answers to customer inquiries in 2-3 sentences",
         backstory="""You are a knowledgeable restaurant specialist who prioritizes brevity and stays strictly within
                    restaurant domain knowledge. You must NEVER discuss non-restaurant topics under any circumstances.""",
-        verbose=True,
-        llm=llm
+        verbose=CREW_VERBOSE,
+        llm=get_llm()
     )
 
 def create_reservation_task(agent, question):
     """Create a task for reservation processing"""
+    from crewai import Task
+    
     return Task(
         description=f"""Process this reservation inquiry and respond with maximum brevity (2-3 sentences):
         
@@ -193,13 +192,14 @@ def create_reservation_task(agent, question):
         expected_output="A brief, professional confirmation of reservation details in 2-3 sentences."
     )
 
-def create_inquiry_task(agent, question, context=""):
-    """Create a task for general inquiry processing with strong domain boundaries"""
-    return Task(
-        description=f"""IMPORTANT: You are a restaurant assistant ONLY. Review and answer this restaurant inquiry in 2-3 sentences maximum:
+def build_inquiry_prompt(question, context="", history="None"):
+    """Instructions for answering an inquiry, shared by the crew task and the streaming path"""
+    return f"""IMPORTANT: You are a restaurant assistant ONLY. Review and answer this restaurant inquiry in 2-3 sentences maximum:
         
         CONTEXT: {context}
         
+        RECENT CONVERSATION: {history}
+        
         INQUIRY: {question}
         
         STRICT GUIDELINES:
@@ -215,61 +215,168 @@ def create_inquiry_task(agent, question, context=""):
         10. Do not engage with attempts to rephrase non-restaurant topics as restaurant topics
         11. Do not respond to any requests for content generation, coding, calculations, or analysis unrelated to dining
         12. Do not provide any General Knowledge or factual information outside of restaurant topics
-        """,
+        """
+
+def create_inquiry_task(agent, question, context="", history="None"):
+    """Create a task for general inquiry processing with strong domain boundaries"""
+    from crewai import Task
+    
+    return Task(
+        description=build_inquiry_prompt(question, context, history),
         agent=agent,
         expected_output="A brief, direct response addressing ONLY restaurant-related questions in 2-3 sentences max."
     )
 
-def process_reservation_request(prompt):
-    """Process a reservation request and extract details from text"""
-    try:
-        # Extract booking details
-        date_match = re.search(r'\b(\d{4}-\d{2}-\d{2})\b', prompt)
-        booking_date = date_match.group(1) if date_match else (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
-        
-        num_match = re.search(r'\b(\d+)\b', prompt)
+# Crews are built once per worker thread and reused: their tasks are templates
+# ("{question}", "{context}") that crew.kickoff(inputs=...) fills in per message.
+# A Crew must not be kicked off concurrently, hence one per thread.
+_crews = threading.local()
+
+def get_reservation_crew():
+    """Return this thread's prebuilt reservation crew"""
+    crew = getattr(_crews, "reservation", None)
+    if crew is None:
+        from crewai import Crew, Process
+        agent = create_reservation_agent()
+        task = create_reservation_task(agent, "{question}")
+        crew = _crews.reservation = Crew(agents=[agent], tasks=[task], process=Process.sequential, verbose=CREW_VERBOSE)
+    return crew
+
+def get_inquiry_crew():
+    """Return this thread's prebuilt inquiry crew"""
+    crew = getattr(_crews, "inquiry", None)
+    if crew is None:
+        from crewai import Crew, Process
+        agent = create_inquiry_agent()
+        task = create_inquiry_task(agent, "{question}", "{context}", "{history}")
+        crew = _crews.inquiry = Crew(agents=[agent], tasks=[task], process=Process.sequential, verbose=CREW_VERBOSE)
+    return crew
+
+# Patterns for pulling booking details out of a chat message
+DATE_PATTERN = re.compile(r'\b(\d{4}-\d{2}-\d{2})\b')
+RELATIVE_DATE_PATTERN = re.compile(r'\b(today|tonight|tomorrow)\b', re.IGNORECASE)
+TIME_PATTERN = re.compile(r'\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b', re.IGNORECASE)
+PARTY_SIZE_PATTERN = re.compile(
+    r'\b(?:party of|table for|for)\s+(\d{1,3})\b(?!\s*(?::\d|am\b|pm\b))'
+    r'|\b(\d{1,3})\s*(?:people|persons|guests|pax|adults|of us)\b',
+    re.IGNORECASE
+)
+
+# How often each reservation path is taken, see get_reservation_path_stats()
+reservation_path_counts = {"fast": 0, "agent": 0, "fully_booked": 0}
+_reservation_path_lock = threading.Lock()
+
+def _count_reservation_path(path):
+    with _reservation_path_lock:
+        reservation_path_counts[path] += 1
+    BOOKINGS.inc(channel="chat", result="rejected" if path == "fully_booked" else "booked")
+
+def get_reservation_path_stats():
+    """Counts of reservations answered by template, by the agent, or refused as full"""
+    with _reservation_path_lock:
+        return dict(reservation_path_counts)
+
+def parse_reservation_request(prompt):
+    """Extract date, time and party size from a chat message.
+
+    Missing details fall back to the old defaults (tomorrow, 7:00 PM, 2
+    guests); "fully_parsed" is True only when all three were stated. A
+    stated date that does not exist ("2026-02-30") comes back as None.
+    """
+    date_match = DATE_PATTERN.search(prompt)
+    relative_match = RELATIVE_DATE_PATTERN.search(prompt)
+    if date_match:
+        try:
+            booking_date = datetime.strptime(date_match.group(1), "%Y-%m-%d").strftime("%Y-%m-%d")
+        except ValueError:
+            booking_date = None
+    elif relative_match:
+        days_ahead = 1 if relative_match.group(1).lower() == "tomorrow" else 0
+        booking_date = (datetime.now() + timedelta(days=days_ahead)).strftime("%Y-%m-%d")
+    else:
+        booking_date = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+    
+    # Standardize time format to e.g. "7:00 PM"
+    booking_time = None
+    time_match = TIME_PATTERN.search(prompt)
+    if time_match:
+        hour, minute, meridiem = int(time_match.group(1)), int(time_match.group(2) or 0), time_match.group(3).upper()
+        if 1 <= hour <= 12 and minute < 60:
+            booking_time = f"{hour}:{minute:02d} {meridiem}"
+    
+    party_match = PARTY_SIZE_PATTERN.search(prompt)
+    if party_match:
+        number_of_people = int(party_match.group(1) or party_match.group(2))
+    else:
+        # Any other bare number, ignoring the date and time already matched
+        remainder = TIME_PATTERN.sub(" ", DATE_PATTERN.sub(" ", prompt))
+        num_match = re.search(r'\b(\d{1,3})\b', remainder)
         number_of_people = int(num_match.group(1)) if num_match else 2
+    
+    return {
+        "date": booking_date,
+        "time": booking_time or "7:00 PM",  # Default time
+        "guests": number_of_people,
+        "fully_parsed": bool((date_match or relative_match) and booking_date and booking_time and party_match
+                             and number_of_people > 0),
+    }
 
-        # Try to extract time, otherwise use default
-        time_match = re.search(r'(\d{1,2}):?(\d{2})?\s*(am|pm|AM|PM)', prompt)
-        booking_time = time_match.group(0) if time_match else "7:00 PM"  # Default time
+def _party(number_of_people):
+    return "1 person" if number_of_people == 1 else f"{number_of_people} people"
 
-        # Standardize time format
-        if ":" not in booking_time:
-            booking_time = booking_time.replace(" ", ":00 ")
+def template_confirmation(number_of_people, booking_date, booking_time):
+    """Confirmation message for a fully parsed reservation, no LLM call needed"""
+    day = datetime.strptime(booking_date, "%Y-%m-%d").strftime("%A, %B %d, %Y")
+    guests = "1 guest" if number_of_people == 1 else f"{number_of_people} guests"
+    return (
+        f"<p><strong>Reservation confirmed for {_party(number_of_people)} on {booking_date} at {booking_time}.</strong></p>\n\n"
+        f"<p>We look forward to welcoming {guests} on {day} at {booking_time}. "
+        f"Please let us know if you have any special requests before your visit.</p>"
+    )
 
-        # Capacity check
-        MAX_CAPACITY = get_max_capacity()
-        existing_bookings = get_bookings(booking_date)
-        
-        # Calculate total guests for the time slot
-        time_bookings = [b for b in existing_bookings if b[2] == booking_time]
-        time_guests = sum(b[3] for b in time_bookings) if time_bookings else 0
+def process_reservation_request(prompt):
+    """Process a reservation request and extract details from text.
+
+    Fully parsed requests get a template confirmation; the reservation
+    agent is only used to phrase replies when some detail had to be guessed.
+    """
+    try:
+        # Extract booking details
+        details = parse_reservation_request(prompt)
+        booking_date, booking_time, number_of_people = details["date"], details["time"], details["guests"]
+        if booking_date is None:
+            return (f"<p>Sorry, {DATE_PATTERN.search(prompt).group(1)} is not a valid date. "
+                    f"Please give the date as YYYY-MM-DD, for example {datetime.now():%Y-%m-%d}.</p>")
+
+        # Capacity check and booking in one transaction
+        with STAGE_SECONDS.time(stage="reservation_booking"):
+            booking_id, _ = reserve_booking(
+                date=booking_date,
+                time=booking_time,
+                guests=number_of_people,
+                name="Chat Reservation", 
+                email="",
+                phone="",
+                special_requests="Booked via chatbot"
+            )
         
-        if time_guests + number_of_people > MAX_CAPACITY:
+        if booking_id == -1:
+            _count_reservation_path("fully_booked")
+            MAX_CAPACITY = get_max_capacity()
             return f"Sorry, we are fully booked for {booking_date} at {booking_time} (Max capacity: {MAX_CAPACITY} guests). Please choose another date or time, or reduce the party size."
 
-        # Create the booking
-        add_booking(
-            date=booking_date,
-            time=booking_time,
-            guests=number_of_people,
-            name="Chat Reservation", 
-            email="",
-            phone="",
-            special_requests="Booked via chatbot"
-        )
-
-        confirmation = f"Reservation confirmed for {number_of_people} people on {booking_date} at {booking_time}."
+        if details["fully_parsed"] and RESERVATION_FAST_PATH:
+            _count_reservation_path("fast")
+            return template_confirmation(number_of_people, booking_date, booking_time)
+        
+        _count_reservation_path("agent")
+        confirmation = f"Reservation confirmed for {_party(number_of_people)} on {booking_date} at {booking_time}."
         
         # Generate a more personalized response using the AI
         try:
-            reservation_agent = create_reservation_agent()
-            task = create_reservation_task(reservation_agent, prompt)
-            crew = Crew(agents=[reservation_agent], tasks=[task], process=Process.sequential, verbose=True)
-            
             # Get the response from crewAI
-            result = crew.kickoff(inputs={"question": prompt})
+            with STAGE_SECONDS.time(stage="reservation_llm"):
+                result = llm_gateway.call(get_reservation_crew().kickoff, inputs={"question": prompt})
             
             # Process the result to ensure it's a string
             if isinstance(result, str):
@@ -285,52 +392,115 @@ def process_reservation_request(prompt):
             
             return f"{confirmation_html}\n\n{response_html}"
         except Exception as ai_error:
-            print(f"AI processing error: {str(ai_error)}")
+            logger.warning("Reservation agent failed, sending the plain confirmation: %s", ai_error)
             # Fallback to just the confirmation if AI fails
             return f"<p>{confirmation}</p>"
     except Exception as e:
-        print(f"Error in process_reservation_request: {str(e)}")
+        logger.error("Error in process_reservation_request: %s", e)
         return "<p>I'm having trouble processing your reservation request right now. Please try again later.</p>"
 
-def process_inquiry(inquiry):
-    """Process a user inquiry with context from knowledge base and additional safety checks"""
-    global vector_store
+_warm_up_lock = threading.Lock()
+_warmed_up = False
+
+def warm_up():
+    """Load the AI stack once, ahead of the first chat when run at startup.
+
+    Loads (or builds) the knowledge base, the embedding model and topic
+    classifier, and the LLM client and crews. Inquiries arriving meanwhile
+    wait for it; with AI_WARMUP off the first inquiry runs it.
+    """
+    global _warmed_up
+    with _warm_up_lock:
+        if _warmed_up:
+            return
+        start_time = time.perf_counter()
+        try:
+            vector_store, message = load_live_knowledge_base()
+            if vector_store:
+                logger.info(message)
+            else:
+                logger.warning("Failed to initialize knowledge base: %s", message)
+            
+            question = "What is on the menu tonight?"
+            is_restaurant_topic(question, embed_query(question))
+            get_inquiry_crew()
+            get_reservation_crew()
+            logger.info("AI stack ready in %.2fs", time.perf_counter() - start_time)
+        except Exception as e:
+            logger.error("Error warming up the AI stack: %s", e)
+        finally:
+            _warmed_up = True
+
+def prepare_inquiry(inquiry, history=None):
+    """Everything before the LLM call, shared by process_inquiry and stream_inquiry.
+
+    Returns (answer, context, query_embedding): answer is the finished HTML
+    when no LLM call is needed (knowledge base missing, off-topic question
+    or cache hit), otherwise None and context holds the retrieved documents.
+    """
+    vector_store = get_vector_store()
+    if not vector_store and not _warmed_up:
+        warm_up()
+        vector_store = get_vector_store()
     
     if not vector_store:
-        return "<p>Our restaurant information system is being updated. Please try again in a few minutes.</p>"
+        return "<p>Our restaurant information system is being updated. Please try again in a few minutes.</p>", "", None
+    
+    # Embed the query once (or reuse a recent embedding) for the classifier, semantic cache and retrieval
+    with STAGE_SECONDS.time(stage="embedding"):
+        query_embedding = embed_query(inquiry)
     
     # First check if the topic is restaurant-related
-    is_relevant, confidence = is_restaurant_topic(inquiry)
-    print(f"Topic classification: relevant={is_relevant}, confidence={confidence}")
+    with STAGE_SECONDS.time(stage="topic_classification"):
+        is_relevant, confidence = is_restaurant_topic(inquiry, query_embedding)
+    logger.debug("Topic classification relevant=%s confidence=%s", is_relevant, confidence)
     
     if not is_relevant:
         # Topic doesn't appear to be restaurant-related
-        print(f"Rejecting query as non-restaurant topic: '{inquiry}'")
-        return convert_to_html(get_safe_response())
+        logger.debug("Rejecting non-restaurant query=%r", inquiry)
+        return convert_to_html(get_safe_response()), "", query_embedding
     
-    # Debug log - we're proceeding with a restaurant topic
-    print(f"Processing restaurant query: '{inquiry}'")
+    # Reuse the answer to the same (or, with embeddings, a near-identical) question
+    with STAGE_SECONDS.time(stage="cache_lookup"):
+        cached = response_cache.get(inquiry, query_embedding, context=history_context(inquiry, history))
+    if cached is not None:
+        return cached, "", query_embedding
     
     # Continue with retrieving relevant context
-    retrieved_docs = vector_store.similarity_search(inquiry, k=3)
-    context = "\n\n".join([doc.page_content for doc in retrieved_docs])
-    
-    # Create agent with strong system instructions
-    agent = create_inquiry_agent()
-    
-    # Create task with explicit instruction enforcement
-    task = create_inquiry_task(agent, inquiry, context)
-    
-    crew = Crew(
-        agents=[agent],
-        tasks=[task],
-        verbose=True,
-        process=Process.sequential
-    )
+    with STAGE_SECONDS.time(stage="retrieval"):
+        retrieved_docs = vector_store.similarity_search_by_vector(query_embedding, k=3)
+        context = "\n\n".join([doc.page_content for doc in retrieved_docs])
+    return None, context, query_embedding
+
+def fallback_answer(inquiry, query_embedding, context, history=None):
+    """Answer without the LLM: an expired cached answer, else the best matching document text"""
+    stale = response_cache.get(inquiry, query_embedding, stale_ok=True, context=history_context(inquiry, history))
+    if stale is not None:
+        return stale
+    snippet = " ".join(context.split())[:400]
+    if not snippet:
+        return "<p>I'll get that information for you right away. Please try again in a moment.</p>"
+    # End on a full sentence where possible
+    if "." in snippet[100:]:
+        snippet = snippet[:snippet.rindex(".") + 1]
+    return convert_to_html(f"Our assistant is busy right now, but here is what our restaurant information says:\n\n> {snippet}")
+
+def process_inquiry(inquiry, history=None):
+    """Process a user inquiry with context from knowledge base and additional safety checks.
+
+    history is the session's earlier messages. Self-contained questions
+    share cached answers across sessions; follow-ups are cached per previous
+    exchange (see response_cache.history_context).
+    """
+    answer, context, query_embedding = prepare_inquiry(inquiry, history)
+    if answer is not None:
+        return answer
     
     try:
-        # Explicitly pass the inquiry to ensure it's processed correctly
-        result = crew.kickoff(inputs={"question": inquiry})
+        # The prebuilt crew's task is filled in with this inquiry and its context
+        with STAGE_SECONDS.time(stage="llm"):
+            result = llm_gateway.call(get_inquiry_crew().kickoff, inputs={"question": inquiry, "context": context,
+                                                                          "history": format_history(history)})
         
         # Process the result to ensure it's a string
         if isinstance(result, str):
@@ -343,40 +513,63 @@ def process_inquiry(inquiry):
         # Safety check on output before returning - if response looks too generic or like a refusal,
         # it might indicate the LLM is struggling with the task
         if "I'd be happy to assist" in response_text and len(response_text) < 100:
-            print("Warning: LLM produced generic response, might be struggling with the task")
+            logger.warning("LLM produced a generic response, it might be struggling with the task")
         
         # Convert to HTML before returning
-        return convert_to_html(response_text)
+        with STAGE_SECONDS.time(stage="html_conversion"):
+            response_html = convert_to_html(response_text)
+        response_cache.put(inquiry, response_html, query_embedding, context=history_context(inquiry, history))
+        return response_html
+    except LLMUnavailable as e:
+        logger.warning("LLM unavailable in process_inquiry: %s", e)
+        return fallback_answer(inquiry, query_embedding, context, history)
     except Exception as e:
-        print(f"Error in process_inquiry: {str(e)}")
+        logger.error("Error in process_inquiry: %s", e)
         return "<p>I'll get that information for you right away. Please try again in a moment.</p>"
 
-# Document processing functions
-def load_documents(pdf_path):
-    """Load and process PDF documents"""
-    loader = PyPDFLoader(pdf_path)
-    documents = loader.load()
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200
-    )
-    chunks = text_splitter.split_documents(documents)
-    return chunks
-
-# Initialize vector store
-embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-vector_store = None
-
-def set_vector_store(vs):
-    global vector_store
-    vector_store = vs
-
-def initialize_knowledge_base(pdf_paths):
-    """Initialize the vector store with documents"""
-    global vector_store
-    all_chunks = []
-    for path in pdf_paths:
-        all_chunks.extend(load_documents(path))
+async def stream_inquiry(inquiry, history=None):
+    """Stream the answer to an inquiry as ("token" | "html" | "done", payload) events.
+
+    Follows the same checks as process_inquiry but calls the Groq API
+    directly through llm_gateway, on the event loop, so tokens reach the
+    client as they are generated. "html" events carry newly finished
+    blocks; "done" carries the complete HTML.
+    """
+    # Retrieval and classification block, so they run on the LLM thread pool
+    answer, context, query_embedding = await run_llm(prepare_inquiry, inquiry, history)
+    if answer is not None:
+        yield "done", answer
+        return
+    
+    messages = [("system", SYSTEM_INSTRUCTIONS), ("human", build_inquiry_prompt(inquiry, context, format_history(history)))]
+    renderer = MarkdownStreamRenderer()
+    parts = []
+    complete = True
+    llm_start = time.perf_counter()
+    try:
+        async for token in llm_gateway.stream_chat(messages, STREAM_MODEL, max_tokens=500, temperature=0.3):
+            if not parts:
+                STAGE_SECONDS.observe(time.perf_counter() - llm_start, stage="llm_first_token")
+            parts.append(token)
+            yield "token", token
+            block_html = renderer.feed(token)
+            if block_html:
+                yield "html", block_html
+    except Exception as e:
+        logger.warning("Error in stream_inquiry: %s", e)
+        if not parts:
+            yield "done", fallback_answer(inquiry, query_embedding, context, history)
+            return
+        complete = False  # Keep the partial answer for the client but do not cache it
+    
+    block_html = renderer.flush()
+    if block_html:
+        yield "html", block_html
+    
+    STAGE_SECONDS.observe(time.perf_counter() - llm_start, stage="llm")
     
-    vector_store = FAISS.from_documents(all_chunks, embeddings)
-    return vector_store, "Knowledge base initialized successfully"
\ No newline at end of file
+    with STAGE_SECONDS.time(stage="html_conversion"):
+        response_html = convert_to_html("".join(parts))
+    if complete:
+        response_cache.put(inquiry, response_html, query_embedding, context=history_context(inquiry, history))
+    yield "done", response_html
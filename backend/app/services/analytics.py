@@ -0,0 +1,169 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from app.db.database import transaction
+from app.utils.time_slots import parse_time
+
+# How many past same-weekday dates the peak-hour forecast averages over
+FORECAST_WEEKS = 8
+
+@lru_cache(maxsize=1024)  # A restaurant only has a handful of distinct slot times
+def _slot_hour(time: Optional[str]) -> Optional[int]:
+    """Hour of day (0-23) of a booking time such as "7:30 PM" or "19:30"."""
+    try:
+        return parse_time(time) // 60
+    except ValueError:
+        return None
+
+def refresh_rollups() -> Dict[str, int]:
+    """Fold bookings created since the last refresh into the rollup tables.
+
+    Work is proportional to the bookings created, cancelled or edited since
+    the previous refresh, not to the size of the reservations table. When
+    nothing changed, a plain read says so and the write lock is never taken,
+    so dashboard reads do not queue behind (or hold up) bookings.
+    """
+    with transaction() as cursor:
+        row = cursor.execute(
+            "SELECT (SELECT last_reservation_id FROM analytics_watermark WHERE id = 1), "
+            "(SELECT seq FROM sqlite_sequence WHERE name = 'reservations'), "
+            "EXISTS (SELECT 1 FROM analytics_changes)"
+        ).fetchone()
+    last_id, new_id, changed = row[0] or 0, row[1] or 0, row[2]
+    if new_id <= last_id and not changed:
+        return {"new_bookings": 0, "changes": 0, "last_reservation_id": last_id}
+
+    daily: Counter = Counter()
+    hourly: Counter = Counter()
+    party_sizes: Counter = Counter()
+
+    def count(date, time, guests, sign):
+        if date is None:
+            return
+        guests = guests or 0
+        daily[(date, "bookings")] += sign
+        daily[(date, "covers")] += sign * guests
+        hour = _slot_hour(time)
+        if hour is not None:
+            hourly[(date, hour, "bookings")] += sign
+            hourly[(date, hour, "covers")] += sign * guests
+        party_sizes[guests] += sign
+
+    with transaction(immediate=True) as cursor:
+        row = cursor.execute('SELECT last_reservation_id FROM analytics_watermark WHERE id = 1').fetchone()
+        last_id = row[0] if row else 0
+        # AUTOINCREMENT ids follow created_at order and are never reused, so
+        # everything up to the sequence value has been either counted or logged
+        row = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'reservations'").fetchone()
+        new_id = row[0] if row else 0
+
+        new_rows = cursor.execute(
+            'SELECT date, time, guests FROM reservations WHERE id > ? AND id <= ?', (last_id, new_id)
+        ).fetchall()
+        for date, time, guests in new_rows:
+            count(date, time, guests, 1)
+
+        # Changes to bookings counted by an earlier refresh; later ones are already in new_rows
+        changes = cursor.execute(
+            'SELECT date, time, guests, sign FROM analytics_changes WHERE reservation_id <= ?', (last_id,)
+        ).fetchall()
+        for date, time, guests, sign in changes:
+            count(date, time, guests, sign)
+        cursor.execute('DELETE FROM analytics_changes WHERE reservation_id <= ?', (new_id,))
+
+        cursor.executemany(
+            'INSERT INTO covers_daily (date, bookings, covers) VALUES (?, ?, ?) '
+            'ON CONFLICT (date) DO UPDATE SET bookings = bookings + excluded.bookings, covers = covers + excluded.covers',
+            [(date, daily[(date, "bookings")], daily[(date, "covers")]) for date, kind in daily if kind == "bookings"]
+        )
+        cursor.executemany(
+            'INSERT INTO covers_hourly (date, hour, bookings, covers) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (date, hour) DO UPDATE SET bookings = bookings + excluded.bookings, covers = covers + excluded.covers',
+            [(date, hour, hourly[(date, hour, "bookings")], hourly[(date, hour, "covers")])
+             for date, hour, kind in hourly if kind == "bookings"]
+        )
+        cursor.executemany(
+            'INSERT INTO party_size_histogram (guests, bookings) VALUES (?, ?) '
+            'ON CONFLICT (guests) DO UPDATE SET bookings = bookings + excluded.bookings',
+            list(party_sizes.items())
+        )
+        # Drop buckets emptied by cancellations
+        cursor.executemany('DELETE FROM covers_daily WHERE date = ? AND bookings <= 0',
+                           [(date,) for date, kind in daily if kind == "bookings"])
+        cursor.executemany('DELETE FROM covers_hourly WHERE date = ? AND hour = ? AND bookings <= 0',
+                           [(date, hour) for date, hour, kind in hourly if kind == "bookings"])
+        cursor.executemany('DELETE FROM party_size_histogram WHERE guests = ? AND bookings <= 0',
+                           [(guests,) for guests in party_sizes])
+
+        cursor.execute(
+            'INSERT INTO analytics_watermark (id, last_reservation_id, refreshed_at) VALUES (1, ?, CURRENT_TIMESTAMP) '
+            'ON CONFLICT (id) DO UPDATE SET last_reservation_id = excluded.last_reservation_id, '
+            'refreshed_at = excluded.refreshed_at',
+            (new_id,)
+        )
+
+    return {"new_bookings": len(new_rows), "changes": len(changes), "last_reservation_id": new_id}
+
+def get_daily_covers(start_date: str, end_date: str) -> List[Dict[str, Any]]:
+    """Bookings and covers per day in a date range"""
+    with transaction() as cursor:
+        cursor.execute(
+            'SELECT date, bookings, covers FROM covers_daily WHERE date BETWEEN ? AND ? ORDER BY date',
+            (start_date, end_date)
+        )
+        return [dict(row) for row in cursor.fetchall()]
+
+def get_hourly_heatmap(start_date: str, end_date: str) -> Dict[str, Dict[int, int]]:
+    """Covers per hour for each day in a date range, as {date: {hour: covers}}"""
+    heatmap: Dict[str, Dict[int, int]] = {}
+    with transaction() as cursor:
+        cursor.execute(
+            'SELECT date, hour, covers FROM covers_hourly WHERE date BETWEEN ? AND ? ORDER BY date, hour',
+            (start_date, end_date)
+        )
+        for date, hour, covers in cursor.fetchall():
+            heatmap.setdefault(date, {})[hour] = covers
+    return heatmap
+
+def get_party_size_histogram() -> Dict[int, int]:
+    """Number of bookings per party size"""
+    with transaction() as cursor:
+        cursor.execute('SELECT guests, bookings FROM party_size_histogram ORDER BY guests')
+        return {guests: bookings for guests, bookings in cursor.fetchall()}
+
+def forecast_peak_hours(date: str, weeks: int = FORECAST_WEEKS) -> Dict[str, Any]:
+    """Expected covers per hour on a date, averaged over the same weekday in previous weeks.
+
+    Also returns the covers already booked for that date. Reads at most
+    `weeks + 1` days of hourly rollups whatever the history length.
+    """
+    day = datetime.strptime(date, "%Y-%m-%d").date()
+    past_dates = [(day - timedelta(weeks=week)).isoformat() for week in range(1, weeks + 1)]
+
+    with transaction() as cursor:
+        first_date = cursor.execute('SELECT MIN(date) FROM covers_daily').fetchone()[0]
+        # Weeks before the first booking say nothing about demand
+        past_dates = [past for past in past_dates if first_date and past >= first_date]
+
+        expected: Counter = Counter()
+        if past_dates:
+            placeholders = ", ".join("?" * len(past_dates))
+            cursor.execute(f'SELECT hour, SUM(covers) FROM covers_hourly WHERE date IN ({placeholders}) GROUP BY hour',
+                           past_dates)
+            expected.update({hour: covers / len(past_dates) for hour, covers in cursor.fetchall()})
+
+        cursor.execute('SELECT hour, covers FROM covers_hourly WHERE date = ?', (date,))
+        booked = dict(cursor.fetchall())
+
+    hours = sorted(set(expected) | set(booked))
+    by_hour = [{"hour": hour, "expected_covers": round(expected.get(hour, 0.0), 1), "booked_covers": booked.get(hour, 0)}
+               for hour in hours]
+    peak = max(by_hour, key=lambda h: max(h["expected_covers"], h["booked_covers"]), default=None)
+    return {
+        "date": date,
+        "weeks_of_history": len(past_dates),
+        "peak_hour": peak["hour"] if peak else None,
+        "hours": by_hour,
+    }
@@ -0,0 +1,416 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from itertools import groupby
+from operator import itemgetter
+from typing import Iterable, Iterator
+from app.utils.config import (EMBEDDING_MODEL, CHUNK_SIZE, CHUNK_OVERLAP, FAISS_INDEX_PATH, FAISS_INDEX_TYPE,
+                              FAISS_QUANTIZATION, FAISS_ANN_MIN_VECTORS, FAISS_NLIST, FAISS_NPROBE, FAISS_HNSW_M,
+                              FAISS_EF_SEARCH, FAISS_PQ_M, get_knowledge_base_path)
+from app.utils.pdf_extract import iter_pdf_pages
+from app.utils.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"  # Source hashes the saved index was built from
+
+# Chunks embedded and added to the index at a time during builds
+KB_EMBED_BATCH_SIZE = int(os.getenv("KB_EMBED_BATCH_SIZE", 256))
+# Text held by the streaming splitter before it emits chunks
+SPLIT_BUFFER = CHUNK_SIZE * 8
+# Distinct chat queries whose embeddings are kept; 0 disables the cache
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", 1024))
+
+# Settings assumed for manifests saved before the index type was configurable
+_MANIFEST_DEFAULTS = {"index_type": "flat", "quantization": "none"}
+
+# Timing of the most recent knowledge base load/build, for startup reporting
+knowledge_base_stats = {}
+
+# LangChain, FAISS and the embedding model are imported where they are first
+# needed, so importing this module stays cheap for processes that never chat
+
+# The one embedding model and vector store shared by every caller in this process
+_embeddings = None
+_embeddings_lock = threading.Lock()
+vector_store = None
+_version = 0  # Bumped whenever the vector store is replaced or synced
+
+def get_embeddings():
+    """Get the shared HuggingFace embeddings model, loading it on first use"""
+    global _embeddings
+    if _embeddings is None:
+        with _embeddings_lock:
+            if _embeddings is None:
+                from langchain_community.embeddings import HuggingFaceEmbeddings
+                
+                _embeddings = HuggingFaceEmbeddings(
+                    model_name=EMBEDDING_MODEL,
+                    cache_folder=None  # Set to a specific path if you want to cache the model
+                )
+    return _embeddings
+
+_query_embeddings = OrderedDict()  # Folded query text -> embedding, least recently used first
+_query_embeddings_lock = threading.Lock()
+query_embedding_stats = {"hits": 0, "misses": 0}
+
+def embed_query(text):
+    """Embedding of a chat query, cached by its case- and whitespace-folded text.
+
+    The embedding model is uncased, so folding does not change the vector.
+    """
+    key = " ".join(text.lower().split())
+    with _query_embeddings_lock:
+        embedding = _query_embeddings.get(key)
+        if embedding is not None:
+            _query_embeddings.move_to_end(key)
+            query_embedding_stats["hits"] += 1
+            CACHE_LOOKUPS.inc(cache="query_embedding", result="hit")
+            return embedding
+        query_embedding_stats["misses"] += 1
+        CACHE_LOOKUPS.inc(cache="query_embedding", result="miss")
+    
+    embedding = get_embeddings().embed_query(key)
+    if QUERY_EMBEDDING_CACHE_SIZE > 0:
+        with _query_embeddings_lock:
+            _query_embeddings[key] = embedding
+            while len(_query_embeddings) > QUERY_EMBEDDING_CACHE_SIZE:
+                _query_embeddings.popitem(last=False)
+    return embedding
+
+def set_vector_store(vs):
+    global vector_store, _version
+    vector_store = vs
+    _version += 1
+
+def get_vector_store():
+    return vector_store
+
+def get_knowledge_base_version():
+    """Changes every time set_vector_store is called, so caches can tell the content moved"""
+    return _version
+
+def _file_hash(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _build_manifest(kb_path, pdf_files):
+    """Describe the inputs an index is built from; any change forces a rebuild"""
+    return {
+        "embedding_model": EMBEDDING_MODEL,
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "index_type": FAISS_INDEX_TYPE,
+        "quantization": FAISS_QUANTIZATION,
+        "files": {f: _file_hash(os.path.join(kb_path, f)) for f in sorted(pdf_files)},
+    }
+
+def _read_manifest():
+    """Return the manifest saved with the index, or {} if there is none"""
+    try:
+        with open(os.path.join(FAISS_INDEX_PATH, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _same_settings(saved_manifest, manifest):
+    """True if both manifests use the same embedding model, chunking and index type"""
+    return all(saved_manifest.get(key, _MANIFEST_DEFAULTS.get(key)) == manifest[key]
+               for key in ("embedding_model", "chunk_size", "chunk_overlap", "index_type", "quantization"))
+
+def faiss_index_spec(ntotal, dim, index_type=FAISS_INDEX_TYPE, quantization=FAISS_QUANTIZATION):
+    """faiss.index_factory description of the index to build for ntotal vectors.
+
+    Corpora under FAISS_ANN_MIN_VECTORS chunks stay exact ("Flat"): they
+    are searched in well under a millisecond and too small to train on.
+    """
+    if index_type not in ("flat", "ivf", "hnsw"):
+        raise ValueError(f"Unknown FAISS_INDEX_TYPE: {index_type!r}")
+    if quantization not in ("none", "sq8", "pq"):
+        raise ValueError(f"Unknown FAISS_QUANTIZATION: {quantization!r}")
+    if (index_type == "flat" and quantization == "none") or ntotal < FAISS_ANN_MIN_VECTORS:
+        return "Flat"
+    
+    # PQ splits each vector into equal sub-vectors, so their count must divide the dimension
+    pq_m = max(m for m in range(1, min(FAISS_PQ_M, dim) + 1) if dim % m == 0)
+    codec = {"none": "Flat", "sq8": "SQ8", "pq": f"PQ{pq_m}"}[quantization]
+    if index_type == "ivf":
+        # Training wants roughly 39 vectors per cluster
+        nlist = max(1, min(FAISS_NLIST or 4 * int(ntotal ** 0.5), ntotal // 39))
+        return f"IVF{nlist},{codec}"
+    if index_type == "hnsw":
+        return f"HNSW{FAISS_HNSW_M}" if quantization == "none" else f"HNSW{FAISS_HNSW_M}_{codec}"
+    return codec
+
+def tune_search_index(index, nprobe=FAISS_NPROBE, ef_search=FAISS_EF_SEARCH):
+    """Apply the search-time recall/speed settings, which are not fixed when the index is built"""
+    import faiss
+    
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = nprobe
+    if hasattr(index, "hnsw"):
+        index.hnsw.efSearch = ef_search
+
+def build_search_index(vectors, index_type=FAISS_INDEX_TYPE, quantization=FAISS_QUANTIZATION):
+    """A trained and filled FAISS index of the configured type for these (n, dim) float32 vectors"""
+    import faiss
+    
+    index = faiss.index_factory(vectors.shape[1], faiss_index_spec(*vectors.shape, index_type, quantization))
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    tune_search_index(index)
+    return index
+
+def _use_configured_index(vector_store):
+    """Replace the exact index built during ingestion with the configured one, if that differs.
+
+    Vectors keep their positions, so the store's id mapping stays valid.
+    """
+    import faiss
+    
+    index = vector_store.index
+    if type(index) is not faiss.IndexFlatL2 or faiss_index_spec(index.ntotal, index.d) == "Flat":
+        return
+    vector_store.index = build_search_index(index.reconstruct_n(0, index.ntotal))
+
+def _supports_removal(index):
+    """Deleting chunks renumbers the remaining vectors, which only the exact index handles"""
+    import faiss
+    
+    return type(index) is faiss.IndexFlatL2
+
+def _copy_store(vector_store):
+    """A copy of a FAISS store that can be changed while the original keeps serving searches"""
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+    
+    return FAISS(vector_store.embedding_function, faiss.clone_index(vector_store.index),
+                 InMemoryDocstore(dict(vector_store.docstore._dict)), dict(vector_store.index_to_docstore_id),
+                 normalize_L2=vector_store._normalize_L2, distance_strategy=vector_store.distance_strategy)
+
+def _save_index(vector_store, manifest, chunk_ids):
+    """Save the index with its manifest and the chunk ids stored for each file"""
+    vector_store.save_local(FAISS_INDEX_PATH)
+    with open(os.path.join(FAISS_INDEX_PATH, MANIFEST_FILE), "w") as f:
+        json.dump({**manifest, "chunks": chunk_ids}, f, indent=2)
+
+def _split_stream(pages: Iterable[str]) -> Iterator[str]:
+    """Split a document's pages into chunks as they arrive.
+
+    Only about SPLIT_BUFFER characters are held at a time. The last chunk of
+    each split is carried over and re-split with the following pages, so
+    chunks still run across page boundaries.
+    """
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    buffer = ""
+    for page in pages:
+        buffer = f"{buffer}\n{page}" if buffer else page
+        if len(buffer) >= SPLIT_BUFFER:
+            chunks = text_splitter.split_text(buffer)
+            yield from chunks[:-1]
+            buffer = chunks[-1] if chunks else ""
+    if buffer:
+        yield from text_splitter.split_text(buffer)
+
+def _chunk_id(pdf_file, file_hash, index):
+    """Stable docstore id for a file's chunk, so it can be deleted later"""
+    return f"{pdf_file}:{file_hash[:16]}:{index}"
+
+def _ingest(kb_path, pdf_files, manifest, vector_store=None):
+    """Extract, split and embed PDFs into vector_store (a new one if None).
+
+    Pages are extracted on a process pool while this thread embeds chunks
+    KB_EMBED_BATCH_SIZE at a time and adds them to the index, so neither the
+    corpus text nor its embeddings are ever held all at once. Returns
+    (vector_store, {pdf_file: chunk ids}); vector_store stays None if no
+    text was found.
+    """
+    from langchain_community.vectorstores import FAISS
+    
+    embeddings = get_embeddings()
+    chunk_ids = {pdf_file: [] for pdf_file in pdf_files}
+    batch = []  # (text, source, id)
+    
+    def add_batch():
+        nonlocal vector_store
+        texts = [text for text, _, _ in batch]
+        metadatas = [{"source": source} for _, source, _ in batch]
+        ids = [chunk_id for _, _, chunk_id in batch]
+        if vector_store is None:
+            vector_store = FAISS.from_texts(texts, embeddings, metadatas=metadatas, ids=ids)
+        else:
+            vector_store.add_texts(texts, metadatas=metadatas, ids=ids)
+        batch.clear()
+    
+    files_by_path = {os.path.join(kb_path, pdf_file): pdf_file for pdf_file in pdf_files}
+    for path, runs in groupby(iter_pdf_pages(list(files_by_path)), key=itemgetter(0)):
+        pdf_file = files_by_path[path]
+        file_ids = chunk_ids[pdf_file]
+        for chunk in _split_stream(text for _, texts in runs for text in texts):
+            file_ids.append(_chunk_id(pdf_file, manifest["files"][pdf_file], len(file_ids)))
+            batch.append((chunk, pdf_file, file_ids[-1]))
+            if len(batch) >= KB_EMBED_BATCH_SIZE:
+                add_batch()
+    if batch:
+        add_batch()
+    return vector_store, chunk_ids
+
+def load_persisted_index(manifest):
+    """Load the saved FAISS index if it was built from exactly these sources"""
+    saved_manifest = _read_manifest()
+    if not _same_settings(saved_manifest, manifest) or saved_manifest.get("files") != manifest["files"]:
+        return None
+    
+    from langchain_community.vectorstores import FAISS
+    
+    try:
+        # The index was written by this application, so unpickling the docstore is trusted
+        vector_store = FAISS.load_local(FAISS_INDEX_PATH, get_embeddings(), allow_dangerous_deserialization=True)
+        tune_search_index(vector_store.index)
+        return vector_store
+    except Exception as e:
+        logger.warning("Could not load saved knowledge base, rebuilding: %s", e)
+        return None
+
+# Serializes builds and incremental syncs of the saved index
+_knowledge_base_lock = threading.RLock()
+
+def initialize_knowledge_base(kb_path=None, force_rebuild=False):
+    """Initialize the knowledge base for the chatbot.
+
+    Loads the index saved in FAISS_INDEX_PATH when the PDFs' content hashes
+    still match; otherwise re-extracts, re-embeds and saves it.
+    """
+    start_time = time.perf_counter()
+    
+    # Path to the knowledge base documents
+    if not kb_path:
+        kb_path = get_knowledge_base_path()
+    
+    # Create directory if it doesn't exist
+    os.makedirs(kb_path, exist_ok=True)
+    
+    # Load documents from PDFs
+    pdf_files = [f for f in os.listdir(kb_path) if f.endswith('.pdf')]
+    
+    if not pdf_files:
+        return None, "No PDF files found in the knowledge base directory."
+    
+    with _knowledge_base_lock:
+        manifest = _build_manifest(kb_path, pdf_files)
+        if not force_rebuild:
+            vector_store = load_persisted_index(manifest)
+            if vector_store:
+                elapsed = time.perf_counter() - start_time
+                knowledge_base_stats.update(source="loaded", seconds=elapsed, files=len(pdf_files))
+                return vector_store, f"Knowledge base loaded from {FAISS_INDEX_PATH} in {elapsed:.2f}s"
+        
+        # Chunk ids are tracked per PDF so its chunks can be replaced later
+        vector_store, chunk_ids = _ingest(kb_path, pdf_files, manifest)
+        if vector_store is None:
+            return None, "No text could be extracted from the PDF files."
+        _use_configured_index(vector_store)
+        
+        # Save vector store and the manifest it was built from for the next startup
+        _save_index(vector_store, manifest, chunk_ids)
+    
+    elapsed = time.perf_counter() - start_time
+    knowledge_base_stats.update(source="built", seconds=elapsed, files=len(pdf_files))
+    return vector_store, f"Knowledge base built from {len(pdf_files)} PDFs in {elapsed:.2f}s"
+
+def sync_knowledge_base(vector_store, kb_path=None):
+    """Bring a live vector store in line with the PDFs on disk.
+
+    Only new or changed files are extracted and embedded; chunks of changed
+    or deleted files are removed. Falls back to a full build when there is
+    no store yet, the embedding or index settings changed, or chunks have to
+    be removed from an approximate index. Returns (vector_store, summary).
+    
+    The live store is never modified: changes are made to a copy, which
+    sync_live_knowledge_base swaps in. Stale chunks are only removed
+    once the new ones are in, so a failed sync leaves nothing half done.
+    """
+    if not kb_path:
+        kb_path = get_knowledge_base_path()
+    os.makedirs(kb_path, exist_ok=True)
+    
+    with _knowledge_base_lock:
+        pdf_files = [f for f in os.listdir(kb_path) if f.endswith('.pdf')]
+        manifest = _build_manifest(kb_path, pdf_files)
+        saved_manifest = _read_manifest()
+        
+        if vector_store is None or not _same_settings(saved_manifest, manifest) or "chunks" not in saved_manifest:
+            vector_store, message = initialize_knowledge_base(kb_path, force_rebuild=True)
+            return vector_store, {"mode": "rebuild", "message": message}
+        
+        saved_files = saved_manifest.get("files", {})
+        chunk_ids = dict(saved_manifest["chunks"])
+        stale_files = [f for f, h in saved_files.items() if manifest["files"].get(f) != h]
+        new_files = [f for f, h in manifest["files"].items() if saved_files.get(f) != h]
+        
+        if stale_files and not _supports_removal(vector_store.index):
+            vector_store, message = initialize_knowledge_base(kb_path, force_rebuild=True)
+            return vector_store, {"mode": "rebuild", "message": message}
+        
+        if not stale_files and not new_files:
+            return vector_store, {"mode": "incremental", "added_files": [], "removed_files": [],
+                                  "chunks_added": 0, "chunks_removed": 0}
+        
+        updated_store, new_ids = _ingest(kb_path, new_files, manifest, _copy_store(vector_store))
+        
+        stale_ids = [chunk_id for f in stale_files for chunk_id in chunk_ids.pop(f, [])]
+        present_ids = set(updated_store.index_to_docstore_id.values())
+        stale_ids = [chunk_id for chunk_id in stale_ids if chunk_id in present_ids]
+        if stale_ids:
+            updated_store.delete(stale_ids)
+        chunk_ids.update(new_ids)
+        chunks_added = sum(len(ids) for ids in new_ids.values())
+        
+        _use_configured_index(updated_store)
+        _save_index(updated_store, manifest, chunk_ids)
+        vector_store = updated_store
+    
+    return vector_store, {
+        "mode": "incremental",
+        "added_files": new_files,
+        "removed_files": [f for f in stale_files if f not in manifest["files"]],
+        "chunks_added": chunks_added,
+        "chunks_removed": len(stale_ids),
+    }
+
+# Reading the live store and swapping in its successor happen under the build
+# lock, so a rebuild is never overwritten by a sync of the store it replaced
+
+def load_live_knowledge_base(kb_path=None, force_rebuild=False):
+    """initialize_knowledge_base, installing the result as the live store. Returns (vector_store, message)"""
+    with _knowledge_base_lock:
+        vector_store, message = initialize_knowledge_base(kb_path, force_rebuild)
+        if vector_store:
+            set_vector_store(vector_store)
+    return vector_store, message
+
+def sync_live_knowledge_base(kb_path=None):
+    """sync_knowledge_base on the live store, installing the result. Returns the summary.
+
+    When no PDFs are left the live store is cleared rather than going on
+    serving the deleted files' chunks.
+    """
+    with _knowledge_base_lock:
+        live_store = get_vector_store()
+        vector_store, summary = sync_knowledge_base(live_store, kb_path)
+        if vector_store is not live_store:
+            set_vector_store(vector_store)
+    return summary
@@ -0,0 +1,352 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.utils.metrics import LLM_CALLS, LLM_ERRORS
+
+DEFAULT_GROQ_BASE_URL = "https://api.groq.com"  # GROQ_BASE_URL overrides it, e.g. to point at a mock server
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 30))  # Seconds allowed per call, retries included
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))  # In-flight upstream calls
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", 0.5))  # Seconds, doubled per attempt
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", 5))  # Consecutive failures that open the circuit
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", 30))  # Seconds before a trial call is let through
+
+# LLM_ERRORS kind for each gateway counter other than "calls"
+_ERROR_KINDS = {"retries": "retry", "failures": "failure", "rejected": "rejected"}
+
+# Upstream statuses worth another attempt: rate limiting and server errors
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+Messages = List[Tuple[str, str]]  # [(role, content)] as used with ChatGroq
+
+class LLMUnavailable(Exception):
+    """The LLM could not answer in time: circuit open, deadline passed or retries exhausted"""
+
+class _RetryableError(Exception):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def _is_transient(error: BaseException) -> bool:
+    """Whether a failed call is worth retrying: transport errors, timeouts, 429 and 5xx.
+
+    Looks through the exception's causes, and reads status codes by duck
+    typing, so errors raised by CrewAI, LiteLLM, the Groq SDK or httpx are
+    recognised without importing them.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, (_RetryableError, httpx.TransportError, TimeoutError, ConnectionError)):
+            return True
+        if type(error).__name__ in ("APIConnectionError", "APITimeoutError", "Timeout"):
+            return True
+        status = getattr(error, "status_code", None)
+        if status is None:
+            status = getattr(getattr(error, "response", None), "status_code", None)
+        if isinstance(status, int):
+            return status in RETRYABLE_STATUS
+        error = error.__cause__ or error.__context__
+    return False
+
+class CircuitBreaker:
+    """Stops calling a failing upstream for a while.
+
+    Closed: calls go through. After `threshold` consecutive failures it
+    opens and rejects calls for `reset_timeout` seconds, then lets a single
+    trial call through (half-open); its outcome closes or reopens it.
+    """
+
+    def __init__(self, threshold: int = LLM_BREAKER_THRESHOLD, reset_timeout: float = LLM_BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half_open" if time.monotonic() - self._opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+    def release(self):
+        """End a call whose outcome says nothing about the upstream (cancelled, or a caller-side error)"""
+        with self._lock:
+            self._trial_running = False
+
+class LLMGateway:
+    """Every upstream LLM call goes through here.
+
+    Calls share one HTTP connection pool, run under a concurrency limit and
+    a deadline, retry transient failures with jittered exponential backoff
+    and are short-circuited while the upstream keeps failing. Callers catch
+    LLMUnavailable and fall back to cached or templated answers.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None, timeout: float = LLM_TIMEOUT,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY, max_retries: int = LLM_MAX_RETRIES,
+                 retry_base_delay: float = LLM_RETRY_BASE_DELAY, breaker: Optional[CircuitBreaker] = None):
+        self._base_url = base_url
+        self._api_key = api_key
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.breaker = breaker or CircuitBreaker()
+        self._sync_slots = threading.BoundedSemaphore(max_concurrency)
+        self._async_slots: Optional[asyncio.Semaphore] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._stats = {"calls": 0, "retries": 0, "failures": 0, "rejected": 0}
+        self._stats_lock = threading.Lock()
+
+    # Read from the environment on use, not at import, so a .env loaded later is honoured
+
+    @property
+    def base_url(self) -> str:
+        return (self._base_url or os.getenv("GROQ_BASE_URL", DEFAULT_GROQ_BASE_URL)).rstrip("/")
+
+    @property
+    def api_key(self) -> str:
+        return self._api_key or os.getenv("GROQ_API_KEY", "")
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self._stats[key] += 1
+        if key == "calls":
+            LLM_CALLS.inc()
+        else:
+            LLM_ERRORS.inc(kind=_ERROR_KINDS[key])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {**self._stats, "circuit": self.breaker.state}
+
+    def _backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full-jitter exponential backoff, never shorter than a Retry-After hint"""
+        return max(random.uniform(0, self.retry_base_delay * 2 ** attempt), retry_after or 0)
+
+    def _open_circuit_check(self):
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise LLMUnavailable("LLM circuit is open")
+
+    # Blocking calls (CrewAI crews run on the LLM thread pool)
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking LLM call (e.g. crew.kickoff) under the gateway's limits.
+
+        The deadline bounds waiting for a slot and starting retries; a call
+        already running is bounded by the client's own timeout. Only
+        transient failures are retried and counted against the circuit;
+        anything else (a missing API key, a validation error) is re-raised
+        as it is.
+        """
+        deadline = time.monotonic() + self.timeout
+        if not self._sync_slots.acquire(timeout=self.timeout):
+            self._count("rejected")
+            raise LLMUnavailable("Timed out waiting for an LLM slot")
+        try:
+            self._open_circuit_check()
+            attempt = 0
+            while True:
+                self._count("calls")
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    if not _is_transient(e):
+                        self._count("failures")
+                        self.breaker.release()
+                        raise
+                    delay = self._backoff(attempt)
+                    if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+                        self._count("failures")
+                        self.breaker.record_failure()
+                        raise LLMUnavailable(f"LLM call failed: {e}") from e
+                    self._count("retries")
+                    attempt += 1
+                    time.sleep(delay)
+                    continue
+                except BaseException:
+                    self.breaker.release()
+                    raise
+                self.breaker.record_success()
+                return result
+        finally:
+            self._sync_slots.release()
+
+    # Direct async calls to the Groq (OpenAI-compatible) chat completions API
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 5.0)),
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency),
+            )
+            self._async_slots = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def aclose(self):
+        """Close the connection pool (called on application shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _payload(self, messages: Messages, model: str, stream: bool, **params) -> Dict[str, Any]:
+        return {
+            "model": model,
+            "messages": [{"role": "user" if role == "human" else role, "content": content} for role, content in messages],
+            "stream": stream,
+            **params,
+        }
+
+    @staticmethod
+    def _check_status(response: httpx.Response):
+        if response.status_code in RETRYABLE_STATUS:
+            retry_after = response.headers.get("retry-after")
+            raise _RetryableError(f"Upstream returned {response.status_code}",
+                                  float(retry_after) if retry_after and retry_after.isdigit() else None)
+        response.raise_for_status()
+
+    async def _with_retries(self, attempt_once: Callable[[], Any], deadline: float) -> Any:
+        """Await attempt_once() under the slot limit, retrying transient failures until the deadline"""
+        client_slots = self._async_slots
+        try:
+            await asyncio.wait_for(client_slots.acquire(), max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            self._count("rejected")
+            raise LLMUnavailable("Timed out waiting for an LLM slot")
+        try:
+            self._open_circuit_check()
+            attempt = 0
+            while True:
+                self._count("calls")
+                try:
+                    result = await asyncio.wait_for(attempt_once(), max(deadline - time.monotonic(), 0))
+                except (_RetryableError, httpx.TransportError, asyncio.TimeoutError) as e:
+                    delay = self._backoff(attempt, getattr(e, "retry_after", None))
+                    if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+                        self._count("failures")
+                        self.breaker.record_failure()
+                        raise LLMUnavailable(f"LLM call failed: {e!r}") from e
+                    self._count("retries")
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                    continue
+                except httpx.HTTPStatusError as e:
+                    # A 4xx other than rate limiting will not succeed on retry, but the upstream is up
+                    self._count("failures")
+                    self.breaker.record_success()
+                    raise LLMUnavailable(f"LLM request rejected: {e}") from e
+                except Exception as e:
+                    # E.g. a malformed response body
+                    self._count("failures")
+                    self.breaker.record_failure()
+                    raise LLMUnavailable(f"LLM call failed: {e!r}") from e
+                except BaseException:
+                    # Cancelled, e.g. the streaming client went away; a half-open trial must not stay claimed
+                    self.breaker.release()
+                    raise
+                self.breaker.record_success()
+                return result
+        finally:
+            client_slots.release()
+
+    async def chat(self, messages: Messages, model: str, **params) -> str:
+        """Complete a chat and return the answer text"""
+        client = self._get_client()
+
+        async def attempt_once():
+            response = await client.post("/openai/v1/chat/completions", json=self._payload(messages, model, False, **params))
+            self._check_status(response)
+            return response.json()["choices"][0]["message"]["content"]
+
+        return await self._with_retries(attempt_once, time.monotonic() + self.timeout)
+
+    async def stream_chat(self, messages: Messages, model: str, **params) -> AsyncIterator[str]:
+        """Stream the answer text as it is generated.
+
+        Retries and the deadline cover the wait for the first token; once
+        text has been yielded a failure ends the stream with LLMUnavailable.
+        """
+        client = self._get_client()
+        payload = self._payload(messages, model, True, **params)
+
+        async def attempt_once():
+            response = await client.send(client.build_request("POST", "/openai/v1/chat/completions", json=payload),
+                                         stream=True)
+            try:
+                self._check_status(response)
+                tokens = _sse_tokens(response.aiter_lines())
+                # Waiting for the first token is part of the retried, deadline-bound attempt
+                return response, tokens, await tokens.__anext__()
+            except StopAsyncIteration:
+                await response.aclose()
+                return None
+            except BaseException:
+                await response.aclose()
+                raise
+
+        first = await self._with_retries(attempt_once, time.monotonic() + self.timeout)
+        if first is None:
+            return
+        response, tokens, token = first
+        try:
+            yield token
+            async for token in tokens:
+                yield token
+        except (httpx.TransportError, httpx.StreamError) as e:
+            LLM_ERRORS.inc(kind="interrupted")
+            self.breaker.record_failure()
+            raise LLMUnavailable(f"LLM stream interrupted: {e!r}") from e
+        finally:
+            await response.aclose()
+
+async def _sse_tokens(lines: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Content deltas from an OpenAI-style Server-Sent Events stream"""
+    async for line in lines:
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+        if delta:
+            yield delta
+
+# Shared by every LLM call in this process
+llm_gateway = LLMGateway()
@@ -0,0 +1,144 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.services.knowledge_base import get_knowledge_base_version
+from app.utils.metrics import CACHE_LOOKUPS
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 512))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", 3600))  # Seconds
+# Opt-in semantic tier: cosine similarity above which a near-duplicate question reuses a
+# cached answer. Off (0) by default, because MiniLM scores questions with different answers
+# ("vegan options?" / "vegetarian options?", Friday / Saturday hours) above 0.9. If enabling
+# it, pick a threshold from your own traffic (0.97 or higher) and watch the semantic_hit count.
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", 0))
+
+# Words that make a question lean on the conversation before it ("is it spicy?", "what about Saturday?")
+FOLLOW_UP_PATTERN = re.compile(r"\b(it|its|this|that|these|those|they|them|their|one|ones|same|also|else|more|"
+                               r"instead|what about|how about)\b")
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
+
+def history_context(query: str, history: Optional[List[Dict[str, str]]] = None) -> str:
+    """Cache context for a question asked after the session's history.
+
+    Self-contained questions share one entry whatever came before them.
+    Follow-ups are keyed on a digest of the previous exchange (the last
+    question and answer) they refer to.
+    """
+    if not history or not FOLLOW_UP_PATTERN.search(normalize_query(query)):
+        return ""
+    previous = "\n".join(f"{m['role']}:{normalize_query(m['content'])}" for m in history[-2:])
+    return hashlib.sha1(previous.encode()).hexdigest()[:16]
+
+class ResponseCache:
+    """LRU + TTL cache of chatbot answers with an optional embedding-similarity tier.
+
+    Entries belong to one knowledge base version and are dropped as soon as
+    the knowledge base is rebuilt or synced. Each entry is stored under a
+    context (see history_context); lookups only match entries in theirs.
+    """
+
+    def __init__(self, max_size: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL,
+                 similarity_threshold: float = RESPONSE_CACHE_SIMILARITY):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()  # (context, query) -> (response, expires_at, unit embedding)
+        self._version = get_knowledge_base_version()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.similarity_threshold > 0
+
+    def _check_version(self):
+        version = get_knowledge_base_version()
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def get(self, query: str, embedding: Optional[List[float]] = None, stale_ok: bool = False,
+            context: str = "") -> Optional[str]:
+        """Return a cached answer for this query (or a near-duplicate of it).
+
+        Expired answers stay until evicted; stale_ok returns them too, as a
+        fallback when the LLM is unavailable.
+        """
+        key = (context, normalize_query(query))
+        now = float("-inf") if stale_ok else time.monotonic()
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                CACHE_LOOKUPS.inc(cache="response", result="stale_hit" if stale_ok else "hit")
+                return entry[0]
+
+            if embedding is not None and self.semantic_enabled:
+                match = self._nearest(_unit(embedding), now, context)
+                if match:
+                    self._entries.move_to_end(match)
+                    self.semantic_hits += 1
+                    CACHE_LOOKUPS.inc(cache="response", result="stale_hit" if stale_ok else "semantic_hit")
+                    return self._entries[match][0]
+
+            self.misses += 1
+            CACHE_LOOKUPS.inc(cache="response", result="stale_miss" if stale_ok else "miss")
+            return None
+
+    def _nearest(self, vector: np.ndarray, now: float, context: str) -> Optional[tuple]:
+        """Key of the most similar entry in context above the threshold that has not expired by now"""
+        candidates = [(key, entry[2]) for key, entry in self._entries.items()
+                      if key[0] == context and entry[1] > now and entry[2] is not None]
+        if not candidates:
+            return None
+        scores = np.stack([emb for _, emb in candidates]) @ vector
+        best = int(np.argmax(scores))
+        return candidates[best][0] if scores[best] >= self.similarity_threshold else None
+
+    def put(self, query: str, response: str, embedding: Optional[List[float]] = None, context: str = ""):
+        """Cache an answer, evicting the least recently used entry when full"""
+        key = (context, normalize_query(query))
+        unit = _unit(embedding) if embedding is not None and self.semantic_enabled else None
+        with self._lock:
+            self._check_version()
+            self._entries[key] = (response, time.monotonic() + self.ttl, unit)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.semantic_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.semantic_hits) / lookups if lookups else 0.0,
+            }
+
+def _unit(embedding: List[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+# Shared by every chat request in this process
+response_cache = ResponseCache()
@@ -0,0 +1,171 @@
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Dict, List
+
+from app.db.database import transaction
+
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")  # memory, sqlite or redis
+SESSION_TTL = float(os.getenv("SESSION_TTL", 3600))  # Seconds of inactivity before a session expires
+SESSION_HISTORY_LIMIT = int(os.getenv("SESSION_HISTORY_LIMIT", 10))  # Messages kept per session
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+class SessionStore(ABC):
+    """Chat sessions with a sliding expiry and a short conversation history.
+
+    Every backend evicts expired sessions in amortized O(1) per request.
+    """
+
+    @abstractmethod
+    def touch(self, session_id: str) -> None:
+        """Create the session or extend its expiry"""
+
+    @abstractmethod
+    def get_history(self, session_id: str) -> List[Dict[str, str]]:
+        """Recent messages as [{"role": ..., "content": ...}], oldest first"""
+
+    @abstractmethod
+    def append(self, session_id: str, role: str, content: str) -> None:
+        """Add a message, keeping only the most recent SESSION_HISTORY_LIMIT"""
+
+class InMemorySessionStore(SessionStore):
+    """Per-process store. Sessions share one TTL, so refresh order is expiry
+    order: touched sessions move to the end and expired ones are popped from
+    the front."""
+
+    def __init__(self, ttl: float = SESSION_TTL, history_limit: int = SESSION_HISTORY_LIMIT):
+        self.ttl = ttl
+        self.history_limit = history_limit
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()  # session_id -> (expires_at, messages)
+        self._lock = threading.Lock()
+
+    def _evict_expired(self, now: float):
+        while self._sessions:
+            expires_at, _ = next(iter(self._sessions.values()))
+            if expires_at > now:
+                break
+            self._sessions.popitem(last=False)
+
+    def touch(self, session_id: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            entry = self._sessions.pop(session_id, None)
+            messages = entry[1] if entry else deque(maxlen=self.history_limit)
+            self._sessions[session_id] = (now + self.ttl, messages)
+
+    def get_history(self, session_id: str) -> List[Dict[str, str]]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if not entry or entry[0] <= time.monotonic():
+                return []
+            return list(entry[1])
+
+    def append(self, session_id: str, role: str, content: str) -> None:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry:
+                entry[1].append({"role": role, "content": content})
+
+    def __len__(self):
+        return len(self._sessions)
+
+class SqliteSessionStore(SessionStore):
+    """Store in the restaurant database, shared by all workers on this host.
+
+    Each touch deletes at most EVICT_BATCH expired sessions through the
+    expires_at index, so cleanup cost per request stays bounded.
+    """
+
+    EVICT_BATCH = 100
+
+    def __init__(self, ttl: float = SESSION_TTL, history_limit: int = SESSION_HISTORY_LIMIT):
+        self.ttl = ttl
+        self.history_limit = history_limit
+
+    def touch(self, session_id: str) -> None:
+        now = time.time()
+        with transaction(immediate=True) as cursor:
+            cursor.execute(
+                'DELETE FROM chat_sessions WHERE session_id IN '
+                '(SELECT session_id FROM chat_sessions WHERE expires_at <= ? LIMIT ?)',
+                (now, self.EVICT_BATCH)
+            )
+            # An expired session that missed this batch still starts over with no history
+            cursor.execute('DELETE FROM chat_sessions WHERE session_id = ? AND expires_at <= ?', (session_id, now))
+            cursor.execute(
+                'INSERT INTO chat_sessions (session_id, expires_at) VALUES (?, ?) '
+                'ON CONFLICT (session_id) DO UPDATE SET expires_at = excluded.expires_at',
+                (session_id, now + self.ttl)
+            )
+
+    def get_history(self, session_id: str) -> List[Dict[str, str]]:
+        with transaction() as cursor:
+            cursor.execute(
+                'SELECT m.role, m.content FROM chat_messages m JOIN chat_sessions s ON s.session_id = m.session_id '
+                'WHERE m.session_id = ? AND s.expires_at > ? ORDER BY m.id',
+                (session_id, time.time())
+            )
+            return [{"role": row[0], "content": row[1]} for row in cursor.fetchall()]
+
+    def append(self, session_id: str, role: str, content: str) -> None:
+        with transaction(immediate=True) as cursor:
+            cursor.execute(
+                'INSERT INTO chat_messages (session_id, role, content) '
+                'SELECT ?, ?, ? WHERE EXISTS (SELECT 1 FROM chat_sessions WHERE session_id = ?)',
+                (session_id, role, content, session_id)
+            )
+            cursor.execute(
+                'DELETE FROM chat_messages WHERE session_id = ? AND id <= '
+                '(SELECT id FROM chat_messages WHERE session_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)',
+                (session_id, session_id, self.history_limit)
+            )
+
+class RedisSessionStore(SessionStore):
+    """Store in Redis (or any server speaking its protocol), shared across hosts.
+
+    Redis expires keys itself, so there is nothing to evict here.
+    """
+
+    def __init__(self, url: str = REDIS_URL, ttl: float = SESSION_TTL, history_limit: int = SESSION_HISTORY_LIMIT):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("SESSION_BACKEND=redis requires the 'redis' package (pip install redis)")
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self.ttl = int(ttl)
+        self.history_limit = history_limit
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"chat:session:{session_id}"
+
+    def touch(self, session_id: str) -> None:
+        self._redis.expire(self._key(session_id), self.ttl)
+
+    def get_history(self, session_id: str) -> List[Dict[str, str]]:
+        return [json.loads(item) for item in self._redis.lrange(self._key(session_id), 0, -1)]
+
+    def append(self, session_id: str, role: str, content: str) -> None:
+        key = self._key(session_id)
+        pipe = self._redis.pipeline()
+        pipe.rpush(key, json.dumps({"role": role, "content": content}))
+        pipe.ltrim(key, -self.history_limit, -1)
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+def create_session_store(backend: str = SESSION_BACKEND) -> SessionStore:
+    """Build the session store selected by SESSION_BACKEND"""
+    if backend == "memory":
+        return InMemorySessionStore()
+    if backend == "sqlite":
+        return SqliteSessionStore()
+    if backend == "redis":
+        return RedisSessionStore()
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+
+# Shared by every chat request in this process
+session_store = create_session_store()
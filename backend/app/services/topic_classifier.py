@@ -0,0 +1,170 @@
+import logging
+import os
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Keyword list for restaurant topics. Some words appear more than once; each
+# occurrence adds to the match count, so the weights below keep that behaviour.
+RESTAURANT_KEYWORD_LIST = [
+    "restaurant", "food", "menu", "dish", "meal", "dinner", "lunch", "breakfast", 
+    "brunch", "reservation", "book", "table", "seating", "dining", "chef", "cuisine", 
+    "appetizer", "dessert", "drink", "beverage", "wine", "cocktail", "taste", "flavor",
+    "ingredient", "special", "vegan", "vegetarian", "allergy", "dietary", "hours", "open",
+    "close", "location", "price", "cost", "expensive", "cheap", "ambiance", "atmosphere",
+    "waiter", "service", "tip", "review", "rating", "popular", "recommendation", "specialty",
+    "signature", "spicy", "sweet", "savory", "portion", "plate", "fork", "knife", "spoon",
+    "napkin", "glass", "bottle", "menu", "order", "delivery", "takeout", "pickup", "catering",
+    "party", "event", "celebration", "birthday", "anniversary", "date", "romantic", "family",
+    "group", "private", "dress", "code", "casual", "formal", "parking", "accessibility",
+    "wheelchair", "restroom", "bathroom", "wifi", "music", "noise", "quiet", "loud", "busy",
+    "wait", "time", "rush", "crowd", "seat", "host", "hostess", "manager", "owner", "cook",
+    "kitchen", "fresh", "local", "organic", "sustainable", "seasonal", "farm", "source",
+    "import", "domestic", "regional", "national", "international", "fusion", "traditional",
+    "authentic", "modern", "innovative", "classic", "trendy", "popular", "new", "old",
+    "established", "award", "recognition", "star", "review", "critic", "guest", "customer",
+    "diner", "patron", "party", "reservation", "cancel", "modify", "change", "confirm",
+    # Adding more general dining terms to improve detection
+    "eat", "eating", "diet", "taste", "serving", "serve", "specialty", "offer", "available",
+    "cuisine", "cook", "cooking", "culinary", "dining", "dine", "dish", "delicious", "tasty",
+    "flavor", "flavors", "meal", "meals", "menu", "menus", "option", "options", "serving",
+    "servings", "size", "sizes", "portion", "portions", "plate", "plates", "bowl", "bowls",
+    "cup", "cups", "glass", "glasses", "drink", "drinks", "beverage", "beverages", "bottle",
+    "bottles", "wine", "wines", "beer", "beers", "cocktail", "cocktails", "spirit", "spirits",
+    "juice", "juices", "soda", "sodas", "water", "still", "sparkling", "tea", "coffee"
+]
+
+# Keyword -> number of times it appears in the list, for O(words) matching
+RESTAURANT_KEYWORD_WEIGHTS = Counter(RESTAURANT_KEYWORD_LIST)
+
+# Check for specific non-restaurant patterns
+NON_RESTAURANT_PATTERN_LIST = [
+    r'\b(politics|news|sports|weather|stock|crypto|program|code|science|math|physics)\b',
+    r'\b(create|write|generate)\s+(a|an|the)?\s+(poem|story|essay|article|code|script)\b',
+    r'\b(explain|tell\s+me\s+about)\s+(history|war|president|government|theory)\b',
+    r'\bhow\s+(to|do|can|would)\s+(i|you|we|they)\s+(hack|invest|learn|study)\b',
+    r'\bwhat\s+(is|are|were|was)\s+(the|a|an)?\s+(meaning|theory|concept)\s+of\b'
+]
+
+NON_RESTAURANT_PATTERNS = tuple(re.compile(pattern) for pattern in NON_RESTAURANT_PATTERN_LIST)
+# One pass that rules out all patterns at once for the usual (restaurant) query
+ANY_NON_RESTAURANT_PATTERN = re.compile("|".join(f"(?:{pattern})" for pattern in NON_RESTAURANT_PATTERN_LIST))
+
+QUESTION_STARTERS = frozenset(["how", "what", "when", "where", "why", "is", "are", "can", "do", "does", "will"])
+
+# Lower threshold to capture more potential restaurant questions
+TOPIC_THRESHOLD = 0.45
+
+# "keywords" (default) or "embedding" (nearest labelled example, reusing the FAISS embedding model)
+TOPIC_CLASSIFIER = os.getenv("TOPIC_CLASSIFIER", "keywords")
+
+def keyword_topic_score(query):
+    """Score a query with the keyword/pattern heuristics.
+
+    Returns (confidence, keyword_matches, non_restaurant_matches).
+    """
+    query_lower = query.lower()
+    words = query_lower.split()
+    keyword_matches = sum(RESTAURANT_KEYWORD_WEIGHTS[word] for word in set(words))
+    
+    if ANY_NON_RESTAURANT_PATTERN.search(query_lower):
+        non_restaurant_matches = sum(1 for pattern in NON_RESTAURANT_PATTERNS if pattern.search(query_lower))
+    else:
+        non_restaurant_matches = 0
+    
+    # Give higher initial confidence for short queries that may be restaurant related
+    base_confidence = 0.4  # Default baseline
+    
+    # Calculate confidence based on keyword matches and non-restaurant patterns
+    if len(words) <= 3:  # Very short queries are given benefit of doubt
+        confidence = 0.6 + (keyword_matches * 0.15)
+    else:
+        confidence = base_confidence + (keyword_matches * 0.15) - (non_restaurant_matches * 0.3)
+        
+        # If query is asking a question (starts with how, what, when, where, etc.)
+        if words[0] in QUESTION_STARTERS:
+            confidence += 0.1  # Slightly boost confidence for questions
+    
+    # Positive bias for very short queries that could be simple food or menu items
+    if len(words) == 1:
+        confidence += 0.2
+    
+    return confidence, keyword_matches, non_restaurant_matches
+
+# Labelled examples for the embedding classifier
+RESTAURANT_EXAMPLES = [
+    "What time do you open?",
+    "Do you have vegan options?",
+    "Can I book a table for four tonight?",
+    "What is on the dinner menu?",
+    "Is the butter chicken spicy?",
+    "Do you serve alcohol?",
+    "Is there parking near the restaurant?",
+    "Can you host a birthday party?",
+    "How much does the tasting menu cost?",
+    "Are your dishes gluten free?",
+    "What desserts do you recommend?",
+    "Do you offer takeaway or delivery?",
+]
+OFF_TOPIC_EXAMPLES = [
+    "Who won the election?",
+    "Write me a poem about the ocean",
+    "Explain quantum physics",
+    "What is the stock price of Apple?",
+    "How do I learn Python programming?",
+    "Tell me about the history of World War II",
+    "What is the weather tomorrow?",
+    "Solve this math equation for me",
+    "Who is the president of France?",
+    "How do I invest in crypto?",
+    "Generate a script to scrape a website",
+    "What is the meaning of life?",
+]
+
+_prototypes = None
+_prototypes_lock = threading.Lock()
+
+def _unit_rows(vectors):
+    matrix = np.asarray(vectors, dtype=np.float32)
+    return matrix / np.linalg.norm(matrix, axis=-1, keepdims=True)
+
+def _get_prototypes():
+    """Embed the labelled examples once with the shared embedding model"""
+    global _prototypes
+    if _prototypes is None:
+        with _prototypes_lock:
+            if _prototypes is None:
+                from app.services.knowledge_base import get_embeddings
+                embeddings = get_embeddings()
+                _prototypes = (_unit_rows(embeddings.embed_documents(RESTAURANT_EXAMPLES)),
+                               _unit_rows(embeddings.embed_documents(OFF_TOPIC_EXAMPLES)))
+    return _prototypes
+
+def embedding_topic_score(query, query_embedding=None):
+    """Margin between the closest restaurant and closest off-topic example (cosine similarity)"""
+    restaurant, off_topic = _get_prototypes()
+    if query_embedding is None:
+        from app.services.knowledge_base import embed_query
+        query_embedding = embed_query(query)
+    vector = _unit_rows(query_embedding)
+    return float((restaurant @ vector).max() - (off_topic @ vector).max())
+
+def is_restaurant_topic(query, query_embedding=None):
+    """
+    Pre-filter to determine if the query is related to restaurant topics.
+    Returns a tuple of (is_relevant, confidence)
+    """
+    if TOPIC_CLASSIFIER == "embedding":
+        margin = embedding_topic_score(query, query_embedding)
+        return margin >= 0, 0.5 + margin
+    
+    confidence, keyword_matches, non_restaurant_matches = keyword_topic_score(query)
+    
+    logger.debug("Topic query=%r keywords=%s non_restaurant=%s confidence=%s",
+                 query, keyword_matches, non_restaurant_matches, confidence)
+    
+    return confidence >= TOPIC_THRESHOLD, confidence
@@ -1,67 +1,58 @@
+import logging
 import os
 from dotenv import load_dotenv
-from langchain.vectorstores import FAISS
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import HuggingFaceEmbeddings
+
+# Settings below, and in modules that import this one, are read at import:
+# load .env first so they see it whichever entry point imported them
+load_dotenv()
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+FAISS_INDEX_PATH = os.getenv("FAISS_INDEX_PATH", "faiss_index")
+
+# Retrieval index: "flat" (exact), "ivf" or "hnsw", optionally storing vectors
+# quantized ("sq8" or "pq") to save memory on large corpora
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat").lower()
+FAISS_QUANTIZATION = os.getenv("FAISS_QUANTIZATION", "none").lower()
+FAISS_ANN_MIN_VECTORS = int(os.getenv("FAISS_ANN_MIN_VECTORS", 2000))  # Smaller corpora always use flat
+FAISS_NLIST = int(os.getenv("FAISS_NLIST", 0))  # IVF clusters; 0 picks about 4 * sqrt(chunks)
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", 8))  # IVF clusters searched per query
+FAISS_HNSW_M = int(os.getenv("FAISS_HNSW_M", 32))  # HNSW links per vector
+FAISS_EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", 64))  # HNSW candidates kept per query
+FAISS_PQ_M = int(os.getenv("FAISS_PQ_M", 16))  # PQ sub-vectors (bytes per vector)
 
 def load_environment():
     """Load environment variables from .env file"""
     load_dotenv()
 
+def configure_logging():
+    """Log to stderr at LOG_LEVEL (default INFO); DEBUG adds per-request chat detail"""
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(),
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
 def get_max_capacity():
     """Get the maximum capacity from environment variables or use default"""
     return int(os.getenv("MAX_CAPACITY", 50))
 
-def get_embeddings():
-    """Get HuggingFace embeddings model"""
-    return HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2",
-        cache_folder=None  # Set to a specific path if you want to cache the model
-    )
+def get_time_slots():
+    """Get the bookable time slots from environment variables or use defaults"""
+    slots = os.getenv("TIME_SLOTS", "5:00 PM,5:30 PM,6:00 PM,6:30 PM,7:00 PM,7:30 PM,8:00 PM,8:30 PM,9:00 PM")
+    return [slot.strip() for slot in slots.split(",") if slot.strip()]
+
+def get_knowledge_base_path():
+    """Get the directory holding the knowledge base PDFs"""
+    return os.getenv("KNOWLEDGE_BASE_PATH", "./restaurant_docs")
+
+def get_crew_verbose():
+    """Verbose CrewAI tracing: CREW_VERBOSE if set, otherwise on unless APP_ENV=production"""
+    default = "false" if os.getenv("APP_ENV", "development") == "production" else "true"
+    return os.getenv("CREW_VERBOSE", default).lower() in ("1", "true", "yes")
+
+def get_ai_warmup():
+    """Whether startup loads the knowledge base and AI models in the background (AI_WARMUP, default on)"""
+    return os.getenv("AI_WARMUP", "true").lower() in ("1", "true", "yes")
 
-def initialize_knowledge_base(kb_path=None):
-    """Initialize the knowledge base for the chatbot"""
-    import pdfplumber
-    
-    # Path to the knowledge base documents
-    if not kb_path:
-        kb_path = os.getenv("KNOWLEDGE_BASE_PATH", "./restaurant_docs")
-    
-    # Create directory if it doesn't exist
-    os.makedirs(kb_path, exist_ok=True)
-    
-    # Load documents from PDFs
-    all_text = []
-    pdf_files = [f for f in os.listdir(kb_path) if f.endswith('.pdf')]
-    
-    if not pdf_files:
-        return None, "No PDF files found in the knowledge base directory."
-    
-    # Extract text from PDFs
-    for pdf_file in pdf_files:
-        try:
-            with pdfplumber.open(os.path.join(kb_path, pdf_file)) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        all_text.append(text)
-        except Exception as e:
-            print(f"Error processing {pdf_file}: {str(e)}")
-    
-    if not all_text:
-        return None, "No text could be extracted from the PDF files."
-    
-    # Process text
-    combined_text = "\n".join(all_text)
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    final_documents = text_splitter.split_text(combined_text)
-    
-    # Create vector store
-    embeddings = get_embeddings()
-    vector_store = FAISS.from_texts(final_documents, embeddings)
-    
-    # Save vector store for later use
-    vector_store.save_local("faiss_index")
-    
-    return vector_store, "Knowledge base initialized successfully"
\ No newline at end of file
+def get_reservation_fast_path():
+    """Whether fully parsed chat reservations skip the LLM (RESERVATION_FAST_PATH, default on)"""
+    return os.getenv("RESERVATION_FAST_PATH", "true").lower() in ("1", "true", "yes")
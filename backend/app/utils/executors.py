@@ -0,0 +1,37 @@
+import asyncio
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+from app.utils.metrics import DB_SECONDS
+
+# Separate bounded pools so slow LLM calls cannot starve quick database work
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 8))
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", 4))
+
+_db_executor = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="db")
+_llm_executor = ThreadPoolExecutor(max_workers=LLM_POOL_SIZE, thread_name_prefix="llm")
+
+def _timed_db_call(func: Callable[..., Any], *args, **kwargs) -> Any:
+    with DB_SECONDS.time(operation=getattr(func, "__name__", "call")):
+        return func(*args, **kwargs)
+
+async def run_db(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking database call on the DB thread pool, timed by function name"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, partial(_timed_db_call, func, *args, **kwargs))
+
+async def run_llm(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking LLM / knowledge-base call on the LLM thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_llm_executor, partial(func, *args, **kwargs))
+
+def submit_llm(func: Callable[..., Any], *args, **kwargs) -> Future:
+    """Queue a background job on the LLM thread pool without waiting for it"""
+    return _llm_executor.submit(func, *args, **kwargs)
+
+def shutdown_executors():
+    """Stop accepting work and wait for running jobs (called on application shutdown)"""
+    _db_executor.shutdown(wait=True)
+    _llm_executor.shutdown(wait=True)
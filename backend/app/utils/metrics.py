@@ -0,0 +1,162 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# Seconds; spans sub-millisecond SQLite reads up to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry: List["_Metric"] = []
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+
+class Counter(_Metric):
+    """A count that only goes up, per combination of label values"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_format_labels(self.labels, key)} {value:g}"
+
+class Histogram(_Metric):
+    """Observations (usually seconds) counted into cumulative buckets, per combination of label values"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], list] = {}  # key -> [per-bucket counts (last is +Inf), sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the with-block takes, in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry[2] if entry else 0
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        with self._lock:
+            values = sorted((key, ([*counts], total, count)) for key, (counts, total, count) in self._values.items())
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % (bound if bound == "+Inf" else f"{bound:g}")
+                yield f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, key)} {total:.6f}"
+            yield f"{self.name}_count{_format_labels(self.labels, key)} {count}"
+
+def render_metrics() -> str:
+    """Every metric in the Prometheus text exposition format"""
+    return "\n".join(line for metric in _registry for line in metric.render()) + "\n"
+
+# The application's metrics
+
+HTTP_REQUEST_SECONDS = Histogram("restaurant_http_request_seconds", "HTTP request duration by route template",
+                                 ["method", "route", "status"])
+STAGE_SECONDS = Histogram("restaurant_chat_stage_seconds", "Time spent in each chat pipeline stage", ["stage"])
+DB_SECONDS = Histogram("restaurant_db_seconds", "Database call duration on the DB pool by function", ["operation"])
+CACHE_LOOKUPS = Counter("restaurant_cache_lookups_total", "Cache lookups by cache and result", ["cache", "result"])
+LLM_CALLS = Counter("restaurant_llm_calls_total", "Upstream LLM attempts made by the gateway")
+LLM_ERRORS = Counter("restaurant_llm_errors_total", "LLM retries, failures, interrupted streams and calls turned away",
+                     ["kind"])
+BOOKINGS = Counter("restaurant_bookings_total", "Booking attempts by channel and result", ["channel", "result"])
+
+def _route_label(scope) -> str:
+    template = getattr(scope.get("route"), "path", None)
+    if template is None:
+        return "unmatched"
+    # Newer FastAPI reports routes of an included router without its prefix;
+    # take the prefix back from the leading segments of the concrete path
+    parts = scope["path"].rstrip("/").split("/")
+    extra = len(parts) - len(template.rstrip("/").split("/"))
+    return "/".join(parts[:extra + 1]) + template if extra > 0 else template
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request, until its last body chunk is sent.
+
+    Routes are labelled by their path template ("/api/bookings/{booking_id}"),
+    so the label set stays small; unmatched paths share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_and_record(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_record)
+        finally:
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, method=scope["method"],
+                                         route=_route_label(scope), status=status)
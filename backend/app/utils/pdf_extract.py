@@ -0,0 +1,108 @@
+import logging
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Sequence, Tuple
+
+# Processes extracting PDF text during knowledge base builds; 1 extracts in-process
+KB_EXTRACT_WORKERS = int(os.getenv("KB_EXTRACT_WORKERS", os.cpu_count() or 1))
+# Pages handed to a worker at a time, so one large PDF still spreads across workers
+KB_PAGES_PER_TASK = int(os.getenv("KB_PAGES_PER_TASK", 16))
+
+logger = logging.getLogger(__name__)
+
+# Builds run on a thread of the multi-threaded server, often after the
+# embedding model has loaded: forking there could copy held locks into the
+# workers, so they start from a clean interpreter instead
+_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+# Kept free of the AI imports: worker processes import this module to run extract_pages
+
+def count_pages(path: str) -> int:
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+def extract_pages(path: str, start: int, end: int) -> List[str]:
+    """Text of pages [start, end) of a PDF, skipping pages without any"""
+    import pdfplumber
+
+    texts = []
+    with pdfplumber.open(path, pages=range(start + 1, end + 1)) as pdf:
+        for page in pdf.pages:
+            text = page.extract_text()
+            if text:
+                texts.append(text)
+            page.close()  # Frees cached layout objects once the text is out
+    return texts
+
+def _page_ranges(paths: Sequence[str], pages_per_task: int) -> List[Tuple[str, int, int]]:
+    tasks = []
+    for path in paths:
+        try:
+            pages = count_pages(path)
+        except Exception as e:
+            logger.warning("Error processing %s: %s", os.path.basename(path), e)
+            continue
+        tasks.extend((path, start, min(start + pages_per_task, pages)) for start in range(0, pages, pages_per_task))
+    return tasks
+
+def iter_pdf_pages(paths: Sequence[str], workers: int = KB_EXTRACT_WORKERS,
+                   pages_per_task: int = KB_PAGES_PER_TASK) -> Iterator[Tuple[str, List[str]]]:
+    """Yield (path, page texts) for runs of pages, in document and page order.
+
+    Extraction runs on a process pool with at most two tasks per worker
+    queued ahead of the consumer, so the caller can embed one run while the
+    next ones are extracted without the whole corpus piling up in memory.
+    A run that fails to extract is reported and skipped. With one worker
+    the pages are extracted in this process instead.
+    """
+    if workers <= 1:
+        for path in paths:
+            yield from _extract_in_process(path, pages_per_task)
+        return
+
+    tasks = _page_ranges(paths, pages_per_task)
+    if not tasks:
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=_MP_CONTEXT) as pool:
+        remaining = iter(tasks)
+        pending = deque()
+        for path, start, end in remaining:
+            pending.append((path, pool.submit(extract_pages, path, start, end)))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            path, future = pending.popleft()
+            next_task = next(remaining, None)
+            if next_task:
+                pending.append((next_task[0], pool.submit(extract_pages, *next_task)))
+            try:
+                texts = future.result()
+            except Exception as e:
+                logger.warning("Error processing %s: %s", os.path.basename(path), e)
+                texts = []
+            yield path, texts
+
+def _extract_in_process(path: str, pages_per_task: int) -> Iterator[Tuple[str, List[str]]]:
+    """iter_pdf_pages for one PDF without worker processes, opening it only once"""
+    import pdfplumber
+
+    texts = []
+    try:
+        with pdfplumber.open(path) as pdf:
+            for page in pdf.pages:
+                text = page.extract_text()
+                if text:
+                    texts.append(text)
+                page.close()
+                if len(texts) >= pages_per_task:
+                    yield path, texts
+                    texts = []
+    except Exception as e:
+        logger.warning("Error processing %s: %s", os.path.basename(path), e)
+    if texts:
+        yield path, texts
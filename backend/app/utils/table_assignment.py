@@ -0,0 +1,56 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# (table_id, seats, combine_group); tables sharing a combine_group can be pushed together
+Table = Tuple[int, int, Optional[str]]
+
+def assign_tables(free_tables: Sequence[Table], party_size: int) -> Optional[List[int]]:
+    """Ids of the free tables to seat a party on, or None if it does not fit.
+
+    Best fit: the fewest empty seats, then the fewest tables. A party sits
+    at one table or at a combination of tables from one combine_group.
+    """
+    best: Optional[Tuple[int, int, List[int]]] = None  # (empty seats, table count, ids)
+    for table_id, seats, _ in free_tables:
+        if seats >= party_size and (best is None or (seats - party_size, 1) < best[:2]):
+            best = (seats - party_size, 1, [table_id])
+
+    for members in _combine_groups(free_tables).values():
+        combination = _best_combination(members, party_size)
+        if combination and (best is None or combination[:2] < best[:2]):
+            best = combination
+
+    return best[2] if best else None
+
+def largest_party(free_tables: Sequence[Table]) -> int:
+    """Largest party the free tables could seat"""
+    largest = max((seats for _, seats, _ in free_tables), default=0)
+    for members in _combine_groups(free_tables).values():
+        largest = max(largest, sum(seats for _, seats, _ in members))
+    return largest
+
+def _combine_groups(tables: Sequence[Table]) -> Dict[str, List[Table]]:
+    groups: Dict[str, List[Table]] = {}
+    for table in tables:
+        if table[2]:
+            groups.setdefault(table[2], []).append(table)
+    return groups
+
+def _best_combination(tables: Sequence[Table], party_size: int) -> Optional[Tuple[int, int, List[int]]]:
+    """Subset of tables with the fewest seats that still fits the party, as (empty seats, count, ids).
+
+    0/1 knapsack over seat totals. A best subset never reaches
+    party_size + the largest table (dropping any table would still fit),
+    so totals are capped there and each group costs O(tables x seats).
+    """
+    cap = party_size + max(seats for _, seats, _ in tables)
+    reachable: Dict[int, List[int]] = {0: []}  # seat total -> fewest tables reaching it
+    for table_id, seats, _ in tables:
+        for total, ids in list(reachable.items()):
+            new_total = total + seats
+            if new_total < cap and (new_total not in reachable or len(ids) + 1 < len(reachable[new_total])):
+                reachable[new_total] = ids + [table_id]
+    fits = [total for total in reachable if total >= party_size]
+    if not fits:
+        return None
+    total = min(fits, key=lambda t: (t, len(reachable[t])))
+    return total - party_size, len(reachable[total]), reachable[total]
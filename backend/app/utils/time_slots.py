@@ -0,0 +1,88 @@
+import re
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Tuple
+
+MINUTES_PER_DAY = 24 * 60
+
+# "7 PM", "7:15pm", "7:15 p.m.", "19:15"
+TIME_PATTERN = re.compile(r'^\s*(\d{1,2})(?::(\d{2}))?\s*(?:([ap])\.?\s*m\.?)?\s*$', re.IGNORECASE)
+
+def parse_time(value: str) -> int:
+    """Minutes since midnight for a clock time; raises ValueError if it is not one"""
+    match = TIME_PATTERN.match(value or "")
+    if not match:
+        raise ValueError(f"Invalid time: {value!r}")
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    meridiem = (match.group(3) or "").lower()
+    if minute > 59 or (meridiem and not 1 <= hour <= 12) or hour > 23:
+        raise ValueError(f"Invalid time: {value!r}")
+    if meridiem:
+        hour = hour % 12 + (12 if meridiem == "p" else 0)
+    return hour * 60 + minute
+
+def format_time(minutes: int) -> str:
+    """Display form used for stored bookings, e.g. 1140 -> "7:00 PM" """
+    hour, minute = divmod(minutes % MINUTES_PER_DAY, 60)
+    return f"{hour % 12 or 12}:{minute:02d} {'PM' if hour >= 12 else 'AM'}"
+
+def normalize_time(value: str) -> str:
+    """Canonical spelling of a clock time, so "7 PM" and "7:00 pm" are the same slot"""
+    return format_time(parse_time(value))
+
+def min_free_seats(bookings: Iterable[Tuple[int, int, int]], overrides: Iterable[Tuple[int, int, int]],
+                   start: int, end: int, capacity: int) -> int:
+    """Fewest seats free at any minute in [start, end).
+
+    bookings are (start, end, guests) and overrides (start, end, capacity)
+    intervals on the same day; the lowest override covering a minute
+    lowers the default capacity (overrides can only remove seats, one above
+    capacity has no effect). Sweeps the interval boundaries in order,
+    so a day with k bookings costs O(k log k).
+    """
+    overrides = [override for override in overrides if override[0] < end and override[1] > start]
+    delta = {start: 0}
+    for booking_start, booking_end, guests in bookings:
+        if booking_start < end and booking_end > start:
+            delta[max(booking_start, start)] = delta.get(max(booking_start, start), 0) + guests
+            if booking_end < end:
+                delta[booking_end] = delta.get(booking_end, 0) - guests
+    for override_start, override_end, _ in overrides:
+        for point in (override_start, override_end):
+            if start < point < end:
+                delta.setdefault(point, 0)
+
+    occupied = 0
+    free = None
+    for point in sorted(delta):
+        occupied += delta[point]
+        limit = min(capacity, min((c for s, e, c in overrides if s <= point < e), default=capacity))
+        free = limit - occupied if free is None else min(free, limit - occupied)
+    return free
+
+def free_seat_profile(bookings: Iterable[Tuple[int, int, int]], overrides: Iterable[Tuple[int, int, int]],
+                      capacity: int) -> Tuple[List[int], List[int]]:
+    """Seats free over a whole day as a step function (points, free).
+
+    free[i] holds on [points[i], points[i + 1]); build it once per day and
+    answer many windows with profile_min_free.
+    """
+    overrides = list(overrides)
+    delta = {0: 0}
+    for booking_start, booking_end, guests in bookings:
+        delta[booking_start] = delta.get(booking_start, 0) + guests
+        delta[booking_end] = delta.get(booking_end, 0) - guests
+    for override_start, override_end, _ in overrides:
+        delta.setdefault(override_start, 0)
+        delta.setdefault(override_end, 0)
+
+    points, free = sorted(delta), []
+    occupied = 0
+    for point in points:
+        occupied += delta[point]
+        free.append(min(capacity, min((c for s, e, c in overrides if s <= point < e), default=capacity)) - occupied)
+    return points, free
+
+def profile_min_free(profile: Tuple[List[int], List[int]], start: int, end: int) -> int:
+    """Fewest seats free at any minute in [start, end) according to a free_seat_profile"""
+    points, free = profile
+    return min(free[bisect_right(points, start) - 1:bisect_left(points, end)])
@@ -0,0 +1,69 @@
+"""Dashboard query latency: aggregating raw bookings versus the analytics rollups.
+
+Run from the backend directory:
+    python -m benchmarks.bench_analytics [--rows 10000 100000 500000] [--rounds 20]
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from app.db import database
+from app.services import analytics
+
+TIMES = ["5:00 PM", "5:30 PM", "6:00 PM", "6:30 PM", "7:00 PM", "7:30 PM", "8:00 PM", "8:30 PM", "9:00 PM"]
+
+
+def raw_month_covers():
+    """What a dashboard had to do before: scan and group the bookings themselves"""
+    with database.transaction() as cursor:
+        cursor.execute('SELECT date, COUNT(*), SUM(guests) FROM reservations '
+                       'WHERE date BETWEEN ? AND ? GROUP BY date', ("2026-03-01", "2026-03-31"))
+        cursor.execute('SELECT guests, COUNT(*) FROM reservations GROUP BY guests')
+        return cursor.fetchall()
+
+
+def rollup_month_covers():
+    analytics.refresh_rollups()
+    analytics.get_daily_covers("2026-03-01", "2026-03-31")
+    return analytics.get_party_size_histogram()
+
+
+def median_ms(func, rounds):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 500000])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            database.DB_FILE = os.path.join(tmp, "bench.db")
+            database.init_db()
+            with database.transaction() as cursor:
+                cursor.executemany(
+                    'INSERT INTO reservations (date, time, guests, name, email) VALUES (?, ?, ?, ?, ?)',
+                    (((date(2025, 1, 1) + timedelta(days=i % 730)).isoformat(), TIMES[i % len(TIMES)],
+                      i % 8 + 1, "Bench", "bench@example.com") for i in range(rows))
+                )
+            start = time.perf_counter()
+            analytics.refresh_rollups()
+            initial = (time.perf_counter() - start) * 1000
+            print(f"{rows:>7} rows  initial refresh {initial:8.1f} ms  "
+                  f"raw scan {median_ms(raw_month_covers, args.rounds):7.2f} ms  "
+                  f"rollups {median_ms(rollup_month_covers, args.rounds):6.2f} ms")
+            database.close_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Peak memory of listing every booking at once versus the paged export.
+
+Run from the backend directory:
+    python -m benchmarks.bench_bookings_export [--rows 20000 100000]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from app.db import database
+
+
+def full_list():
+    """The original GET /bookings/: every row as a dict, then serialized in one go"""
+    return len(json.dumps(database.get_bookings()))
+
+
+def paged_export():
+    return sum(len("".join(json.dumps(b) + "\n" for b in page)) for page in database.iter_bookings())
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[20000, 100000])
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            database.DB_FILE = os.path.join(tmp, "bench.db")
+            database.init_db()
+            with database.transaction() as cursor:
+                cursor.executemany(
+                    'INSERT INTO reservations (date, time, guests, name, email, phone, special_requests) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    ((f"2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}", "7:00 PM", 2, f"Guest {i}",
+                      f"guest{i}@example.com", "555-0100", "") for i in range(rows))
+                )
+            for label, func in (("full list", full_list), ("paged export", paged_export)):
+                peak_mb, elapsed = measure(func)
+                print(f"{rows:>7} rows  {label:<13} peak {peak_mb:7.1f} MB  {elapsed * 1000:8.1f} ms")
+            database.close_connections()
+
+
+if __name__ == "__main__":
+    main()
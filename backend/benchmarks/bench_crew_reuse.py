@@ -0,0 +1,47 @@
+"""Per-message overhead of building Agent/Task/Crew versus reusing the prebuilt crew.
+
+Only object construction is timed; no LLM call is made. Run from the
+backend directory (needs the AI requirements installed):
+    python -m benchmarks.bench_crew_reuse [--iterations 200]
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark-placeholder")  # ai_service refuses to import without one
+
+from crewai import Crew, Process
+
+from app.services import ai_service
+
+
+def rebuild(question):
+    """What process_inquiry used to do for every message"""
+    agent = ai_service.create_inquiry_agent()
+    task = ai_service.create_inquiry_task(agent, question, "context")
+    return Crew(agents=[agent], tasks=[task], verbose=ai_service.CREW_VERBOSE, process=Process.sequential)
+
+
+def reuse(question):
+    return ai_service.get_inquiry_crew()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    results = {}
+    for label, build in (("rebuild per message", rebuild), ("prebuilt crew", reuse)):
+        start = time.perf_counter()
+        for i in range(args.iterations):
+            build(f"Do you have vegan options? #{i}")
+        results[label] = (time.perf_counter() - start) / args.iterations
+        print(f"{label:<20} {results[label] * 1e6:10.1f} us/message")
+
+    saved = results["rebuild per message"] - results["prebuilt crew"]
+    print(f"overhead removed     {saved * 1e6:10.1f} us/message")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Bookings/sec with connect-per-call SQLite versus the pooled WAL connections.
+
+Run from the backend directory:
+    python -m benchmarks.bench_db_pool [--bookings 2000] [--threads 8]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.db import database
+
+
+def legacy_add_booking(date, time_slot, guests):
+    """The original add_booking: open, insert, commit, close"""
+    conn = sqlite3.connect(database.DB_FILE)
+    cursor = conn.cursor()
+    cursor.execute(
+        'INSERT INTO reservations (date, time, guests, name, email, phone, special_requests) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        (date, time_slot, guests, 'Bench', '', '', '')
+    )
+    conn.commit()
+    conn.close()
+
+
+def pooled_add_booking(date, time_slot, guests):
+    database.add_booking(date=date, time=time_slot, guests=guests, name='Bench')
+
+
+def run(label, add, bookings, threads, journal_mode="WAL"):
+    """Time `bookings` inserts spread over `threads` workers on a fresh database"""
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_FILE = os.path.join(tmp, "bench.db")
+        database.init_db()
+        database.close_connections()
+        conn = sqlite3.connect(database.DB_FILE)
+        conn.execute(f"PRAGMA journal_mode={journal_mode}")  # Journal mode persists in the file
+        conn.close()
+        errors = 0
+
+        def worker(i):
+            nonlocal errors
+            try:
+                add(f"2025-01-{i % 28 + 1:02d}", "7:00 PM", 2)
+            except sqlite3.OperationalError:
+                errors += 1  # "database is locked"
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(worker, range(bookings)))
+        elapsed = time.perf_counter() - start
+        database.close_connections()
+
+    print(f"{label:<24} {bookings / elapsed:>10.0f} bookings/sec  ({errors} lock errors)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    for threads in (1, args.threads):
+        print(f"--- {args.bookings} bookings, {threads} thread(s) ---")
+        run("before (connect/close)", legacy_add_booking, args.bookings, threads, journal_mode="DELETE")
+        run("after (pooled WAL)", pooled_add_booking, args.bookings, threads)
+
+
+if __name__ == "__main__":
+    main()
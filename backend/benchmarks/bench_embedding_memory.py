@@ -0,0 +1,46 @@
+"""Resident memory of two embedding-model instances versus the shared singleton.
+
+Run from the backend directory (needs the AI requirements installed):
+    python -m benchmarks.bench_embedding_memory
+
+Each mode runs in a fresh interpreter so the measurements do not overlap.
+"""
+import subprocess
+import sys
+
+MODES = {
+    # What ai_service and config.get_embeddings used to do: two separate instances
+    "separate": (
+        "from langchain_community.embeddings import HuggingFaceEmbeddings\n"
+        "from app.utils.config import EMBEDDING_MODEL\n"
+        "a = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)\n"
+        "b = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)\n"
+    ),
+    "shared": (
+        "from app.services.knowledge_base import get_embeddings\n"
+        "a = get_embeddings()\n"
+        "b = get_embeddings()\n"
+        "assert a is b\n"
+    ),
+}
+
+REPORT = (
+    "import resource\n"
+    "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024)\n"  # KB -> MB on Linux
+)
+
+
+def peak_rss_mb(code):
+    result = subprocess.run([sys.executable, "-c", code + REPORT], capture_output=True, text=True, check=True)
+    return int(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    results = {mode: peak_rss_mb(code) for mode, code in MODES.items()}
+    for mode, rss in results.items():
+        print(f"{mode:<9} peak RSS {rss:>6} MB")
+    print(f"saving   {results['separate'] - results['shared']:>6} MB per worker")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Group booking latency: per-date check/insert loop versus reserve_group_bookings.
+
+Run from the backend directory:
+    python -m benchmarks.bench_group_booking [--dates 60] [--rounds 20]
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from app.db import database
+
+
+def per_date_loop(dates):
+    """The original /bookings/group/ flow: a check and an insert per date"""
+    for day in dates:
+        is_available, _ = database.check_availability(day, "7:00 PM", 2)
+        if is_available:
+            database.add_booking(date=day, time="7:00 PM", guests=2, name="Bench")
+
+
+def bulk(dates):
+    database.reserve_group_bookings(dates, "7:00 PM", 2, name="Bench")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dates", type=int, default=60)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    for label, book in (("per-date loop", per_date_loop), ("bulk transaction", bulk)):
+        with tempfile.TemporaryDirectory() as tmp:
+            database.DB_FILE = os.path.join(tmp, "bench.db")
+            database.init_db()
+            timings = []
+            for round_no in range(args.rounds):
+                first = date(2026, 1, 1) + timedelta(days=round_no * args.dates)
+                dates = [(first + timedelta(days=i)).isoformat() for i in range(args.dates)]
+                start = time.perf_counter()
+                book(dates)
+                timings.append(time.perf_counter() - start)
+            database.close_connections()
+
+        timings.sort()
+        print(f"{label:<18} {args.dates} dates: median {timings[len(timings) // 2] * 1000:7.2f} ms, "
+              f"worst {timings[-1] * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
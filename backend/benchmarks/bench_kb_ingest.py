@@ -0,0 +1,146 @@
+"""Knowledge base build throughput and memory: serial extraction versus the streaming pipeline.
+
+Writes a synthetic corpus of text PDFs, then builds the index in a fresh
+interpreter per mode and reports pages/sec and peak RSS:
+  serial    the previous build: every PDF extracted in turn, its pages joined,
+            split, and all chunks embedded in one call
+  pipeline  initialize_knowledge_base: process-pool extraction, streaming
+            splitter and batched embedding
+
+Run from the backend directory (needs the AI requirements installed):
+    python -m benchmarks.bench_kb_ingest [--pages 500] [--files 5] [--embeddings fake|model]
+
+--embeddings fake (the default) swaps the model for random vectors so the
+numbers show extraction and memory rather than model speed.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+WORDS = ("tandoori paneer biryani masala naan curry saffron cardamom lentil chutney korma vindaloo "
+         "reservation table dinner lunch private dining vegetarian vegan halal spice mild hot chef "
+         "seasonal menu dessert kulfi lassi mango chai evening weekend group celebration").split()
+LINES_PER_PAGE = 45
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path, pages, rng):
+    """Write a minimal multi-page PDF of Helvetica text lines (no PDF library needed)"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for _ in range(pages):
+        lines = [" ".join(rng.choice(WORDS) for _ in range(12)) + "." for _ in range(LINES_PER_PAGE)]
+        stream = "BT /F1 9 Tf 40 770 Td 16 TL " + " ".join(f"({_escape(line)}) Tj T*" for line in lines) + " ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream.encode()))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects)))
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (" ".join(f"{k} 0 R" for k in kids).encode(), pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def write_corpus(directory, pages, files):
+    rng = random.Random(0)
+    for i in range(files):
+        share = pages // files + (1 if i < pages % files else 0)
+        write_pdf(os.path.join(directory, f"doc_{i:02d}.pdf"), share, rng)
+
+
+def _embeddings(kind):
+    if kind == "fake":
+        from langchain_community.embeddings import FakeEmbeddings
+        return FakeEmbeddings(size=384)
+    from app.services.knowledge_base import get_embeddings
+    return get_embeddings()
+
+
+def build_serial(corpus, embeddings):
+    import pdfplumber
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from langchain_community.vectorstores import FAISS
+    from app.utils.config import CHUNK_OVERLAP, CHUNK_SIZE
+
+    texts = []
+    for pdf_file in sorted(os.listdir(corpus)):
+        with pdfplumber.open(os.path.join(corpus, pdf_file)) as pdf:
+            pages = [page.extract_text() for page in pdf.pages]
+        splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+        texts.extend(splitter.split_text("\n".join(text for text in pages if text)))
+    return FAISS.from_texts(texts, embeddings).index.ntotal
+
+
+def build_pipeline(corpus, embeddings):
+    from app.services import knowledge_base
+
+    knowledge_base._embeddings = embeddings
+    vector_store, message = knowledge_base.initialize_knowledge_base(corpus, force_rebuild=True)
+    if vector_store is None:
+        raise SystemExit(message)
+    return vector_store.index.ntotal
+
+
+def run_mode(mode, corpus, kind):
+    """Build once in this interpreter and print the measurements as JSON"""
+    embeddings = _embeddings(kind)
+    start = time.perf_counter()
+    chunks = (build_serial if mode == "serial" else build_pipeline)(corpus, embeddings)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "seconds": elapsed,
+        "chunks": chunks,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024,  # KB -> MB on Linux
+        "worker_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--files", type=int, default=5)
+    parser.add_argument("--embeddings", choices=("fake", "model"), default="fake")
+    parser.add_argument("--run", choices=("serial", "pipeline"), help=argparse.SUPPRESS)
+    parser.add_argument("--corpus", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        return run_mode(args.run, args.corpus, args.embeddings)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        corpus = os.path.join(workdir, "docs")
+        os.makedirs(corpus)
+        write_corpus(corpus, args.pages, args.files)
+        env = {**os.environ, "FAISS_INDEX_PATH": os.path.join(workdir, "faiss_index")}
+        for mode in ("serial", "pipeline"):
+            result = subprocess.run([sys.executable, "-m", "benchmarks.bench_kb_ingest", "--run", mode,
+                                     "--corpus", corpus, "--embeddings", args.embeddings],
+                                    capture_output=True, text=True, env=env)
+            if result.returncode:
+                raise SystemExit(result.stderr)
+            stats = json.loads(result.stdout.strip().splitlines()[-1])
+            print(f"{mode:<9} {args.pages / stats['seconds']:7.1f} pages/s  {stats['seconds']:6.2f}s  "
+                  f"{stats['chunks']:5} chunks  peak RSS {stats['rss_mb']:5} MB  "
+                  f"largest worker {stats['worker_rss_mb']:4} MB")
+
+
+if __name__ == "__main__":
+    main()
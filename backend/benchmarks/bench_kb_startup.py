@@ -0,0 +1,35 @@
+"""Knowledge base startup time: full rebuild versus loading the persisted index.
+
+Run from the backend directory (needs the AI requirements installed):
+    python -m benchmarks.bench_kb_startup [--runs 3]
+"""
+import argparse
+
+from app.services.knowledge_base import initialize_knowledge_base, knowledge_base_stats
+
+
+def timed(force_rebuild):
+    vector_store, message = initialize_knowledge_base(force_rebuild=force_rebuild)
+    if not vector_store:
+        raise SystemExit(message)
+    return knowledge_base_stats["seconds"], knowledge_base_stats["source"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    builds = [timed(force_rebuild=True)[0] for _ in range(args.runs)]
+    loads = []
+    for _ in range(args.runs):
+        seconds, source = timed(force_rebuild=False)
+        assert source == "loaded", "persisted index was not reused"
+        loads.append(seconds)
+
+    build, load = min(builds), min(loads)
+    print(f"rebuild: {build:.2f}s  load: {load:.2f}s  speedup: {build / load:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
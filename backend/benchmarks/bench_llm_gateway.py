@@ -0,0 +1,67 @@
+"""LLM gateway behaviour against the local mock Groq server.
+
+Fires concurrent chat and streaming calls through app/services/llm_gateway.py
+in three scenarios: a healthy upstream, a flaky one (a share of 503s) and
+an outage, where the circuit breaker should turn calls away immediately.
+
+Run from the backend directory:
+    python -m benchmarks.bench_llm_gateway [--calls 200] [--concurrency 32]
+"""
+import argparse
+import asyncio
+import time
+
+from app.services.llm_gateway import CircuitBreaker, LLMGateway, LLMUnavailable
+from benchmarks.mock_groq_server import start_mock_server
+
+MESSAGES = [("system", "You are a restaurant assistant."), ("human", "What cuisine do you serve?")]
+SCENARIOS = {
+    "healthy": dict(fail_rate=0.0),
+    "flaky (25% 503)": dict(fail_rate=0.25),
+    "outage (100% 503)": dict(fail_rate=1.0),
+}
+
+
+async def one_call(gateway, stream):
+    start = time.perf_counter()
+    try:
+        if stream:
+            answer = "".join([token async for token in gateway.stream_chat(MESSAGES, "mock")])
+        else:
+            answer = await gateway.chat(MESSAGES, "mock")
+        ok = bool(answer)
+    except LLMUnavailable:
+        ok = False
+    return ok, time.perf_counter() - start
+
+
+async def run_scenario(url, calls, concurrency, stream):
+    gateway = LLMGateway(base_url=url, api_key="mock", timeout=5, max_concurrency=concurrency,
+                         retry_base_delay=0.05, breaker=CircuitBreaker(threshold=5, reset_timeout=1))
+    try:
+        results = await asyncio.gather(*(one_call(gateway, stream) for _ in range(calls)))
+    finally:
+        await gateway.aclose()
+    latencies = sorted(elapsed for _, elapsed in results)
+    return sum(ok for ok, _ in results), latencies, gateway.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    for name, options in SCENARIOS.items():
+        for stream in (False, True):
+            server, url = start_mock_server(latency=0.05, **options)
+            ok, latencies, stats = asyncio.run(run_scenario(url, args.calls, args.concurrency, stream))
+            server.shutdown()
+            p50, p95 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)]
+            print(f"{name:<18} {'stream' if stream else 'chat':<6} {ok:4}/{args.calls} answered  "
+                  f"p50 {p50 * 1000:7.1f} ms  p95 {p95 * 1000:7.1f} ms  upstream requests {server.requests:4}  "
+                  f"retries {stats['retries']:3}  rejected {stats['rejected']:3}  circuit {stats['circuit']}")
+
+
+if __name__ == "__main__":
+    main()
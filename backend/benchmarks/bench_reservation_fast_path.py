@@ -0,0 +1,62 @@
+"""Chat reservation throughput: template fast path versus the agent path.
+
+The agent path's LLM round trip is simulated with --llm-latency so the
+benchmark runs offline. Run from the backend directory (needs the AI
+requirements installed):
+    python -m benchmarks.bench_reservation_fast_path [--requests 200] [--llm-latency 1.5]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark-placeholder")  # ai_service refuses to import without one
+
+from app.db import database
+from app.services import ai_service
+
+
+class SimulatedCrew:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def kickoff(self, inputs=None):
+        time.sleep(self.latency)
+        return "Your table is reserved. We look forward to seeing you."
+
+
+def run(label, prompts, fast_path):
+    ai_service.RESERVATION_FAST_PATH = fast_path
+    start = time.perf_counter()
+    for prompt in prompts:
+        ai_service.process_reservation_request(prompt)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {len(prompts) / elapsed:10.1f} reservations/sec  ({elapsed / len(prompts) * 1000:.2f} ms each)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--llm-latency", type=float, default=1.5, help="Simulated seconds per agent call")
+    args = parser.parse_args()
+
+    crew = SimulatedCrew(args.llm_latency)
+    ai_service.get_reservation_crew = lambda: crew
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_FILE = os.path.join(tmp, "bench.db")
+        database.init_db()
+        prompts = [f"Book a table for 2 people on 2026-03-{i % 28 + 1:02d} at {i % 5 + 5}:30 PM"
+                   for i in range(args.requests)]
+        assert all(ai_service.parse_reservation_request(p)["fully_parsed"] for p in prompts)
+
+        run("fast path", prompts, fast_path=True)
+        # The agent path is slow by construction, so a handful of requests is enough
+        run("agent path", prompts[:max(1, min(5, args.requests))], fast_path=False)
+        database.close_connections()
+
+    print(ai_service.get_reservation_path_stats())
+
+
+if __name__ == "__main__":
+    main()
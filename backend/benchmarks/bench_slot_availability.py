@@ -0,0 +1,60 @@
+"""Latency of interval-based availability as bookings per day grow.
+
+Run from the backend directory:
+    python -m benchmarks.bench_slot_availability [--per-day 20 100 400] [--rounds 50]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from app.db import database
+from app.utils.config import get_time_slots
+
+
+def median_ms(func, rounds):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--per-day", type=int, nargs="+", default=[20, 100, 400])
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    random.seed(0)
+    slots = get_time_slots()
+    for per_day in args.per_day:
+        with tempfile.TemporaryDirectory() as tmp:
+            database.DB_FILE = os.path.join(tmp, "bench.db")
+            database.init_db()
+            # 60 days of bookings at random quarter hours through the evening
+            rows = []
+            for day in range(60):
+                booking_date = (date(2026, 3, 1) + timedelta(days=day)).isoformat()
+                for _ in range(per_day):
+                    start = 17 * 60 + random.randrange(0, 17) * 15
+                    rows.append((booking_date, database.format_time(start), random.randint(1, 6), start,
+                                 database.DINING_DURATION))
+            with database.transaction() as cursor:
+                cursor.executemany('INSERT INTO reservations (date, time, guests, start_minute, duration) '
+                                   'VALUES (?, ?, ?, ?, ?)', rows)
+            database.add_capacity_override("2026-03-15", 30, "6:00 PM", "8:00 PM")
+
+            single = median_ms(lambda: database.check_availability("2026-03-15", "7:15 PM", 4), args.rounds)
+            month = median_ms(lambda: database.get_slot_availability("2026-03-01", "2026-03-31", slots), args.rounds)
+            print(f"{per_day:>4} bookings/day  check_availability {single:6.3f} ms  "
+                  f"31 days x {len(slots)} slots {month:7.2f} ms")
+            database.close_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Process startup: import time of main.py and time to the first /availability/ answer.
+
+Each run uses a fresh interpreter. Prints the slowest imports from
+`python -X importtime` and fails if importing main pulled in the AI stack
+(CrewAI, LangChain, sentence-transformers, torch, FAISS, pdfplumber), which
+should only load in the background warm-up or on the first chat.
+
+Run from the backend directory:
+    python -m benchmarks.bench_startup [--runs 3] [--top 15] [--budget-ms 0]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+AI_MODULES = ("crewai", "langchain", "langchain_core", "langchain_community", "langchain_groq",
+              "sentence_transformers", "transformers", "torch", "faiss", "pdfplumber")
+
+FIRST_REQUEST = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import main\n"
+    "imported = time.perf_counter()\n"
+    "from fastapi.testclient import TestClient\n"
+    "with TestClient(main.app) as client:\n"
+    "    response = client.post('/api/availability/', json={'date': '2030-01-01', 'time': '7:00 PM', 'guests': 2})\n"
+    "    assert response.status_code == 200, response.text\n"
+    "    answered = time.perf_counter()\n"
+    "print(json.dumps({'import': imported - start, 'first_response': answered - start,\n"
+    "                  'ai_modules': [m for m in %r if m in sys.modules]}))\n" % (AI_MODULES,)
+)
+
+
+def importtime_report(env):
+    """(module, self us, cumulative us) for every import made by `import main`"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                            capture_output=True, text=True, env=env, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(own), int(cumulative)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list (by self time)")
+    parser.add_argument("--budget-ms", type=float, default=0, help="Fail if importing main takes longer (0: no limit)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # No background warm-up: it would load the AI stack while we measure
+        env = {**os.environ, "AI_WARMUP": "false", "DB_FILE": os.path.join(workdir, "bench.db")}
+        runs = []
+        for _ in range(args.runs):
+            result = subprocess.run([sys.executable, "-c", FIRST_REQUEST], capture_output=True, text=True, env=env)
+            if result.returncode:
+                raise SystemExit(result.stderr)
+            runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+        rows = importtime_report(env)
+
+    best = min(runs, key=lambda run: run["import"])
+    print(f"import main            {best['import'] * 1000:8.1f} ms (best of {args.runs})")
+    print(f"first /availability/   {best['first_response'] * 1000:8.1f} ms after interpreter start")
+    print(f"\nslowest imports (self time, then cumulative):")
+    for name, own, cumulative in sorted(rows, key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"  {own / 1000:7.1f} ms {cumulative / 1000:8.1f} ms  {name}")
+
+    failures = []
+    if best["ai_modules"]:
+        failures.append(f"importing main loaded the AI stack: {', '.join(best['ai_modules'])}")
+    if args.budget_ms and best["import"] * 1000 > args.budget_ms:
+        failures.append(f"import main took {best['import'] * 1000:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+    if failures:
+        raise SystemExit("\n".join(failures))
+    print("\nAI stack not loaded at import: ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Table assignment inside reserve_booking over realistic nightly loads.
+
+Compares the best-fit solver (app/utils/table_assignment.py) with a naive
+first-free-table policy that never combines tables.
+
+Run from the backend directory:
+    python -m benchmarks.bench_table_assignment [--nights 10] [--requests 250]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from app.db import database
+from app.utils import table_assignment
+
+# A 108-seat dining room: window two-tops, two banks of pushable four-tops, booths and large rounds
+INVENTORY = ([(f"W{i}", 2, "window") for i in range(1, 11)]
+             + [(f"A{i}", 4, "bank-a") for i in range(1, 7)]
+             + [(f"B{i}", 4, "bank-b") for i in range(1, 7)]
+             + [(f"S{i}", 6, None) for i in range(1, 5)]
+             + [(f"R{i}", 8, None) for i in range(1, 3)])
+PARTY_SIZES = {1: 5, 2: 40, 3: 12, 4: 22, 5: 7, 6: 7, 7: 3, 8: 3, 10: 1}
+
+
+def first_free_table(free_tables, party_size):
+    """Baseline: the first free table big enough in inventory order, no combining"""
+    for table_id, seats, _ in sorted(free_tables):
+        if seats >= party_size:
+            return [table_id]
+    return None
+
+
+def run_nights(label, nights, requests):
+    timings, accepted, guests_seated = [], 0, 0
+    random.seed(42)
+    for night in range(nights):
+        booking_date = f"2026-07-{night + 1:02d}"
+        for _ in range(requests):
+            party = random.choices(list(PARTY_SIZES), weights=list(PARTY_SIZES.values()))[0]
+            slot = database.format_time(17 * 60 + random.randrange(0, 19) * 15)
+            start = time.perf_counter()
+            booking_id, _ = database.reserve_booking(booking_date, slot, party, name="Bench")
+            timings.append(time.perf_counter() - start)
+            if booking_id != -1:
+                accepted += 1
+                guests_seated += party
+    timings.sort()
+    total = nights * requests
+    print(f"{label:<18} accepted {accepted:5}/{total} parties, {guests_seated / nights:6.1f} covers/night, "
+          f"p50 {timings[total // 2] * 1000:.3f} ms, p99 {timings[int(total * 0.99)] * 1000:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nights", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=250, help="Booking requests per night")
+    args = parser.parse_args()
+
+    # Let the tables, not the headcount limit, decide what fits
+    database.MAX_CAPACITY = sum(seats for _, seats, _ in INVENTORY)
+    solver = database.assign_tables
+    for label, assign in (("best-fit solver", solver), ("first free table", first_free_table)):
+        database.assign_tables = assign
+        # The baseline cannot combine, so it only reports what one table seats
+        database.largest_party = (table_assignment.largest_party if assign is solver
+                                  else lambda free: max((seats for _, seats, _ in free), default=0))
+        with tempfile.TemporaryDirectory() as tmp:
+            database.DB_FILE = os.path.join(tmp, "bench.db")
+            database.init_db()
+            for name, seats, group in INVENTORY:
+                database.add_table(name, seats, group)
+            run_nights(label, args.nights, args.requests)
+            database.close_connections()
+    database.assign_tables, database.largest_party = solver, table_assignment.largest_party
+
+
+if __name__ == "__main__":
+    main()
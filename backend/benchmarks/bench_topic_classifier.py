@@ -0,0 +1,54 @@
+"""Accuracy and per-call cost of is_restaurant_topic on a labelled query set.
+
+Run from the backend directory:
+    python -m benchmarks.bench_topic_classifier [--iterations 2000] [--embedding]
+
+--embedding also scores the embedding classifier (needs the AI requirements).
+"""
+import argparse
+import csv
+import os
+import time
+
+from app.services import topic_classifier
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), "data", "topic_queries.csv")
+
+
+def load_labelled_queries():
+    with open(DATA_FILE, newline="") as f:
+        return [(row["query"], row["label"] == "restaurant") for row in csv.DictReader(f)]
+
+
+def evaluate(label, classify, queries, iterations):
+    """Print accuracy on the labelled set and mean microseconds per call"""
+    predictions = [classify(query)[0] for query, _ in queries]
+    start = time.perf_counter()
+    for i in range(iterations):
+        classify(queries[i % len(queries)][0])
+    per_call = (time.perf_counter() - start) / iterations
+
+    correct = sum(p == expected for p, (_, expected) in zip(predictions, queries))
+    false_rejects = sum(expected and not p for p, (_, expected) in zip(predictions, queries))
+    false_accepts = sum(p and not expected for p, (_, expected) in zip(predictions, queries))
+    print(f"{label:<11} accuracy {correct}/{len(queries)} ({correct / len(queries):.0%}), "
+          f"false rejects {false_rejects}, false accepts {false_accepts}, {per_call * 1e6:8.2f} us/call")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--embedding", action="store_true")
+    args = parser.parse_args()
+
+    queries = load_labelled_queries()
+    topic_classifier.TOPIC_CLASSIFIER = "keywords"
+    evaluate("keywords", topic_classifier.is_restaurant_topic, queries, args.iterations)
+
+    if args.embedding:
+        topic_classifier.TOPIC_CLASSIFIER = "embedding"
+        evaluate("embedding", topic_classifier.is_restaurant_topic, queries, min(args.iterations, 200))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Retrieval recall versus latency for the FAISS index types in app/utils/config.py.
+
+Builds each index type with knowledge_base.build_search_index over the same
+synthetic, clustered embeddings and searches it one query at a time, as a
+chat request does. Recall@k is measured against the exact (flat) results.
+
+Run from the backend directory (needs faiss-cpu):
+    python -m benchmarks.bench_vector_index [--vectors 50000] [--queries 500] [--k 3]
+
+Pick FAISS_INDEX_TYPE / FAISS_QUANTIZATION and the search knob (FAISS_NPROBE
+for IVF, FAISS_EF_SEARCH for HNSW) from the cheapest row whose recall is
+acceptable.
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from app.services.knowledge_base import build_search_index, faiss_index_spec, tune_search_index
+
+DIM = 384  # all-MiniLM-L6-v2
+# (index_type, quantization, search settings to sweep)
+CONFIGS = [
+    ("flat", "none", [{}]),
+    ("ivf", "none", [{"nprobe": n} for n in (1, 4, 8, 32)]),
+    ("ivf", "sq8", [{"nprobe": 8}, {"nprobe": 32}]),
+    ("ivf", "pq", [{"nprobe": 8}, {"nprobe": 32}]),
+    ("hnsw", "none", [{"ef_search": ef} for ef in (16, 64, 256)]),
+    ("hnsw", "sq8", [{"ef_search": 64}, {"ef_search": 256}]),
+    ("flat", "sq8", [{}]),
+]
+
+
+def synthetic_embeddings(count, queries, seed=0):
+    """Unit vectors scattered around topic centres, like chunks of related documents"""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(max(count // 100, 1), DIM)).astype(np.float32)
+    points = centres[rng.integers(len(centres), size=count + queries)]
+    points += rng.normal(scale=0.6, size=points.shape).astype(np.float32)
+    points /= np.linalg.norm(points, axis=1, keepdims=True)
+    return points[:count], points[count:]
+
+
+def index_bytes(index):
+    import faiss
+    return faiss.serialize_index(index).nbytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    vectors, queries = synthetic_embeddings(args.vectors, args.queries)
+    exact = build_search_index(vectors, "flat", "none")
+    truth = [set(exact.search(q[None], args.k)[1][0]) for q in queries]
+
+    print(f"{args.vectors} vectors, {args.queries} queries, recall@{args.k}")
+    for index_type, quantization, sweeps in CONFIGS:
+        start = time.perf_counter()
+        index = build_search_index(vectors, index_type, quantization)
+        build = time.perf_counter() - start
+        spec = faiss_index_spec(args.vectors, DIM, index_type, quantization)
+        for settings in sweeps:
+            tune_search_index(index, **settings)
+            latencies, hits = [], 0
+            for query, expected in zip(queries, truth):
+                start = time.perf_counter()
+                _, ids = index.search(query[None], args.k)
+                latencies.append(time.perf_counter() - start)
+                hits += len(expected & set(ids[0]))
+            latencies.sort()
+            knob = ", ".join(f"{name}={value}" for name, value in settings.items()) or "-"
+            print(f"{spec:<16} {knob:<14} recall {hits / (args.k * len(queries)):.3f}  "
+                  f"p50 {statistics.median(latencies) * 1000:6.3f} ms  "
+                  f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:6.3f} ms  "
+                  f"build {build:6.2f}s  size {index_bytes(index) / 2**20:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""Load test the booking and chat APIs offline and record the results per git commit.
+
+Starts the mock Groq server and the API (uvicorn, in its own process) on a
+fresh database, with a deterministic hashing embedding model in place of
+sentence-transformers, then drives each scenario with a fixed number of
+concurrent clients sending requests back to back:
+
+    availability       POST /api/availability/
+    booking            POST /api/bookings/
+    group_booking      POST /api/bookings/group/  (three dates per request)
+    chat               POST /api/chat/            (knowledge base questions)
+    chat_reservation   POST /api/chat/            (booking requests in chat)
+
+Bookings are spread over distinct dates and slots, so every request is
+accepted rather than measuring the fully booked path. The response cache is
+off unless --response-cache is given, so each chat runs the whole pipeline.
+
+Run from the backend directory:
+    python -m benchmarks.load_api [--requests 500] [--concurrency 1,16,64] [--scenarios all]
+    python -m benchmarks.load_api --url http://127.0.0.1:8000   # an API that is already running
+
+p50/p95/p99 latency and throughput per scenario are written to
+benchmarks/results/load_api.json under the current commit, and compared with
+the latest earlier commit measured with the same settings on the same kind
+of host. --max-regression 20 exits non-zero when any p95 got more than 20%
+slower.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import httpx
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_RESULTS = os.path.join(os.path.dirname(__file__), "results", "load_api.json")
+SLOTS = ["5:00 PM", "5:30 PM", "6:00 PM", "6:30 PM", "7:00 PM", "7:30 PM", "8:00 PM", "8:30 PM", "9:00 PM"]
+QUESTIONS = [
+    "What kind of cuisine do you serve?",
+    "Do you have vegan options on the menu?",
+    "What are your opening hours?",
+    "Is there parking near the restaurant?",
+    "Which dishes are the spiciest?",
+    "Do you cater for private events?",
+    "Can I bring my own wine?",
+    "Are your curries gluten free?",
+]
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic stand-in for the sentence-transformers model: signed hashed bag of words, unit length"""
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def _embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in re.findall(r"[a-z0-9]+", text.lower()):
+            digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dim] += 1 if digest[4] & 1 else -1
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+
+def _day(year, offset):
+    return (date(year, 1, 1) + timedelta(days=offset)).isoformat()
+
+
+# Request n of a scenario -> JSON body. Each booking scenario has its own year
+# and walks through the slots, so scenarios and repeated runs never compete
+# for the same seats.
+
+def availability_body(n):
+    return {"date": _day(2030, n // len(SLOTS) % 365), "time": SLOTS[n % len(SLOTS)], "guests": 2}
+
+def booking_body(n):
+    return {"date": _day(2031, n // len(SLOTS)), "time": SLOTS[n % len(SLOTS)], "guests": 2,
+            "name": f"Load {n}", "email": f"load{n}@example.com", "phone": "555-0100"}
+
+def group_booking_body(n):
+    first = n // len(SLOTS) * 3
+    return {"dates": [_day(2041, first + i) for i in range(3)], "time": SLOTS[n % len(SLOTS)], "guests": 6,
+            "name": f"Group {n}", "email": f"group{n}@example.com", "contact_person": f"Group {n}",
+            "event_type": "Corporate"}
+
+def chat_body(n):
+    return {"message": QUESTIONS[n % len(QUESTIONS)]}
+
+def chat_reservation_body(n):
+    return {"message": f"Book a table for 2 people on {_day(2051, n // len(SLOTS))} at {SLOTS[n % len(SLOTS)]}"}
+
+
+SCENARIOS = {
+    "availability": ("/api/availability/", availability_body),
+    "booking": ("/api/bookings/", booking_body),
+    "group_booking": ("/api/bookings/group/", group_booking_body),
+    "chat": ("/api/chat/", chat_body),
+    "chat_reservation": ("/api/chat/", chat_reservation_body),
+}
+
+
+def serve(port):
+    """Child process: build the knowledge base with HashEmbeddings and run the API"""
+    import uvicorn
+
+    import main
+    from app.services import ai_service, knowledge_base
+
+    knowledge_base._embeddings = HashEmbeddings()
+    ai_service.warm_up()  # Ready before the port opens, so no request pays for it
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(url, process, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"{url} exited with status {process.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise SystemExit(f"{url} did not start within {timeout}s")
+
+
+def start_stack(workdir, args):
+    """Start the mock Groq server and the API as child processes; returns (processes, api_url)"""
+    groq_port, api_port = _free_port(), _free_port()
+    groq = subprocess.Popen([sys.executable, "-m", "benchmarks.mock_groq_server", "--port", str(groq_port),
+                             "--latency", str(args.llm_latency), "--token-delay", "0"], stdout=subprocess.DEVNULL)
+    env = {**os.environ, "GROQ_BASE_URL": f"http://127.0.0.1:{groq_port}", "GROQ_API_KEY": "mock",
+           "DB_FILE": os.path.join(workdir, "load.db"), "FAISS_INDEX_PATH": os.path.join(workdir, "faiss_index"),
+           "AI_WARMUP": "false", "CREW_VERBOSE": "false", "LOG_LEVEL": "WARNING"}
+    if not args.response_cache:
+        env["RESPONSE_CACHE_SIZE"] = "0"
+    api = subprocess.Popen([sys.executable, "-m", "benchmarks.load_api", "--serve", str(api_port)], env=env)
+    processes = [groq, api]
+    try:
+        _wait_until_up(f"http://127.0.0.1:{groq_port}", groq)
+        _wait_until_up(f"http://127.0.0.1:{api_port}/", api)
+    except BaseException:
+        stop_stack(processes)
+        raise
+    return processes, f"http://127.0.0.1:{api_port}"
+
+
+def stop_stack(processes):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.wait()
+
+
+def percentile(ordered, fraction):
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+async def run_scenario(url, path, body, first, requests, concurrency):
+    """Send requests [first, first + requests) from `concurrency` clients; returns the summary"""
+    latencies, errors = [], 0
+    next_request = iter(range(first, first + requests))
+
+    async def client_loop(client):
+        nonlocal errors
+        for n in next_request:
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json=body(n))
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {"requests": requests, "errors": errors, "throughput": round(requests / elapsed, 2),
+            **{f"p{q}_ms": round(percentile(latencies, q / 100) * 1000, 3) for q in (50, 95, 99)}}
+
+
+def git_commit():
+    """Short hash of HEAD, with -dirty when tracked files have uncommitted changes"""
+    def git(*command):
+        return subprocess.run(["git", *command], capture_output=True, text=True).stdout.strip()
+    commit = git("rev-parse", "--short", "HEAD") or "unknown"
+    return commit + "-dirty" if git("status", "--porcelain", "--untracked-files=no") else commit
+
+
+def load_results(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_results(path, results):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def previous_run(results, commit, settings, host):
+    """The latest run of another commit with the same settings on the same kind of host"""
+    earlier = [run for key, run in results.items()
+               if key != commit and run["settings"] == settings and run["host"] == host]
+    return max(earlier, key=lambda run: run["recorded"], default=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario and concurrency level")
+    parser.add_argument("--chat-requests", type=int, default=0, help="Requests for the chat scenarios (0: --requests)")
+    parser.add_argument("--concurrency", default="1,16,64", help="Comma-separated numbers of concurrent clients")
+    parser.add_argument("--scenarios", default="all", help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds the mock LLM takes per call")
+    parser.add_argument("--response-cache", action="store_true", help="Leave the chat response cache on")
+    parser.add_argument("--url", help="Load an API that is already running instead of starting one")
+    parser.add_argument("--results", default=DEFAULT_RESULTS, help="JSON file of results keyed by commit")
+    parser.add_argument("--no-save", action="store_true", help="Print the results without recording them")
+    parser.add_argument("--max-regression", type=float, default=0,
+                        help="Fail if a p95 is this many percent above the previous commit's (0: never)")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args.serve)
+
+    names = list(SCENARIOS) if args.scenarios == "all" else args.scenarios.split(",")
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    settings = {"requests": args.requests, "chat_requests": args.chat_requests or args.requests,
+                "llm_latency": args.llm_latency, "response_cache": args.response_cache,
+                "target": "external" if args.url else "local"}
+    host = {"machine": platform.machine(), "cpus": os.cpu_count(), "python": platform.python_version()}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        processes, url = ([], args.url.rstrip("/")) if args.url else start_stack(workdir, args)
+        try:
+            scenarios, sent = {}, dict.fromkeys(names, 0)
+            for concurrency in levels:
+                for name in names:
+                    path, body = SCENARIOS[name]
+                    requests = settings["chat_requests"] if name.startswith("chat") else args.requests
+                    summary = asyncio.run(run_scenario(url, path, body, sent[name], requests, concurrency))
+                    sent[name] += requests
+                    scenarios[f"{name}@{concurrency}"] = summary
+                    print(f"{name:<17} c={concurrency:<4} {summary['throughput']:8.1f} req/s  "
+                          f"p50 {summary['p50_ms']:8.1f} ms  p95 {summary['p95_ms']:8.1f} ms  "
+                          f"p99 {summary['p99_ms']:8.1f} ms  errors {summary['errors']}")
+        finally:
+            stop_stack(processes)
+
+    results = load_results(args.results)
+    commit = git_commit()
+    baseline = previous_run(results, commit, settings, host)
+    regressions = []
+    if baseline:
+        print(f"\np95 against {baseline['commit']} ({baseline['recorded']}):")
+        for key, summary in scenarios.items():
+            before = baseline["scenarios"].get(key)
+            if not before:
+                continue
+            change = (summary["p95_ms"] / before["p95_ms"] - 1) * 100
+            print(f"  {key:<22} {before['p95_ms']:8.1f} -> {summary['p95_ms']:8.1f} ms  {change:+6.1f}%")
+            if args.max_regression and change > args.max_regression:
+                regressions.append(f"{key} p95 {change:+.1f}%")
+
+    if not args.no_save:
+        results[commit] = {"commit": commit, "recorded": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                           "settings": settings, "host": host, "scenarios": scenarios}
+        save_results(args.results, results)
+        print(f"\nRecorded under {commit} in {args.results}")
+    if regressions:
+        raise SystemExit(f"p95 regressed more than {args.max_regression:g}%: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
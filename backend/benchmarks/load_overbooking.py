@@ -0,0 +1,60 @@
+"""Fire concurrent bookings at one slot and verify it never exceeds MAX_CAPACITY.
+
+Run from the backend directory:
+    python -m benchmarks.load_overbooking [--requests 500] [--threads 32]
+
+Exits non-zero if the slot ends up overbooked.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.db import database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=32)
+    args = parser.parse_args()
+    if args.requests < 1 or args.threads < 1:
+        parser.error("--requests and --threads must be at least 1")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_FILE = os.path.join(tmp, "load.db")
+        database.init_db()
+
+        date, slot = "2025-06-13", "7:00 PM"
+        # Only as many parties as there are requests to make, or the gate never opens
+        first_wave = min(args.threads, args.requests)
+        start_gate = threading.Barrier(first_wave)
+
+        def book(i):
+            if i < first_wave:
+                start_gate.wait()  # Release the first wave at the same instant
+            booking_id, _ = database.reserve_booking(date, slot, random.randint(1, 8), name=f"Load {i}")
+            return booking_id != -1
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            accepted = sum(pool.map(book, range(args.requests)))
+        elapsed = time.perf_counter() - start
+
+        total = sum(b["guests"] for b in database.get_bookings(date, slot))
+        database.close_connections()
+
+    print(f"{args.requests} requests on {args.threads} threads in {elapsed:.2f}s: "
+          f"{accepted} accepted, {total}/{database.MAX_CAPACITY} seats booked")
+    if total > database.MAX_CAPACITY:
+        print("FAIL: slot overbooked")
+        sys.exit(1)
+    print("OK: capacity respected")
+
+
+if __name__ == "__main__":
+    main()
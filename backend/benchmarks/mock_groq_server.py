@@ -0,0 +1,103 @@
+"""Local stand-in for the Groq chat completions API, for testing llm_gateway offline.
+
+Serves POST /openai/v1/chat/completions (plain and "stream": true) with
+configurable latency and failures. Run from the backend directory:
+    python -m benchmarks.mock_groq_server [--port 8001] [--latency 0.2] [--fail-rate 0.2]
+then start the API with GROQ_BASE_URL=http://127.0.0.1:8001.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANSWER = "We serve authentic North Indian cuisine, with vegetarian, vegan and halal options every evening."
+
+
+class MockGroqHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so connection pooling is visible
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        options = self.server.options
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with self.server.lock:
+            self.server.requests += 1
+
+        if self.path != "/openai/v1/chat/completions":
+            return self._json(404, {"error": {"message": "Not found"}})
+        if random.random() < options.fail_rate:
+            status = options.fail_status
+            headers = {"Retry-After": str(options.retry_after)} if status == 429 and options.retry_after else {}
+            return self._json(status, {"error": {"message": "Injected failure"}}, headers)
+
+        time.sleep(options.latency)
+        if body.get("stream"):
+            return self._stream(options.token_delay)
+        self._json(200, {"choices": [{"index": 0, "message": {"role": "assistant", "content": ANSWER},
+                                      "finish_reason": "stop"}]})
+
+    def _json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, token_delay):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")  # The body ends when the connection does
+        self.end_headers()
+        for word in ANSWER.split(" "):
+            chunk = {"choices": [{"index": 0, "delta": {"content": word + " "}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(token_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+
+class MockGroqServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # The default backlog of 5 resets connections under a burst
+
+
+def start_mock_server(port=0, latency=0.05, token_delay=0.005, fail_rate=0.0, fail_status=503, retry_after=0):
+    """Start the server on a background thread; returns (server, base_url)"""
+    server = MockGroqServer(("127.0.0.1", port), MockGroqHandler)
+    server.options = argparse.Namespace(latency=latency, token_delay=token_delay, fail_rate=fail_rate,
+                                        fail_status=fail_status, retry_after=retry_after)
+    server.lock = threading.Lock()
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first byte")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="Seconds between streamed tokens")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--fail-status", type=int, default=503)
+    parser.add_argument("--retry-after", type=int, default=0, help="Retry-After seconds sent with 429s")
+    args = parser.parse_args()
+
+    server, url = start_mock_server(args.port, args.latency, args.token_delay, args.fail_rate,
+                                    args.fail_status, args.retry_after)
+    print(f"Mock Groq API on {url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
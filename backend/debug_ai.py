@@ -2,6 +2,7 @@ import os
 import time
 from dotenv import load_dotenv
 from app.services.ai_service import process_inquiry, process_reservation_request
+from app.services.knowledge_base import initialize_knowledge_base, set_vector_store
 
 # Load environment variables
 load_dotenv()
@@ -13,6 +14,11 @@ def test_ai_service():
     groq_api_key = os.getenv('GROQ_API_KEY')
     print(f"GROQ API key is {'set' if groq_api_key else 'NOT SET'}")
     
+    # Load the same knowledge base the API uses
+    vector_store, message = initialize_knowledge_base()
+    set_vector_store(vector_store)
+    print(message)
+    
     # Test general inquiry
     print("\n=== Testing general inquiry ===")
     inquiry = "What kind of cuisine do you serve?"
@@ -1,13 +1,23 @@
+import logging
 import os
-import uvicorn
+from dotenv import load_dotenv
+
+# Load environment variables before the app modules read their settings
+load_dotenv()
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes import router
-from app.db.database import init_db
-from dotenv import load_dotenv
+from app.db.database import init_db, close_connections
+from app.utils.executors import shutdown_executors, submit_llm
+from app.utils.config import get_ai_warmup, configure_logging
+from app.utils.metrics import MetricsMiddleware, render_metrics
+from app.services.ai_service import warm_up
+from app.services.llm_gateway import llm_gateway
 
-# Load environment variables
-load_dotenv()
+configure_logging()
+logger = logging.getLogger(__name__)
 
 # Create FastAPI application
 app = FastAPI(title="Indian Palace Restaurant API")
@@ -20,6 +30,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # Include API routes
 app.include_router(router, prefix="/api")
@@ -27,11 +38,26 @@ app.include_router(router, prefix="/api")
 @app.on_event("startup")
 async def startup_event():
     init_db()
-    print("Database initialized")
+    logger.info("Database initialized")
+    # Bookings are served right away; chat answers once the AI stack has loaded
+    if get_ai_warmup():
+        submit_llm(warm_up)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    shutdown_executors()
+    await llm_gateway.aclose()
+    close_connections()
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to Indian Palace Restaurant API"}
 
+@app.get("/metrics")
+async def metrics():
+    """Request, chat-stage and database latencies plus cache, LLM and booking counters for Prometheus"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
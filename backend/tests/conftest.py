@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh, migrated database file for one test"""
+    monkeypatch.setattr(database, "DB_FILE", str(tmp_path / "test.db"))
+    database.init_db()
+    yield database
+    database.close_connections()
@@ -0,0 +1,23 @@
+from app.services import analytics
+
+
+def test_refresh_without_new_data_does_not_take_the_write_lock(db, monkeypatch):
+    db.reserve_booking("2030-06-01", "7:00 PM", 4, name="First")
+    assert analytics.refresh_rollups()["new_bookings"] == 1
+
+    write_locks = []
+    real_transaction = analytics.transaction
+
+    def recording_transaction(immediate=False):
+        write_locks.append(immediate)
+        return real_transaction(immediate=immediate)
+
+    monkeypatch.setattr(analytics, "transaction", recording_transaction)
+
+    assert analytics.refresh_rollups() == {"new_bookings": 0, "changes": 0, "last_reservation_id": 1}
+    assert write_locks == [False]
+
+    db.cancel_booking(1)
+    assert analytics.refresh_rollups()["changes"] == 1
+    assert write_locks[-1] is True
+    assert analytics.get_daily_covers("2030-06-01", "2030-06-01") == []
@@ -0,0 +1,35 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import routes
+
+
+@pytest.fixture
+def client(db):
+    for i in range(150):
+        db.add_booking(f"2030-07-{i % 28 + 1:02d}", "7:00 PM", 2, name=f"Guest {i}")
+    app = FastAPI()
+    app.include_router(routes.router, prefix="/api")
+    return TestClient(app)
+
+
+def test_listing_is_paged_by_default(client):
+    first = client.get("/api/bookings/")
+    assert len(first.json()) == routes.DEFAULT_BOOKINGS_PAGE_SIZE
+
+    rest = client.get("/api/bookings/", params={"cursor": first.headers["X-Next-Cursor"]})
+    assert len(rest.json()) == 150 - routes.DEFAULT_BOOKINGS_PAGE_SIZE
+    assert "X-Next-Cursor" not in rest.headers
+    assert {b["id"] for b in first.json()}.isdisjoint(b["id"] for b in rest.json())
+
+
+def test_export_resumes_after_cursor(client):
+    page = client.get("/api/bookings/", params={"limit": 40})
+
+    export = client.get("/api/bookings/", params={"format": "ndjson", "cursor": page.headers["X-Next-Cursor"]})
+    rows = [json.loads(line) for line in export.text.splitlines()]
+    assert len(rows) == 110
+    assert {b["id"] for b in page.json()}.isdisjoint(r["id"] for r in rows)
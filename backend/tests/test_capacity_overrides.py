@@ -0,0 +1,15 @@
+def test_override_above_default_does_not_raise_capacity(db):
+    db.add_capacity_override("2030-05-01", db.MAX_CAPACITY + 30)
+
+    assert db.check_availability("2030-05-01", "7:00 PM", 2) == (True, db.MAX_CAPACITY)
+    slots = db.get_slot_availability("2030-05-01", "2030-05-01", ["7:00 PM"])
+    assert slots[("2030-05-01", "7:00 PM")] == db.MAX_CAPACITY
+    booking_id, _ = db.reserve_booking("2030-05-01", "7:00 PM", db.MAX_CAPACITY + 1, name="Too many")
+    assert booking_id == -1
+
+
+def test_override_below_default_lowers_capacity(db):
+    db.add_capacity_override("2030-05-02", 10, "6:00 PM", "9:00 PM")
+
+    assert db.check_availability("2030-05-02", "7:00 PM", 12) == (False, 10)
+    assert db.check_availability("2030-05-02", "1:00 PM", 12) == (True, db.MAX_CAPACITY)
@@ -0,0 +1,24 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+def test_pool_threads_reopen_after_close_connections(db):
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        first = pool.submit(db.get_connection).result()
+        db.close_connections()
+
+        second = pool.submit(db.get_connection).result()
+        assert second is not first
+        assert pool.submit(lambda: db.get_connection().execute("SELECT 1").fetchone()[0]).result() == 1
+
+
+def test_connections_of_exited_threads_are_dropped(db):
+    db.get_connection()
+    for _ in range(5):
+        thread = threading.Thread(target=db.get_connection)
+        thread.start()
+        thread.join()
+
+    # Each new thread closes what exited threads left behind: only this thread's and the last one's remain
+    owners = [owner for owner, _ in db._connections]
+    assert owners == [threading.current_thread(), thread]
@@ -0,0 +1,16 @@
+from app.api import routes
+
+
+def test_unfinished_jobs_are_not_evicted(monkeypatch):
+    submitted = []
+    monkeypatch.setattr(routes, "ingestion_jobs", {})
+    monkeypatch.setattr(routes, "MAX_INGESTION_JOBS", 2)
+    monkeypatch.setattr(routes, "submit_llm", lambda func, job_id: submitted.append(job_id))
+
+    queued = [routes._start_ingestion(f"menu{i}.pdf") for i in range(3)]
+    assert set(routes.ingestion_jobs) == set(queued)
+
+    routes.ingestion_jobs[queued[0]]["status"] = "completed"
+    routes.ingestion_jobs[queued[1]]["status"] = "failed"
+    newest = routes._start_ingestion("menu3.pdf")
+    assert list(routes.ingestion_jobs) == [queued[2], newest]
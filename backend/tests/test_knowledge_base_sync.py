@@ -0,0 +1,92 @@
+import hashlib
+import threading
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from app.services import knowledge_base
+
+
+class WordEmbeddings(Embeddings):
+    """Small deterministic embeddings: one hashed dimension per word"""
+
+    def embed_query(self, text):
+        vector = [0.0] * 16
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % 16] += 1.0
+        return vector
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+def contents(store):
+    return sorted(store.docstore._dict[i].page_content for i in store.index_to_docstore_id.values())
+
+
+@pytest.fixture
+def kb(tmp_path, monkeypatch):
+    """Knowledge base over plain-text ".pdf" files, one chunk per line"""
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    monkeypatch.setattr(knowledge_base, "FAISS_INDEX_PATH", str(tmp_path / "index"))
+    monkeypatch.setattr(knowledge_base, "_embeddings", WordEmbeddings())
+    monkeypatch.setattr(knowledge_base, "iter_pdf_pages",
+                        lambda paths: ((path, [open(path).read()]) for path in paths))
+    monkeypatch.setattr(knowledge_base, "_split_stream",
+                        lambda pages: (line for page in pages for line in page.splitlines() if line))
+    (docs / "menu.pdf").write_text("butter chicken\npaneer tikka")
+    (docs / "hours.pdf").write_text("open at five")
+    store, _ = knowledge_base.initialize_knowledge_base(str(docs), force_rebuild=True)
+    return docs, store, monkeypatch
+
+
+def test_failed_sync_leaves_live_store_and_next_sync_recovers(kb):
+    docs, store, monkeypatch = kb
+    before = contents(store)
+    (docs / "hours.pdf").write_text("open at six")
+
+    def failing_extract(paths):
+        raise RuntimeError("extraction failed")
+        yield
+
+    with monkeypatch.context() as m:
+        m.setattr(knowledge_base, "iter_pdf_pages", failing_extract)
+        with pytest.raises(RuntimeError):
+            knowledge_base.sync_knowledge_base(store, str(docs))
+    assert contents(store) == before
+
+    updated, summary = knowledge_base.sync_knowledge_base(store, str(docs))
+    assert summary["chunks_added"] == 1 and summary["chunks_removed"] == 1
+    assert contents(updated) == ["butter chicken", "open at six", "paneer tikka"]
+    assert contents(store) == before  # The live store was copied, not changed
+
+
+@pytest.mark.parametrize("supports_removal", [True, False])
+def test_deleting_the_last_pdf_stops_serving_its_chunks(kb, supports_removal):
+    docs, store, monkeypatch = kb
+    monkeypatch.setattr(knowledge_base, "vector_store", store)
+    # Approximate indexes cannot drop chunks, so their sync rebuilds from nothing
+    monkeypatch.setattr(knowledge_base, "_supports_removal", lambda index: supports_removal)
+    (docs / "menu.pdf").unlink()
+    (docs / "hours.pdf").unlink()
+
+    knowledge_base.sync_live_knowledge_base(str(docs))
+
+    live = knowledge_base.get_vector_store()
+    assert live is None if not supports_removal else contents(live) == []
+
+
+def test_sync_waiting_on_a_rebuild_starts_from_the_rebuilt_store(kb):
+    docs, store, monkeypatch = kb
+    monkeypatch.setattr(knowledge_base, "vector_store", store)
+    with knowledge_base._knowledge_base_lock:
+        syncing = threading.Thread(target=knowledge_base.sync_live_knowledge_base, args=(str(docs),))
+        syncing.start()
+        (docs / "hours.pdf").write_text("open at six")
+        rebuilt, _ = knowledge_base.load_live_knowledge_base(str(docs), force_rebuild=True)
+    syncing.join()
+
+    # Nothing changed since the rebuild, so the sync kept it rather than a copy of the old store
+    assert knowledge_base.get_vector_store() is rebuilt
+    assert contents(rebuilt) == ["butter chicken", "open at six", "paneer tikka"]
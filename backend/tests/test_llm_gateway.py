@@ -0,0 +1,92 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.llm_gateway import CircuitBreaker, LLMGateway, LLMUnavailable
+
+
+def half_open_gateway():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == "half_open"
+    return LLMGateway(base_url="http://upstream.invalid", api_key="test", max_retries=1, retry_base_delay=0,
+                      breaker=breaker)
+
+
+def test_malformed_body_during_trial_does_not_wedge_the_circuit():
+    gateway = half_open_gateway()
+
+    async def malformed():
+        raise KeyError("choices")
+
+    async def ok():
+        return "answer"
+
+    async def run():
+        gateway._get_client()
+        with pytest.raises(LLMUnavailable):
+            await gateway._with_retries(malformed, float("inf"))
+        gateway.breaker.reset_timeout = 0
+        return await gateway._with_retries(ok, float("inf"))
+
+    assert asyncio.run(run()) == "answer"
+    assert gateway.breaker.state == "closed"
+
+
+def test_cancelled_trial_is_released():
+    gateway = half_open_gateway()
+
+    async def cancelled():
+        raise asyncio.CancelledError()
+
+    async def run():
+        gateway._get_client()
+        with pytest.raises(asyncio.CancelledError):
+            await gateway._with_retries(cancelled, float("inf"))
+
+    asyncio.run(run())
+    assert gateway.breaker.allow()
+
+
+def test_call_reraises_non_transient_errors_without_retrying():
+    gateway = half_open_gateway()
+    attempts = []
+
+    def missing_key():
+        attempts.append(1)
+        raise ValueError("GROQ_API_KEY not found in environment variables")
+
+    with pytest.raises(ValueError):
+        gateway.call(missing_key)
+    assert len(attempts) == 1
+    assert gateway.breaker.allow()
+
+
+def test_call_retries_transient_errors():
+    gateway = LLMGateway(base_url="http://upstream.invalid", api_key="test", max_retries=2, retry_base_delay=0)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise httpx.ConnectError("connection refused")
+        return "answer"
+
+    assert gateway.call(flaky) == "answer"
+    assert len(attempts) == 3
+
+
+def test_api_key_and_base_url_are_read_when_the_client_is_created(monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    monkeypatch.delenv("GROQ_BASE_URL", raising=False)
+    gateway = LLMGateway()
+    # As when main.py or ai_service loads .env after the gateway was imported
+    monkeypatch.setenv("GROQ_API_KEY", "sk-from-dotenv")
+    monkeypatch.setenv("GROQ_BASE_URL", "http://127.0.0.1:8001/")
+
+    client = gateway._get_client()
+
+    assert client.headers["Authorization"] == "Bearer sk-from-dotenv"
+    assert str(client.base_url) == "http://127.0.0.1:8001"
+    asyncio.run(gateway.aclose())
@@ -0,0 +1,26 @@
+from app.services import ai_service
+
+
+def test_impossible_date_is_not_fully_parsed():
+    for prompt in ("Book a table for 2 people on 2026-02-30 at 7:00 PM",
+                   "Book a table for 2 people on 2026-13-45 at 7:00 PM"):
+        details = ai_service.parse_reservation_request(prompt)
+        assert details["date"] is None
+        assert not details["fully_parsed"]
+
+
+def test_impossible_date_is_not_booked(db):
+    fast_before = ai_service.get_reservation_path_stats()["fast"]
+
+    reply = ai_service.process_reservation_request("Book a table for 2 people on 2026-02-30 at 7:00 PM")
+
+    assert "2026-02-30 is not a valid date" in reply
+    assert db.get_bookings() == []
+    assert ai_service.get_reservation_path_stats()["fast"] == fast_before
+
+
+def test_valid_date_is_booked_with_template(db):
+    reply = ai_service.process_reservation_request("Book a table for 1 person on 2030-03-01 at 7:00 PM")
+
+    assert "Reservation confirmed for 1 person on 2030-03-01 at 7:00 PM" in reply
+    assert [(b["date"], b["guests"]) for b in db.get_bookings()] == [("2030-03-01", 1)]
@@ -0,0 +1,13 @@
+import pytest
+
+
+@pytest.mark.parametrize("guests", [0, -40])
+def test_party_of_fewer_than_one_guest_is_rejected(db, guests):
+    with pytest.raises(ValueError):
+        db.reserve_booking("2030-01-01", "7:00 PM", guests)
+    with pytest.raises(ValueError):
+        db.reserve_group_bookings(["2030-01-01", "2030-01-02"], "7:00 PM", guests)
+
+    # Nothing was written, so the room still holds exactly MAX_CAPACITY
+    assert db.reserve_booking("2030-01-01", "7:00 PM", db.MAX_CAPACITY + 1)[0] == -1
+    assert db.reserve_booking("2030-01-01", "7:00 PM", db.MAX_CAPACITY)[0] != -1
@@ -0,0 +1,41 @@
+import pytest
+
+from app.services.response_cache import ResponseCache, history_context
+from app.services.session_store import SessionStore
+
+HISTORY = [{"role": "user", "content": "Do you serve lamb curry?"},
+           {"role": "assistant", "content": "Yes, our rogan josh is a lamb curry."}]
+
+
+def test_self_contained_questions_share_answers_across_sessions():
+    cache = ResponseCache(similarity_threshold=0)
+    cache.put("What are your opening hours?", "<p>5pm to 11pm</p>", context=history_context("What are your opening hours?"))
+
+    question = "what are your opening hours"
+    assert history_context(question, HISTORY) == ""
+    assert cache.get(question, context=history_context(question, HISTORY)) == "<p>5pm to 11pm</p>"
+
+
+def test_follow_ups_are_cached_per_previous_exchange():
+    cache = ResponseCache(similarity_threshold=0)
+    question = "Is it spicy?"
+    context = history_context(question, HISTORY)
+    cache.put(question, "<p>Medium hot</p>", context=context)
+
+    other = [{"role": "user", "content": "Do you have a mango lassi?"},
+             {"role": "assistant", "content": "Yes, it is made fresh."}]
+    assert cache.get(question, context=history_context(question, HISTORY)) == "<p>Medium hot</p>"
+    assert cache.get(question, context=history_context(question, other)) is None
+    assert cache.get(question) is None
+
+
+def test_session_store_is_abstract():
+    with pytest.raises(TypeError):
+        SessionStore()
+
+
+def test_semantic_tier_is_off_by_default():
+    cache = ResponseCache()
+    cache.put("Do you have vegan options?", "<p>Vegan answer</p>", [1.0, 0.0])
+    assert not cache.semantic_enabled
+    assert cache.get("Do you have vegetarian options?", [0.99, 0.01]) is None
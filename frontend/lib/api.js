@@ -60,6 +60,50 @@ export const api = {
     });
   },
 
+  /**
+   * Send a message to the chatbot and receive the answer as it is generated
+   * @param {string} message - User's message
+   * @param {Object} handlers - { onSession(id), onToken(text), onHtml(html), onDone(response, sessionId) }
+   * @param {string} sessionId - Optional existing session ID
+   * @returns {Promise<void>} - Resolves when the stream ends
+   */
+  async streamChatMessage(message, handlers = {}, sessionId = null) {
+    const response = await fetch(`${API_URL}/chat/stream/`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ message, session_id: sessionId }),
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`API error: ${response.status} ${response.statusText}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    // Server-Sent Events are separated by a blank line
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const rawEvent = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+
+        const event = rawEvent.match(/^event: (.*)$/m)?.[1];
+        const data = JSON.parse(rawEvent.match(/^data: (.*)$/m)?.[1] || '{}');
+
+        if (event === 'session') handlers.onSession?.(data.session_id);
+        else if (event === 'token') handlers.onToken?.(data.text);
+        else if (event === 'html') handlers.onHtml?.(data.html);
+        else if (event === 'done') handlers.onDone?.(data.response, data.session_id);
+        else if (event === 'error') throw new Error(data.detail);
+      }
+    }
+  },
+
   /**
    * Create a new reservation
    * @param {Object} reservationData - Reservation details
@@ -72,6 +116,21 @@ export const api = {
     });
   },
 
+  /**
+   * Get seats left for every time slot across a date range
+   * @param {string} startDate - First date (YYYY-MM-DD)
+   * @param {string} endDate - Last date (YYYY-MM-DD), at most 31 days after startDate
+   * @param {number} guests - Party size
+   * @param {Array<string>} times - Optional time slots; defaults to the server's configured slots
+   * @returns {Promise<Object>} - { slots: [{ date, time, available, seats_left }] }
+   */
+  async getAvailabilityRange(startDate, endDate, guests, times = null) {
+    return fetchAPI('/availability/range/', {
+      method: 'POST',
+      body: JSON.stringify({ start_date: startDate, end_date: endDate, guests, times }),
+    });
+  },
+
   /**
    * Get menu items
    * @param {string} category - Optional category filter